@@ -0,0 +1,96 @@
+# backend/admission.py
+import math
+import os
+import threading
+import time
+
+from fastapi import HTTPException
+
+HTTP_TOO_MANY_REQUESTS = 429
+
+# Per-client deploy budget: a burst of DEPLOY_BURST_PER_CLIENT requests,
+# refilled at DEPLOYS_PER_MINUTE
+DEPLOYS_PER_MINUTE = float(os.environ.get("DEPLOYS_PER_MINUTE", "10"))
+DEPLOY_BURST_PER_CLIENT = int(os.environ.get("DEPLOY_BURST_PER_CLIENT", "10"))
+
+# Maximum number of pending deploy jobs queued for a single wave
+MAX_PENDING_PER_WAVE = int(os.environ.get("MAX_PENDING_PER_WAVE", "50"))
+
+# Retry-After sent when a wave's queue is full
+QUEUE_FULL_RETRY_AFTER = 30
+
+# Buckets kept in memory before idle, fully refilled ones are dropped
+MAX_TRACKED_CLIENTS = 10000
+
+# Addresses of proxies trusted to name the client they forward for in the
+# X-Client-Id header; from anyone else the header is ignored, since it is
+# not authenticated and could be used to dodge or drain a budget
+TRUSTED_PROXIES = frozenset(
+    address.strip()
+    for address in os.environ.get("TRUSTED_PROXIES", "").split(",")
+    if address.strip()
+)
+
+
+class ClientBuckets:
+    """In-memory token buckets keyed by client id."""
+
+    def __init__(
+        self,
+        per_minute: float = DEPLOYS_PER_MINUTE,
+        burst: int = DEPLOY_BURST_PER_CLIENT,
+    ):
+        self.rate = per_minute / 60
+        self.burst = burst
+        self._buckets = {}  # client id -> (tokens, last refill time)
+        self._lock = threading.Lock()
+
+    def _evict_idle(self, now: float):
+        full_after = self.burst / self.rate
+        self._buckets = {
+            client_id: (tokens, updated)
+            for client_id, (tokens, updated) in self._buckets.items()
+            if now - updated < full_after
+        }
+
+    def try_acquire(self, client_id: str) -> float:
+        """Take a token for a client.
+
+        Args:
+            client_id: Identifier of the calling client
+
+        Returns:
+            0 if the request is admitted, otherwise seconds until a token frees up
+        """
+        with self._lock:
+            now = time.monotonic()
+            tokens, updated = self._buckets.get(client_id, (self.burst, now))
+            tokens = min(self.burst, tokens + (now - updated) * self.rate)
+            if tokens >= 1:
+                self._buckets[client_id] = (tokens - 1, now)
+                if len(self._buckets) > MAX_TRACKED_CLIENTS:
+                    self._evict_idle(now)
+                return 0.0
+            self._buckets[client_id] = (tokens, now)
+            return (1 - tokens) / self.rate
+
+
+def client_id_for(request) -> str:
+    """Identify the caller for per-client admission control.
+
+    The client address, or the X-Client-Id header when the request comes
+    from one of TRUSTED_PROXIES.
+    """
+    address = request.client.host if request.client else "unknown"
+    if address in TRUSTED_PROXIES:
+        return request.headers.get("X-Client-Id") or address
+    return address
+
+
+def too_many_requests(detail: str, retry_after: float) -> HTTPException:
+    """Build the 429 response used for every admission-control rejection."""
+    return HTTPException(
+        status_code=HTTP_TOO_MANY_REQUESTS,
+        detail=detail,
+        headers={"Retry-After": str(math.ceil(retry_after))},
+    )
@@ -0,0 +1,9 @@
+# backend/async_database.py
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+# Same database as backend.database, opened through an async driver
+# (use postgresql+asyncpg://... for PostgreSQL)
+ASYNC_SQLALCHEMY_DATABASE_URL = "sqlite+aiosqlite:///./ota_jobs.db"
+
+engine = create_async_engine(ASYNC_SQLALCHEMY_DATABASE_URL)
+AsyncSessionLocal = async_sessionmaker(bind=engine, expire_on_commit=False)
@@ -0,0 +1,411 @@
+# backend/async_main.py
+"""Async variant of backend.main.
+
+Serves the same API using AsyncEngine/AsyncSession, so a request waiting on
+the database yields the event loop instead of holding a threadpool worker.
+Run it with ``uvicorn backend.async_main:app``.
+"""
+
+from contextlib import asynccontextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import List, Optional
+
+from fastapi import Depends, FastAPI, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from . import admission, async_database, database, models
+from .checkpoints import (
+    ClusterReport,
+    PodRef,
+    cluster_status,
+    load_checkpoint,
+    mark_targets_done,
+    patch_stats,
+    record_targets,
+    report_cluster,
+)
+from .export import (
+    EXPORT_FORMATS,
+    encode_header,
+    encode_rows,
+    export_fields,
+    export_statement,
+)
+from .inventory import (
+    PodEvent,
+    apply_pod_events,
+    inventory_summary,
+    list_inventory_pods,
+    target_counts,
+)
+from .jobs import (
+    CHANGES_LIMIT,
+    DEPLOY_PRIORITY,
+    MAX_DEPLOY_PRIORITY,
+    ROLLBACK_PRIORITY,
+    RolloutMode,
+    changed_jobs,
+    claim_next,
+    effective_priority,
+    job_to_dict,
+    next_queued_job,
+    normalize_clusters,
+    pending_count,
+    renew_lease,
+    supersede_rolled_back_deploys,
+    supersede_stale_deploys,
+)
+from .timeseries import (
+    SERIES_MAX_POINTS,
+    MetricSnapshot,
+    metric_series,
+    record_snapshot,
+)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    async with async_database.engine.begin() as conn:
+        await conn.run_sync(database.create_schema)
+    yield
+
+
+app = FastAPI(lifespan=lifespan)
+
+deploy_buckets = admission.ClientBuckets()
+
+
+async def get_db():
+    async with async_database.AsyncSessionLocal() as db:
+        yield db
+
+
+@app.get("/")
+async def root():
+    return {"msg": "Kubernetes Deployment Manager Running"}
+
+
+@app.post("/ota/deploy")
+async def deploy_ota(
+    request: Request,
+    version: str,
+    wave: str = "canary",
+    mode: RolloutMode = "pods",
+    priority: int = Query(DEPLOY_PRIORITY, ge=DEPLOY_PRIORITY, le=MAX_DEPLOY_PRIORITY),
+    clusters: Optional[str] = None,
+    db: AsyncSession = Depends(get_db),
+):
+    """Deploy a new version.
+
+    Applies the same admission control as backend.main.deploy_ota.
+
+    Args:
+        version: The version to deploy
+        wave: The deployment wave (default: "canary")
+        mode: Patch individual pods ("pods") or Deployment templates ("deployment")
+        priority: Queue priority from 0 (default) to 49; rollbacks use 100
+        clusters: Comma-separated kubeconfig contexts rolled out to in
+            parallel (default: the runner's current context)
+    """
+    client_id = admission.client_id_for(request)
+    retry_after = deploy_buckets.try_acquire(client_id)
+    if retry_after:
+        raise admission.too_many_requests(
+            f"Deploy rate limit exceeded for client {client_id}",
+            retry_after,
+        )
+
+    if await db.run_sync(pending_count, wave) >= admission.MAX_PENDING_PER_WAVE:
+        raise admission.too_many_requests(
+            f"Too many pending jobs for wave {wave}",
+            admission.QUEUE_FULL_RETRY_AFTER,
+        )
+    job = models.OTAJob(
+        version=version,
+        wave=wave,
+        mode=mode,
+        priority=priority,
+        clusters=normalize_clusters(clusters),
+        status="pending",
+    )
+    db.add(job)
+    await db.commit()
+    await db.refresh(job)
+    return {"job_id": job.id, "version": job.version, "status": job.status}
+
+
+@app.get("/ota/jobs")
+async def list_jobs(db: AsyncSession = Depends(get_db)):
+    """List all deployment jobs.
+
+    Returns:
+        List of all deployment jobs with their details
+    """
+    jobs = await db.scalars(
+        select(models.OTAJob).order_by(models.OTAJob.created_at.desc())
+    )
+    return [job_to_dict(job) for job in jobs]
+
+
+@app.get("/ota/jobs/changes")
+async def list_job_changes(
+    since: Optional[str] = None,
+    limit: int = CHANGES_LIMIT,
+    db: AsyncSession = Depends(get_db),
+):
+    """List jobs whose status changed since a cursor."""
+    try:
+        jobs, cursor = await db.run_sync(changed_jobs, since, limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid cursor: {e}")
+    return {"jobs": [job_to_dict(job) for job in jobs], "cursor": cursor}
+
+
+@app.get("/ota/jobs/export")
+async def export_jobs(
+    fmt: str = Query("ndjson", alias="format"),
+    include_pods: bool = False,
+):
+    """Stream the full job history as NDJSON or CSV."""
+    if fmt not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unknown export format {fmt}")
+    fields = export_fields(include_pods)
+
+    async def chunks():
+        # The session must outlive the handler, so it is not a dependency
+        async with async_database.AsyncSessionLocal() as db:
+            header = encode_header(fmt, fields)
+            if header:
+                yield header
+            result = await db.stream(export_statement(include_pods))
+            async for rows in result.partitions():
+                yield encode_rows(rows, fmt, fields)
+
+    return StreamingResponse(
+        chunks(),
+        media_type=EXPORT_FORMATS[fmt],
+        headers={"Content-Disposition": f'attachment; filename="ota_jobs.{fmt}"'},
+    )
+
+
+@app.post("/ota/jobs/claim")
+async def claim_job(runner_id: str = "default", db: AsyncSession = Depends(get_db)):
+    """Claim the next job for the job runner.
+
+    Returns:
+        The claimed job (moved to its in-progress status), or None if the
+        queue is empty, plus the number of jobs superseded by this claim
+    """
+    superseded = await db.run_sync(supersede_stale_deploys)
+    superseded += await db.run_sync(supersede_rolled_back_deploys)
+    job = await db.run_sync(claim_next, runner_id)
+    return {
+        "job": job_to_dict(job) if job else None,
+        "superseded": superseded,
+    }
+
+
+@app.get("/ota/jobs/next")
+async def peek_next_job(db: AsyncSession = Depends(get_db)):
+    """Show the job that would be claimed next, without claiming it.
+
+    Returns:
+        The next queued job with its effective (aged) priority, or None
+    """
+    job = await db.run_sync(next_queued_job)
+    if job is None:
+        return {"job": None}
+    return {
+        "job": {**job_to_dict(job), "effective_priority": effective_priority(job)},
+    }
+
+
+@app.get("/ota/jobs/{job_id}/checkpoint")
+async def get_checkpoint(
+    job_id: int,
+    cluster: str = "",
+    db: AsyncSession = Depends(get_db),
+):
+    """Rollout progress of a job, used by the runner to resume it."""
+    return {"checkpoint": await db.run_sync(load_checkpoint, job_id, cluster)}
+
+
+@app.put("/ota/jobs/{job_id}/targets")
+async def put_targets(
+    job_id: int,
+    pods: List[PodRef],
+    cluster: str = "",
+    db: AsyncSession = Depends(get_db),
+):
+    """Record the pods a job will patch. Ignored if a target set exists."""
+    return {"targets": await db.run_sync(record_targets, job_id, pods, cluster)}
+
+
+@app.post("/ota/jobs/{job_id}/checkpoint")
+async def post_checkpoint(
+    job_id: int,
+    pods: List[PodRef],
+    step: int,
+    cluster: str = "",
+    db: AsyncSession = Depends(get_db),
+):
+    """Mark a batch of target pods as patched and renew the runner's lease."""
+    done = await db.run_sync(mark_targets_done, job_id, pods, step, cluster)
+    return {"done": done}
+
+
+@app.post("/ota/jobs/{job_id}/heartbeat")
+async def post_heartbeat(
+    job_id: int,
+    runner_id: str = "default",
+    db: AsyncSession = Depends(get_db),
+):
+    """Renew the runner's lease on an in-progress job."""
+    return {"renewed": await db.run_sync(renew_lease, job_id, runner_id)}
+
+
+@app.get("/ota/jobs/{job_id}/clusters")
+async def get_cluster_status(job_id: int, db: AsyncSession = Depends(get_db)):
+    """Per-cluster status of a multi-cluster job."""
+    return {"clusters": await db.run_sync(cluster_status, job_id)}
+
+
+@app.post("/ota/jobs/{job_id}/clusters")
+async def post_cluster_status(
+    job_id: int,
+    cluster: str,
+    report: ClusterReport,
+    db: AsyncSession = Depends(get_db),
+):
+    """Record the runner's outcome for one cluster of a job."""
+    await db.run_sync(report_cluster, job_id, cluster, report)
+    return {"status": "success", "job_id": job_id, "cluster": cluster}
+
+
+@app.post("/ota/update_status")
+async def update_status(job_id: int, status: str, db: AsyncSession = Depends(get_db)):
+    """Update the status of a deployment job.
+
+    Args:
+        job_id: The ID of the job to update
+        status: The new status
+
+    Returns:
+        Status of the update operation
+    """
+    job = await db.get(models.OTAJob, job_id)
+    if job:
+        job.status = status
+        job.updated_at = datetime.utcnow()
+        await db.commit()
+        return {"status": "success", "job_id": job.id, "new_status": job.status}
+    return {"status": "error", "message": "Job not found"}
+
+
+@app.post("/ota/rollback")
+async def rollback_deployment(
+    version: str,
+    wave: str = "green",
+    clusters: Optional[str] = None,
+    db: AsyncSession = Depends(get_db),
+):
+    """Rollback to a previous version.
+
+    Args:
+        version: The version to rollback to
+        wave: The rollback scope (default: "green")
+        clusters: Comma-separated kubeconfig contexts rolled back in
+            parallel (default: the runner's current context)
+    """
+    job = models.OTAJob(
+        version=version,
+        wave=wave,
+        priority=ROLLBACK_PRIORITY,
+        clusters=normalize_clusters(clusters),
+        status="rollback_pending",
+    )
+    db.add(job)
+    await db.commit()
+    await db.refresh(job)
+    return {
+        "job_id": job.id,
+        "version": job.version,
+        "status": job.status,
+        "type": "rollback",
+    }
+
+
+@app.post("/ota/inventory/events")
+async def ingest_pod_events(
+    events: List[PodEvent],
+    reset: bool = False,
+    db: AsyncSession = Depends(get_db),
+):
+    """Apply a batch of pod watch events to the fleet inventory."""
+    return {"applied": await db.run_sync(apply_pod_events, events, reset)}
+
+
+@app.get("/ota/inventory")
+async def get_inventory(db: AsyncSession = Depends(get_db)):
+    """Fleet version distribution."""
+    return await db.run_sync(inventory_summary)
+
+
+@app.get("/ota/inventory/pods")
+async def get_inventory_pods(
+    version: Optional[str] = None,
+    status: Optional[str] = None,
+    limit: int = Query(100, ge=1),
+    after: int = 0,
+    db: AsyncSession = Depends(get_db),
+):
+    """Page through inventoried pods."""
+    return await db.run_sync(list_inventory_pods, version, status, limit, after)
+
+
+@app.get("/ota/inventory/targets")
+async def get_inventory_targets(version: str, db: AsyncSession = Depends(get_db)):
+    """Pods a rollout of a version would start from, for the rollout planner."""
+    return await db.run_sync(target_counts, version)
+
+
+@app.get("/ota/stats/patches")
+async def get_patch_stats(db: AsyncSession = Depends(get_db)):
+    """Per-pod patch latency and retry statistics of recent rollouts."""
+    return {"stats": await db.run_sync(patch_stats)}
+
+
+@app.post("/ota/metrics/snapshot")
+async def post_metrics_snapshot(
+    snapshot: MetricSnapshot,
+    db: AsyncSession = Depends(get_db),
+):
+    """Record a periodic metrics snapshot from the job runner."""
+    return {"recorded": await db.run_sync(record_snapshot, snapshot)}
+
+
+@app.get("/ota/metrics/series")
+async def get_metrics_series(
+    names: Optional[List[str]] = Query(None, alias="name"),
+    window: int = 3600,
+    max_points: int = SERIES_MAX_POINTS,
+    db: AsyncSession = Depends(get_db),
+):
+    """Downsampled metric time series for the dashboard's trend charts."""
+    try:
+        return await db.run_sync(metric_series, names, window, max_points)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid query: {e}")
+
+
+@app.get("/metrics")
+def metrics():
+    metrics_path = Path(__file__).parent.parent / "metrics.txt"
+    try:
+        content = metrics_path.read_text(encoding="utf-8")
+        return Response(content=content, media_type="text/plain")
+    except (FileNotFoundError, OSError) as e:
+        return Response(f"# error: {e}", media_type="text/plain")
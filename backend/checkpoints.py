@@ -0,0 +1,242 @@
+# backend/checkpoints.py
+from datetime import datetime
+from typing import List, Optional
+
+from pydantic import BaseModel
+from sqlalchemy import Integer, cast, func, select
+
+from . import models
+
+# Most recent patch outcomes the rollout planner's statistics are drawn from
+PATCH_STATS_SAMPLES = 5000
+
+
+class PodRef(BaseModel):
+    namespace: str
+    name: str
+    # Patch outcome, sent by runners that time their patches
+    patched: bool = True
+    latency: Optional[float] = None
+    attempts: Optional[int] = None
+
+
+def _renew_lease(db, job_id):
+    db.query(models.OTAJob).filter(models.OTAJob.id == job_id).update(
+        {"heartbeat_at": datetime.utcnow()}, synchronize_session=False
+    )
+
+
+def _targets(db, job_id, cluster):
+    return db.query(models.RolloutTarget).filter(
+        models.RolloutTarget.job_id == job_id,
+        models.RolloutTarget.cluster == cluster,
+    )
+
+
+def record_targets(db, job_id, pods: List[PodRef], cluster: str = ""):
+    """Persist a job's rollout target set, unless one was already recorded.
+
+    Multi-cluster jobs record one target set per cluster.
+
+    Returns:
+        Number of targets stored for the job in that cluster
+    """
+    existing = _targets(db, job_id, cluster).count()
+    if existing:
+        return existing
+    db.add_all(
+        models.RolloutTarget(
+            job_id=job_id,
+            cluster=cluster,
+            namespace=pod.namespace,
+            name=pod.name,
+        )
+        for pod in pods
+    )
+    _renew_lease(db, job_id)
+    db.commit()
+    return len(pods)
+
+
+def mark_targets_done(db, job_id, pods: List[PodRef], step: int, cluster: str = ""):
+    """Checkpoint a batch of patched pods and the rollout step reached.
+
+    Pods whose patch failed (``patched=False``) stay pending; only their
+    latency and attempt count are kept, for the planner's statistics.
+
+    Returns:
+        Number of targets newly marked done
+    """
+    done = 0
+    for pod in pods:
+        values = {"latency": pod.latency, "attempts": pod.attempts}
+        if pod.patched:
+            values.update(done=True, step=step)
+        updated = (
+            _targets(db, job_id, cluster)
+            .filter(
+                models.RolloutTarget.namespace == pod.namespace,
+                models.RolloutTarget.name == pod.name,
+                models.RolloutTarget.done.is_(False),
+            )
+            .update(values, synchronize_session=False)
+        )
+        if pod.patched:
+            done += updated
+    _renew_lease(db, job_id)
+    db.commit()
+    return done
+
+
+def load_checkpoint(db, job_id, cluster: str = ""):
+    """Rollout progress of a job in one cluster.
+
+    Returns:
+        None if no target set was recorded, otherwise the step reached, the
+        target and completed counts, and the pods still to patch
+    """
+    targets = _targets(db, job_id, cluster).order_by(models.RolloutTarget.id).all()
+    if not targets:
+        return None
+    remaining = [
+        {"namespace": t.namespace, "name": t.name} for t in targets if not t.done
+    ]
+    return {
+        "step": max((t.step or 0 for t in targets), default=0),
+        "total": len(targets),
+        "completed": len(targets) - len(remaining),
+        "remaining": remaining,
+    }
+
+
+def invalidate_checkpoints(db, clusters):
+    """Drop the checkpoints queued deploys hold in clusters being rolled back.
+
+    A rollback reverts pods a yielded deploy already checkpointed as done.
+    Without its checkpoint the deploy resumes from a fresh LIST, which
+    re-patches every pod not at its version.
+
+    Args:
+        db: Database session
+        clusters: Contexts the rollback runs in ("" = current context)
+
+    Returns:
+        Number of target rows deleted
+    """
+    queued = select(models.OTAJob.id).where(models.OTAJob.status == "pending")
+    deleted = (
+        db.query(models.RolloutTarget)
+        .filter(
+            models.RolloutTarget.job_id.in_(queued),
+            models.RolloutTarget.cluster.in_(clusters),
+        )
+        .delete(synchronize_session=False)
+    )
+    db.commit()
+    return deleted
+
+
+class ClusterReport(BaseModel):
+    status: str
+    updated: int = 0
+    skipped: int = 0
+    failed: int = 0
+
+
+def report_cluster(db, job_id, cluster: str, report: ClusterReport):
+    """Record the latest outcome of a job in one cluster."""
+    row = (
+        db.query(models.ClusterRollout)
+        .filter(
+            models.ClusterRollout.job_id == job_id,
+            models.ClusterRollout.cluster == cluster,
+        )
+        .first()
+    )
+    if row is None:
+        row = models.ClusterRollout(job_id=job_id, cluster=cluster)
+        db.add(row)
+    row.status = report.status
+    row.updated = report.updated
+    row.skipped = report.skipped
+    row.failed = report.failed
+    row.reported_at = datetime.utcnow()
+    _renew_lease(db, job_id)
+    db.commit()
+
+
+def cluster_status(db, job_id):
+    """Per-cluster status of a job.
+
+    Returns:
+        One entry per reported cluster with its status and pod counts, plus
+        checkpointed progress (completed/total targets) where recorded
+    """
+    progress = {
+        cluster: (completed or 0, total)
+        for cluster, completed, total in db.query(
+            models.RolloutTarget.cluster,
+            func.sum(cast(models.RolloutTarget.done, Integer)),
+            func.count(models.RolloutTarget.id),
+        )
+        .filter(models.RolloutTarget.job_id == job_id)
+        .group_by(models.RolloutTarget.cluster)
+    }
+    rows = (
+        db.query(models.ClusterRollout)
+        .filter(models.ClusterRollout.job_id == job_id)
+        .order_by(models.ClusterRollout.cluster)
+        .all()
+    )
+    reports = []
+    for row in rows:
+        completed, total = progress.get(row.cluster, (0, 0))
+        reports.append(
+            {
+                "cluster": row.cluster,
+                "status": row.status,
+                "updated": row.updated,
+                "skipped": row.skipped,
+                "failed": row.failed,
+                "completed": completed,
+                "total": total,
+                "reported_at": row.reported_at.isoformat(),
+            }
+        )
+    return reports
+
+
+def _percentile(ordered, fraction):
+    return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)]
+
+
+def patch_stats(db, samples: int = PATCH_STATS_SAMPLES):
+    """Per-pod patch latency and retry statistics of recent rollouts.
+
+    Returns:
+        None if no patch was timed yet, otherwise the sample count, mean,
+        p50 and p90 latency in seconds, mean PATCH attempts per pod and the
+        fraction of pods whose patch failed after every retry
+    """
+    rows = (
+        db.query(
+            models.RolloutTarget.latency,
+            models.RolloutTarget.attempts,
+            models.RolloutTarget.done,
+        )
+        .filter(models.RolloutTarget.latency.is_not(None))
+        .order_by(models.RolloutTarget.id.desc())
+        .limit(samples)
+        .all()
+    )
+    if not rows:
+        return None
+    latencies = sorted(latency for latency, _, _ in rows)
+    return {
+        "samples": len(rows),
+        "latency_mean": sum(latencies) / len(rows),
+        "latency_p50": _percentile(latencies, 0.5),
+        "latency_p90": _percentile(latencies, 0.9),
+        "attempts_mean": sum(attempts or 1 for _, attempts, _ in rows) / len(rows),
+        "failure_rate": sum(1 for _, _, done in rows if not done) / len(rows),
+    }
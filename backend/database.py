@@ -1,5 +1,4 @@
-# backend/database.py
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, inspect, literal, text
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 
@@ -12,3 +11,42 @@ engine = create_engine(
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 Base = declarative_base()
+
+# Columns added to an existing table that are filled from another column
+# rather than from a constant default
+COLUMN_BACKFILLS = {("ota_jobs", "updated_at"): "created_at"}
+
+
+def create_schema(conn):
+    """Create missing tables, then add columns and indexes they lack.
+
+    create_all never alters an existing table, so a database created by an
+    older release would miss the columns added since. Each one is added with
+    its constant default (or backfilled per COLUMN_BACKFILLS) so existing
+    rows read like new ones.
+
+    Args:
+        conn: Connection to run the DDL on (inside a transaction)
+    """
+    Base.metadata.create_all(conn)
+    inspector = inspect(conn)
+    for table in Base.metadata.sorted_tables:
+        existing = {column["name"] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing:
+                continue
+            ddl = f"ALTER TABLE {table.name} ADD COLUMN {column.name} "
+            ddl += column.type.compile(dialect=conn.dialect)
+            default = column.default
+            if default is not None and default.is_scalar:
+                value = literal(default.arg).compile(
+                    dialect=conn.dialect,
+                    compile_kwargs={"literal_binds": True},
+                )
+                ddl += f" DEFAULT {value}"
+            conn.execute(text(ddl))
+            source = COLUMN_BACKFILLS.get((table.name, column.name))
+            if source:
+                conn.execute(text(f"UPDATE {table.name} SET {column.name} = {source}"))
+        for index in table.indexes:
+            index.create(conn, checkfirst=True)
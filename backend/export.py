@@ -0,0 +1,92 @@
+# backend/export.py
+import csv
+import io
+import json
+from datetime import datetime
+
+from sqlalchemy import select
+
+from . import models
+
+# Content type of each export format
+EXPORT_FORMATS = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+# Rows fetched per round trip and encoded per streamed chunk
+EXPORT_BATCH_SIZE = 1000
+
+JOB_FIELDS = ("id", "version", "wave", "mode", "status", "priority", "clusters")
+# Per-pod outcome columns added by include_pods, one row per rollout target
+POD_FIELDS = ("cluster", "namespace", "pod", "patched", "step")
+
+
+def export_fields(include_pods: bool = False):
+    return JOB_FIELDS + ("created_at",) + (POD_FIELDS if include_pods else ())
+
+
+def export_statement(include_pods: bool = False):
+    """Build the export query, streamed in EXPORT_BATCH_SIZE row partitions.
+
+    With include_pods each job is outer-joined to its rollout targets, so jobs
+    without a recorded target set still appear once with empty pod columns.
+    """
+    job = models.OTAJob
+    columns = [getattr(job, field) for field in JOB_FIELDS] + [job.created_at]
+    order = [job.id]
+    if include_pods:
+        target = models.RolloutTarget
+        columns += [
+            target.cluster,
+            target.namespace,
+            target.name.label("pod"),
+            target.done.label("patched"),
+            target.step,
+        ]
+        order.append(target.id)
+    stmt = select(*columns).order_by(*order)
+    if include_pods:
+        stmt = stmt.outerjoin(target, target.job_id == job.id)
+    # stream_results asks the driver for a server-side cursor; yield_per keeps
+    # only one partition of rows buffered at a time
+    return stmt.execution_options(stream_results=True, yield_per=EXPORT_BATCH_SIZE)
+
+
+def _value(value):
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+def encode_header(fmt: str, fields) -> str:
+    """Leading chunk of an export (the CSV header row; nothing for NDJSON)."""
+    if fmt != "csv":
+        return ""
+    buffer = io.StringIO()
+    csv.writer(buffer).writerow(fields)
+    return buffer.getvalue()
+
+
+def encode_rows(rows, fmt: str, fields) -> str:
+    """Encode one partition of export rows as a single chunk."""
+    if fmt == "csv":
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows([_value(v) for v in row] for row in rows)
+        return buffer.getvalue()
+    return "".join(
+        json.dumps({field: _value(v) for field, v in zip(fields, row)}) + "\n"
+        for row in rows
+    )
+
+
+def stream_export(db, fmt: str = "ndjson", include_pods: bool = False):
+    """Yield the job history as encoded chunks of EXPORT_BATCH_SIZE rows.
+
+    Args:
+        db: Database session, kept open until the generator is exhausted
+        fmt: "ndjson" or "csv"
+        include_pods: Add one row per rollout target with its outcome
+    """
+    fields = export_fields(include_pods)
+    header = encode_header(fmt, fields)
+    if header:
+        yield header
+    result = db.execute(export_statement(include_pods))
+    for rows in result.partitions():
+        yield encode_rows(rows, fmt, fields)
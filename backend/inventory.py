@@ -0,0 +1,137 @@
+# backend/inventory.py
+from collections import Counter
+from typing import List, Optional
+
+from pydantic import BaseModel
+
+from . import models
+
+UNKNOWN = "unknown"
+
+
+class PodEvent(BaseModel):
+    """Compact pod watch event sent by the job runner."""
+
+    type: str  # ADDED, MODIFIED, DELETED
+    namespace: str
+    name: str
+    sw_version: Optional[str] = None
+    status: Optional[str] = None
+
+
+def _count_keys(sw_version, status):
+    return [("version", sw_version or UNKNOWN), ("status", status or UNKNOWN)]
+
+
+def apply_pod_events(db, events: List[PodEvent], reset: bool = False):
+    """Fold a batch of pod watch events into the inventory.
+
+    Counts are adjusted by the delta each event causes, so the cost of a batch
+    is proportional to the batch, not to the size of the fleet.
+
+    Args:
+        db: Database session
+        events: Pod events in the order they were observed
+        reset: Drop the current inventory first (used after a full LIST)
+
+    Returns:
+        Number of events applied
+    """
+    if reset:
+        db.query(models.PodInventory).delete()
+        db.query(models.InventoryCount).delete()
+
+    deltas = Counter()
+    for event in events:
+        pod = (
+            db.query(models.PodInventory)
+            .filter_by(namespace=event.namespace, name=event.name)
+            .first()
+        )
+        if pod is not None:
+            deltas.subtract(_count_keys(pod.sw_version, pod.status))
+
+        if event.type == "DELETED":
+            if pod is not None:
+                db.delete(pod)
+                db.flush()
+            continue
+
+        if pod is None:
+            pod = models.PodInventory(namespace=event.namespace, name=event.name)
+            db.add(pod)
+        pod.sw_version = event.sw_version
+        pod.status = event.status
+        deltas.update(_count_keys(event.sw_version, event.status))
+        # Flush so later events in the batch see this pod
+        db.flush()
+
+    for (kind, value), delta in deltas.items():
+        if not delta:
+            continue
+        row = db.get(models.InventoryCount, (kind, value))
+        if row is None:
+            row = models.InventoryCount(kind=kind, value=value, count=0)
+            db.add(row)
+        row.count += delta
+        if row.count <= 0:
+            db.delete(row)
+    db.commit()
+    return len(events)
+
+
+def inventory_summary(db):
+    """Per-version and per-status pod counts, read from the running totals."""
+    summary = {"version": {}, "status": {}}
+    for row in db.query(models.InventoryCount):
+        summary[row.kind][row.value] = row.count
+    return {
+        "total": sum(summary["status"].values()),
+        "versions": summary["version"],
+        "statuses": summary["status"],
+    }
+
+
+def list_inventory_pods(db, version=None, status=None, limit=100, after=0):
+    """Page through inventoried pods using keyset pagination on id.
+
+    Returns:
+        The page of pods and the cursor for the next page (None on the last)
+    """
+    query = db.query(models.PodInventory).filter(models.PodInventory.id > after)
+    if version:
+        query = query.filter(models.PodInventory.sw_version == version)
+    if status:
+        query = query.filter(models.PodInventory.status == status)
+    pods = query.order_by(models.PodInventory.id).limit(limit).all()
+    return {
+        "pods": [
+            {
+                "namespace": pod.namespace,
+                "name": pod.name,
+                "sw_version": pod.sw_version,
+                "status": pod.status,
+            }
+            for pod in pods
+        ],
+        "next": pods[-1].id if pods and len(pods) == limit else None,
+    }
+
+
+def target_counts(db, version: str):
+    """How many inventoried pods a rollout of ``version`` would touch.
+
+    Mirrors the runner's selectors: idle pods on another version are
+    candidates, idle or updated pods already on it count towards the wave.
+    """
+    pods = db.query(models.PodInventory)
+    return {
+        "candidates": pods.filter(
+            models.PodInventory.status == "idle",
+            models.PodInventory.sw_version != version,
+        ).count(),
+        "current": pods.filter(
+            models.PodInventory.status.in_(("idle", "updated")),
+            models.PodInventory.sw_version == version,
+        ).count(),
+    }
@@ -0,0 +1,403 @@
+# backend/jobs.py
+import os
+from datetime import datetime, timedelta
+from typing import Literal
+
+from sqlalchemy import and_, case, func, or_, select
+from sqlalchemy.orm import aliased
+
+from . import models
+from .checkpoints import invalidate_checkpoints
+
+# Status a claimed job moves to, keyed by its queued status
+CLAIM_TRANSITIONS = {
+    "pending": "in_progress",
+    "rollback_pending": "rollback_in_progress",
+}
+
+IN_PROGRESS_STATUSES = tuple(CLAIM_TRANSITIONS.values())
+ROLLBACK_STATUSES = ("rollback_pending", "rollback_in_progress", "rollback_complete")
+
+# How a deploy is rolled out: pod labels or Deployment pod templates
+RolloutMode = Literal["pods", "deployment"]
+
+# How much of a cluster each wave touches, narrowest first
+WAVE_RANKS = {"canary": 1, "blue": 2, "green": 3}
+
+# An in-progress job whose runner has not checkpointed for this long is
+# considered orphaned and handed to the next runner that claims work
+CLAIM_LEASE_SECONDS = int(os.environ.get("CLAIM_LEASE_SECONDS", "600"))
+
+# Queue priorities: rollbacks preempt deploys, and every AGING_SECONDS a job
+# waits adds one point so long-queued deploys are not starved
+DEPLOY_PRIORITY = 0
+MAX_DEPLOY_PRIORITY = 49  # highest priority a deploy may be queued with
+ROLLBACK_PRIORITY = 100
+AGING_SECONDS = 60
+# Aging stops short of the gap between the classes: however long a deploy
+# of the highest allowed priority waits, it never outranks a rollback
+MAX_AGING_BONUS = ROLLBACK_PRIORITY - MAX_DEPLOY_PRIORITY - 1
+
+# Default page size of the job change feed
+CHANGES_LIMIT = 500
+# updated_at is stamped before a write commits, so a job can turn up with a
+# stamp older than changes already returned. Once a client has caught up its
+# cursor is held this many seconds behind now, so such late commits are read
+# on the next poll; clients de-duplicate the re-read jobs by id.
+CHANGES_SETTLE_SECONDS = 5
+
+
+def job_to_dict(job):
+    return {
+        "id": job.id,
+        "version": job.version,
+        "wave": job.wave,
+        "mode": job.mode,
+        "status": job.status,
+        "priority": job.priority,
+        "clusters": job.clusters.split(",") if job.clusters else [],
+        "created_at": job.created_at.isoformat(),
+        "updated_at": job.updated_at.isoformat() if job.updated_at else None,
+    }
+
+
+def normalize_clusters(clusters):
+    """Canonical form of a comma-separated context list, or None if empty.
+
+    Order is kept (and duplicates dropped) so equal targets compare equal
+    when stale deploys are coalesced.
+    """
+    names = [name.strip() for name in (clusters or "").split(",")]
+    return ",".join(dict.fromkeys(name for name in names if name)) or None
+
+
+def changes_cursor(updated_at, job_id):
+    return f"{updated_at.isoformat()},{job_id}"
+
+
+def parse_changes_cursor(cursor):
+    updated_at, job_id = cursor.rsplit(",", 1)
+    return datetime.fromisoformat(updated_at), int(job_id)
+
+
+def changed_jobs(db, since=None, limit=CHANGES_LIMIT):
+    """Jobs whose status changed after a cursor, oldest change first.
+
+    The cursor pairs updated_at with the job id so jobs bumped by the same
+    bulk UPDATE (sharing a timestamp) are paged through without gaps. A full
+    page advances it to the last job returned; the last page of a poll
+    leaves it no later than CHANGES_SETTLE_SECONDS ago, so jobs changed
+    within that window are returned again by the next poll.
+
+    Args:
+        db: Database session
+        since: Cursor returned by the previous call, or None for every job
+        limit: Maximum number of jobs returned
+
+    Returns:
+        The changed jobs and the cursor to pass as ``since`` next time
+        (unchanged if nothing changed before the settle window)
+    """
+    query = db.query(models.OTAJob)
+    last = None
+    if since:
+        last = updated_at, job_id = parse_changes_cursor(since)
+        query = query.filter(
+            or_(
+                models.OTAJob.updated_at > updated_at,
+                and_(
+                    models.OTAJob.updated_at == updated_at,
+                    models.OTAJob.id > job_id,
+                ),
+            )
+        )
+    jobs = query.order_by(models.OTAJob.updated_at, models.OTAJob.id).limit(limit).all()
+    if jobs:
+        last = jobs[-1].updated_at, jobs[-1].id
+        if len(jobs) == limit:
+            # More to page through: the caller asks again right away
+            return jobs, changes_cursor(*last)
+    if last is None:
+        return jobs, since
+    settled = datetime.utcnow() - timedelta(seconds=CHANGES_SETTLE_SECONDS), 0
+    return jobs, changes_cursor(*min(last, settled))
+
+
+def effective_priority(job, now=None):
+    now = now or datetime.utcnow()
+    waited = max((now - job.created_at).total_seconds(), 0)
+    return (job.priority or 0) + min(int(waited // AGING_SECONDS), MAX_AGING_BONUS)
+
+
+def _effective_priority_column(now):
+    """effective_priority as a SQL expression, so the queue is ordered in SQL.
+
+    The aging bonus compares created_at with one cutoff timestamp per aging
+    step, computed here, rather than doing date arithmetic in SQL, so the
+    expression is the same on every database dialect.
+    """
+    # Largest bonus first: the first cutoff a job was created before wins
+    cutoffs = {
+        step: now - timedelta(seconds=step * AGING_SECONDS)
+        for step in range(MAX_AGING_BONUS, 0, -1)
+    }
+    bonus = case(
+        *(
+            (models.OTAJob.created_at <= cutoff, step)
+            for step, cutoff in cutoffs.items()
+        ),
+        else_=0,
+    )
+    return func.coalesce(models.OTAJob.priority, 0) + bonus
+
+
+def queued_jobs(db, limit=None):
+    """Return queued jobs, highest effective priority first (FIFO on ties).
+
+    Args:
+        db: Database session
+        limit: Only fetch the first ``limit`` jobs of the queue
+    """
+    query = (
+        db.query(models.OTAJob)
+        .filter(models.OTAJob.status.in_(CLAIM_TRANSITIONS))
+        .order_by(
+            _effective_priority_column(datetime.utcnow()).desc(),
+            models.OTAJob.id,
+        )
+    )
+    if limit:
+        query = query.limit(limit)
+    return query.all()
+
+
+def next_queued_job(db):
+    """The job at the head of the queue, or None if nothing is queued."""
+    jobs = queued_jobs(db, limit=1)
+    return jobs[0] if jobs else None
+
+
+def pending_count(db, wave):
+    """Count pending deploys for a wave using the (status, wave) index."""
+    return (
+        db.query(func.count(models.OTAJob.id))
+        .filter(models.OTAJob.status == "pending", models.OTAJob.wave == wave)
+        .scalar()
+    )
+
+
+def queue_depth(db):
+    """Count queued jobs, deploys and rollbacks alike."""
+    return (
+        db.query(func.count(models.OTAJob.id))
+        .filter(models.OTAJob.status.in_(tuple(CLAIM_TRANSITIONS)))
+        .scalar()
+    )
+
+
+def supersede_stale_deploys(db):
+    """Mark pending deploys superseded when a newer one targets the same scope.
+
+    Runs as a single set-based UPDATE: a pending deploy is stale if another
+    pending deploy with the same wave, mode and clusters was queued after it.
+
+    Args:
+        db: Database session
+
+    Returns:
+        Number of jobs marked superseded
+    """
+    newer = aliased(models.OTAJob)
+    newer_pending = (
+        select(newer.id)
+        .where(
+            newer.status == "pending",
+            newer.wave == models.OTAJob.wave,
+            newer.mode == models.OTAJob.mode,
+            or_(
+                newer.clusters == models.OTAJob.clusters,
+                and_(newer.clusters.is_(None), models.OTAJob.clusters.is_(None)),
+            ),
+            newer.id > models.OTAJob.id,
+        )
+        .exists()
+    )
+    superseded = (
+        db.query(models.OTAJob)
+        .filter(models.OTAJob.status == "pending", newer_pending)
+        .update(
+            {"status": "superseded", "updated_at": datetime.utcnow()},
+            synchronize_session=False,
+        )
+    )
+    db.commit()
+    return superseded
+
+
+def _wave_rank(column):
+    # Wider waves cover narrower ones: canary 1 pod, blue 2, green all
+    return case(WAVE_RANKS, value=column, else_=WAVE_RANKS["canary"])
+
+
+def supersede_rolled_back_deploys(db):
+    """Mark pending deploys queued before a rollback of their scope superseded.
+
+    If a rollback queued after a pending deploy covers its wave and targets
+    the same clusters, running the deploy (whether it yielded to the
+    rollback or never started) would re-apply the version the rollback
+    reverts, so it is retired instead.
+
+    Args:
+        db: Database session
+
+    Returns:
+        Number of jobs marked superseded
+    """
+    rollback = aliased(models.OTAJob)
+    covering_rollback = (
+        select(rollback.id)
+        .where(
+            rollback.status.in_(ROLLBACK_STATUSES),
+            rollback.id > models.OTAJob.id,
+            _wave_rank(rollback.wave) >= _wave_rank(models.OTAJob.wave),
+            or_(
+                rollback.clusters == models.OTAJob.clusters,
+                and_(rollback.clusters.is_(None), models.OTAJob.clusters.is_(None)),
+            ),
+        )
+        .exists()
+    )
+    superseded = (
+        db.query(models.OTAJob)
+        .filter(
+            models.OTAJob.status == "pending",
+            covering_rollback,
+        )
+        .update(
+            {"status": "superseded", "updated_at": datetime.utcnow()},
+            synchronize_session=False,
+        )
+    )
+    db.commit()
+    return superseded
+
+
+def _matches(column, value):
+    return column.is_(None) if value is None else column == value
+
+
+def resumable_jobs(db, runner_id, now):
+    """In-progress jobs left behind by this runner or by one whose lease expired."""
+    expired = now - timedelta(seconds=CLAIM_LEASE_SECONDS)
+    return (
+        db.query(models.OTAJob)
+        .filter(
+            models.OTAJob.status.in_(IN_PROGRESS_STATUSES),
+            or_(
+                models.OTAJob.claimed_by == runner_id,
+                models.OTAJob.heartbeat_at.is_(None),
+                models.OTAJob.heartbeat_at < expired,
+            ),
+        )
+        .order_by(models.OTAJob.id)
+        .all()
+    )
+
+
+def renew_lease(db, job_id, runner_id="default"):
+    """Renew a runner's lease on an in-progress job.
+
+    Returns:
+        True if the runner still holds the job, False if it finished or was
+        taken over by another runner
+    """
+    renewed = (
+        db.query(models.OTAJob)
+        .filter(
+            models.OTAJob.id == job_id,
+            models.OTAJob.status.in_(IN_PROGRESS_STATUSES),
+            models.OTAJob.claimed_by == runner_id,
+        )
+        .update({"heartbeat_at": datetime.utcnow()}, synchronize_session=False)
+    )
+    db.commit()
+    return bool(renewed)
+
+
+def _cluster_set(clusters):
+    # "" stands for the runner's current context, as in rollout targets
+    return set((clusters or "").split(","))
+
+
+def deploys_in_scope(db, rollback):
+    """In-progress deploys running in any of a rollback's clusters."""
+    clusters = _cluster_set(rollback.clusters)
+    running = db.query(models.OTAJob).filter(models.OTAJob.status == "in_progress")
+    return [job for job in running if clusters & _cluster_set(job.clusters)]
+
+
+def claim_next(db, runner_id="default"):
+    """Hand the next job to a runner.
+
+    Jobs interrupted mid-rollout (same runner restarting, or another runner's
+    lease expired) are resumed first; otherwise the highest-priority queued
+    job moves to its in-progress status. Claiming a rollback drops the
+    checkpoints of queued deploys in its clusters, since it reverts pods
+    they had marked done.
+
+    A rollback at the head of the queue is not handed out while a deploy in
+    its clusters is in progress on another runner: that deploy yields
+    between batches once it sees the rollback waiting, and only then is the
+    rollback claimed, so the two never patch the same pods concurrently.
+
+    Args:
+        db: Database session
+        runner_id: Identity of the claiming runner
+
+    Returns:
+        The claimed job, or None if nothing is queued
+    """
+    now = datetime.utcnow()
+    lease = {"claimed_by": runner_id, "heartbeat_at": now}
+    for job in resumable_jobs(db, runner_id, now):
+        claimed = (
+            db.query(models.OTAJob)
+            .filter(
+                models.OTAJob.id == job.id,
+                models.OTAJob.status == job.status,
+                _matches(models.OTAJob.heartbeat_at, job.heartbeat_at),
+            )
+            .update(lease, synchronize_session=False)
+        )
+        db.commit()
+        if claimed:
+            db.refresh(job)
+            return job
+
+    # Take the head of the queue; if another runner claimed it first, the
+    # compare-and-set misses and the next head is fetched
+    while (job := next_queued_job(db)) is not None:
+        if job.status == "rollback_pending" and deploys_in_scope(db, job):
+            return None
+        claimed = (
+            db.query(models.OTAJob)
+            .filter(
+                models.OTAJob.id == job.id,
+                models.OTAJob.status == job.status,
+            )
+            .update(
+                {
+                    "status": CLAIM_TRANSITIONS[job.status],
+                    "updated_at": now,
+                    **lease,
+                },
+                synchronize_session=False,
+            )
+        )
+        db.commit()
+        if claimed:
+            db.refresh(job)
+            if job.status == CLAIM_TRANSITIONS["rollback_pending"]:
+                invalidate_checkpoints(db, (job.clusters or "").split(","))
+            return job
+    return None
@@ -1,13 +1,60 @@
 # backend/main.py
+from datetime import datetime
 from pathlib import Path
+from typing import List, Optional
 
-from fastapi import FastAPI, Response
+from fastapi import FastAPI, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
 
-from . import database, models
+from . import admission, database, models
+from .checkpoints import (
+    ClusterReport,
+    PodRef,
+    cluster_status,
+    load_checkpoint,
+    mark_targets_done,
+    patch_stats,
+    record_targets,
+    report_cluster,
+)
+from .export import EXPORT_FORMATS, stream_export
+from .inventory import (
+    PodEvent,
+    apply_pod_events,
+    inventory_summary,
+    list_inventory_pods,
+    target_counts,
+)
+from .jobs import (
+    CHANGES_LIMIT,
+    DEPLOY_PRIORITY,
+    MAX_DEPLOY_PRIORITY,
+    ROLLBACK_PRIORITY,
+    RolloutMode,
+    changed_jobs,
+    claim_next,
+    effective_priority,
+    job_to_dict,
+    next_queued_job,
+    normalize_clusters,
+    pending_count,
+    renew_lease,
+    supersede_rolled_back_deploys,
+    supersede_stale_deploys,
+)
+from .timeseries import (
+    SERIES_MAX_POINTS,
+    MetricSnapshot,
+    metric_series,
+    record_snapshot,
+)
 
 app = FastAPI()
 
-models.Base.metadata.create_all(bind=database.engine)
+deploy_buckets = admission.ClientBuckets()
+
+with database.engine.begin() as conn:
+    database.create_schema(conn)
 
 
 def get_db():
@@ -24,16 +71,52 @@ def root():
 
 
 @app.post("/ota/deploy")
-def deploy_ota(version: str, wave: str = "canary"):
+def deploy_ota(
+    request: Request,
+    version: str,
+    wave: str = "canary",
+    mode: RolloutMode = "pods",
+    priority: int = Query(DEPLOY_PRIORITY, ge=DEPLOY_PRIORITY, le=MAX_DEPLOY_PRIORITY),
+    clusters: Optional[str] = None,
+):
     """Deploy a new version.
 
+    Requests are rate limited per client (the client address, or the
+    X-Client-Id header set by a trusted proxy) and rejected while the wave
+    already has MAX_PENDING_PER_WAVE pending jobs. Both cases answer 429
+    with Retry-After.
+
     Args:
         version: The version to deploy
         wave: The deployment wave (default: "canary")
+        mode: Patch individual pods ("pods") or Deployment templates ("deployment")
+        priority: Queue priority from 0 (default) to 49; rollbacks use 100
+        clusters: Comma-separated kubeconfig contexts rolled out to in
+            parallel (default: the runner's current context)
     """
+    client_id = admission.client_id_for(request)
+    retry_after = deploy_buckets.try_acquire(client_id)
+    if retry_after:
+        raise admission.too_many_requests(
+            f"Deploy rate limit exceeded for client {client_id}",
+            retry_after,
+        )
+
     db = next(get_db())  # Get a new DB session
     try:
-        job = models.OTAJob(version=version, wave=wave, status="pending")
+        if pending_count(db, wave) >= admission.MAX_PENDING_PER_WAVE:
+            raise admission.too_many_requests(
+                f"Too many pending jobs for wave {wave}",
+                admission.QUEUE_FULL_RETRY_AFTER,
+            )
+        job = models.OTAJob(
+            version=version,
+            wave=wave,
+            mode=mode,
+            priority=priority,
+            clusters=normalize_clusters(clusters),
+            status="pending",
+        )
         db.add(job)
         db.commit()
         db.refresh(job)
@@ -52,16 +135,221 @@ def list_jobs():
     db = next(get_db())  # Get a new DB session
     try:
         jobs = db.query(models.OTAJob).order_by(models.OTAJob.created_at.desc()).all()
-        return [
-            {
-                "id": job.id,
-                "version": job.version,
-                "wave": job.wave,
-                "status": job.status,
-                "created_at": job.created_at.isoformat(),
-            }
-            for job in jobs
-        ]
+        return [job_to_dict(job) for job in jobs]
+    finally:
+        db.close()
+
+
+@app.get("/ota/jobs/changes")
+def list_job_changes(since: Optional[str] = None, limit: int = CHANGES_LIMIT):
+    """List jobs whose status changed since a cursor.
+
+    Lets pollers such as the dashboard fetch deltas instead of the full job
+    list on every refresh.
+
+    Args:
+        since: Cursor from the previous response; omit for every job
+        limit: Maximum number of jobs returned
+
+    Returns:
+        The changed jobs (oldest change first) and the cursor for next time
+    """
+    db = next(get_db())  # Get a new DB session
+    try:
+        try:
+            jobs, cursor = changed_jobs(db, since, limit)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=f"Invalid cursor: {e}")
+        return {"jobs": [job_to_dict(job) for job in jobs], "cursor": cursor}
+    finally:
+        db.close()
+
+
+@app.get("/ota/jobs/export")
+def export_jobs(fmt: str = Query("ndjson", alias="format"), include_pods: bool = False):
+    """Stream the full job history as NDJSON or CSV.
+
+    Rows are read through a server-side cursor in batches and encoded as they
+    arrive, so memory use does not grow with the size of the history.
+
+    Args:
+        fmt: Export format, "ndjson" or "csv" (query parameter "format")
+        include_pods: Add one row per rollout target with its outcome
+
+    Returns:
+        A streaming response with the encoded rows
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unknown export format {fmt}")
+
+    def chunks():
+        db = next(get_db())  # Held open until the stream is consumed
+        try:
+            yield from stream_export(db, fmt, include_pods)
+        finally:
+            db.close()
+
+    return StreamingResponse(
+        chunks(),
+        media_type=EXPORT_FORMATS[fmt],
+        headers={"Content-Disposition": f'attachment; filename="ota_jobs.{fmt}"'},
+    )
+
+
+@app.post("/ota/jobs/claim")
+def claim_job(runner_id: str = "default"):
+    """Claim the next job for the job runner.
+
+    Jobs the runner (or a runner whose lease expired) left in progress are
+    resumed first. Otherwise stale pending deploys are coalesced, pending
+    deploys queued before a rollback of their scope are retired, and the
+    highest-priority queued job is handed out. A rollback is held back
+    until deploys in progress in its clusters have yielded to it.
+
+    Args:
+        runner_id: Identity of the claiming runner
+
+    Returns:
+        The claimed job (moved to its in-progress status), or None if the
+        queue is empty, plus the number of jobs superseded by this claim
+    """
+    db = next(get_db())  # Get a new DB session
+    try:
+        superseded = supersede_stale_deploys(db)
+        superseded += supersede_rolled_back_deploys(db)
+        job = claim_next(db, runner_id)
+        return {
+            "job": job_to_dict(job) if job else None,
+            "superseded": superseded,
+        }
+    finally:
+        db.close()
+
+
+@app.get("/ota/jobs/next")
+def peek_next_job():
+    """Show the job that would be claimed next, without claiming it.
+
+    The runner polls this between rollout batches to decide whether an
+    in-flight deploy should yield to a queued rollback.
+
+    Returns:
+        The next queued job with its effective (aged) priority, or None
+    """
+    db = next(get_db())  # Get a new DB session
+    try:
+        job = next_queued_job(db)
+        if job is None:
+            return {"job": None}
+        return {
+            "job": {**job_to_dict(job), "effective_priority": effective_priority(job)},
+        }
+    finally:
+        db.close()
+
+
+@app.get("/ota/jobs/{job_id}/checkpoint")
+def get_checkpoint(job_id: int, cluster: str = ""):
+    """Rollout progress of a job, used by the runner to resume it.
+
+    Args:
+        job_id: The job being rolled out
+        cluster: Kubeconfig context of a multi-cluster job ("" = current)
+
+    Returns:
+        The checkpoint (step, total, completed and remaining pods), or None
+        if no target set has been recorded yet
+    """
+    db = next(get_db())  # Get a new DB session
+    try:
+        return {"checkpoint": load_checkpoint(db, job_id, cluster)}
+    finally:
+        db.close()
+
+
+@app.put("/ota/jobs/{job_id}/targets")
+def put_targets(job_id: int, pods: List[PodRef], cluster: str = ""):
+    """Record the pods a job will patch. Ignored if a target set exists.
+
+    Returns:
+        Number of targets stored for the job in that cluster
+    """
+    db = next(get_db())  # Get a new DB session
+    try:
+        return {"targets": record_targets(db, job_id, pods, cluster)}
+    finally:
+        db.close()
+
+
+@app.post("/ota/jobs/{job_id}/checkpoint")
+def post_checkpoint(job_id: int, pods: List[PodRef], step: int, cluster: str = ""):
+    """Mark a batch of target pods as patched and renew the runner's lease.
+
+    Args:
+        job_id: The job being rolled out
+        pods: Pods patched in this batch
+        step: Number of batches completed so far
+        cluster: Kubeconfig context of a multi-cluster job ("" = current)
+
+    Returns:
+        Number of targets newly marked done
+    """
+    db = next(get_db())  # Get a new DB session
+    try:
+        return {"done": mark_targets_done(db, job_id, pods, step, cluster)}
+    finally:
+        db.close()
+
+
+@app.post("/ota/jobs/{job_id}/heartbeat")
+def post_heartbeat(job_id: int, runner_id: str = "default"):
+    """Renew the runner's lease on an in-progress job.
+
+    The runner sends heartbeats while any job runs, so Deployment rollouts
+    and rollbacks, which do not checkpoint, are not taken for abandoned.
+
+    Args:
+        job_id: The job being worked on
+        runner_id: Identity of the runner holding the job
+
+    Returns:
+        Whether the lease was renewed (False if the runner lost the job)
+    """
+    db = next(get_db())  # Get a new DB session
+    try:
+        return {"renewed": renew_lease(db, job_id, runner_id)}
+    finally:
+        db.close()
+
+
+@app.get("/ota/jobs/{job_id}/clusters")
+def get_cluster_status(job_id: int):
+    """Per-cluster status of a multi-cluster job.
+
+    Returns:
+        Status, pod counts and checkpointed progress of each cluster
+    """
+    db = next(get_db())  # Get a new DB session
+    try:
+        return {"clusters": cluster_status(db, job_id)}
+    finally:
+        db.close()
+
+
+@app.post("/ota/jobs/{job_id}/clusters")
+def post_cluster_status(job_id: int, cluster: str, report: ClusterReport):
+    """Record the runner's outcome for one cluster of a job.
+
+    Args:
+        job_id: The job being rolled out
+        cluster: Kubeconfig context the report is for
+        report: Cluster status (in_progress, complete, failed, yielded) and
+            updated, skipped and failed pod counts
+    """
+    db = next(get_db())  # Get a new DB session
+    try:
+        report_cluster(db, job_id, cluster, report)
+        return {"status": "success", "job_id": job_id, "cluster": cluster}
     finally:
         db.close()
 
@@ -82,6 +370,7 @@ def update_status(job_id: int, status: str):
         job = db.query(models.OTAJob).filter(models.OTAJob.id == job_id).first()
         if job:
             job.status = status
+            job.updated_at = datetime.utcnow()
             db.commit()
             db.refresh(job)
             return {"status": "success", "job_id": job.id, "new_status": job.status}
@@ -91,16 +380,28 @@ def update_status(job_id: int, status: str):
 
 
 @app.post("/ota/rollback")
-def rollback_deployment(version: str, wave: str = "green"):
+def rollback_deployment(
+    version: str,
+    wave: str = "green",
+    clusters: Optional[str] = None,
+):
     """Rollback to a previous version.
 
     Args:
         version: The version to rollback to
         wave: The rollback scope (default: "green")
+        clusters: Comma-separated kubeconfig contexts rolled back in
+            parallel (default: the runner's current context)
     """
     db = next(get_db())  # Get a new DB session
     try:
-        job = models.OTAJob(version=version, wave=wave, status="rollback_pending")
+        job = models.OTAJob(
+            version=version,
+            wave=wave,
+            priority=ROLLBACK_PRIORITY,
+            clusters=normalize_clusters(clusters),
+            status="rollback_pending",
+        )
         db.add(job)
         db.commit()
         db.refresh(job)
@@ -114,6 +415,140 @@ def rollback_deployment(version: str, wave: str = "green"):
         db.close()
 
 
+@app.post("/ota/inventory/events")
+def ingest_pod_events(events: List[PodEvent], reset: bool = False):
+    """Apply a batch of pod watch events to the fleet inventory.
+
+    Args:
+        events: Compact pod events (type, namespace, name, sw_version, status)
+        reset: Replace the inventory instead of updating it (after a full LIST)
+
+    Returns:
+        Number of events applied
+    """
+    db = next(get_db())  # Get a new DB session
+    try:
+        return {"applied": apply_pod_events(db, events, reset=reset)}
+    finally:
+        db.close()
+
+
+@app.get("/ota/inventory")
+def get_inventory():
+    """Fleet version distribution.
+
+    Returns:
+        Total pod count plus pod counts per sw_version and per status label
+    """
+    db = next(get_db())  # Get a new DB session
+    try:
+        return inventory_summary(db)
+    finally:
+        db.close()
+
+
+@app.get("/ota/inventory/pods")
+def get_inventory_pods(
+    version: Optional[str] = None,
+    status: Optional[str] = None,
+    limit: int = Query(100, ge=1),
+    after: int = 0,
+):
+    """Page through inventoried pods.
+
+    Args:
+        version: Only pods labelled with this sw_version
+        status: Only pods with this status label
+        limit: Page size
+        after: Cursor returned as "next" by the previous page
+
+    Returns:
+        The page of pods and the cursor for the next page
+    """
+    db = next(get_db())  # Get a new DB session
+    try:
+        return list_inventory_pods(db, version, status, limit, after)
+    finally:
+        db.close()
+
+
+@app.get("/ota/inventory/targets")
+def get_inventory_targets(version: str):
+    """Pods a rollout of a version would start from, for the rollout planner.
+
+    Args:
+        version: The version to roll out
+
+    Returns:
+        Idle pods on another version (candidates) and pods already on it
+        (current), as last seen by the inventory watch
+    """
+    db = next(get_db())  # Get a new DB session
+    try:
+        return target_counts(db, version)
+    finally:
+        db.close()
+
+
+@app.get("/ota/stats/patches")
+def get_patch_stats():
+    """Per-pod patch latency and retry statistics of recent rollouts.
+
+    Returns:
+        Latency mean/p50/p90, mean attempts and failure rate, or None
+        before any patch was timed
+    """
+    db = next(get_db())  # Get a new DB session
+    try:
+        return {"stats": patch_stats(db)}
+    finally:
+        db.close()
+
+
+@app.post("/ota/metrics/snapshot")
+def post_metrics_snapshot(snapshot: MetricSnapshot):
+    """Record a periodic metrics snapshot from the job runner.
+
+    Args:
+        snapshot: Rollout rate, mean patch latency and failures since the
+            runner's previous snapshot; the queue depth is added here
+
+    Returns:
+        Number of metrics recorded
+    """
+    db = next(get_db())  # Get a new DB session
+    try:
+        return {"recorded": record_snapshot(db, snapshot)}
+    finally:
+        db.close()
+
+
+@app.get("/ota/metrics/series")
+def get_metrics_series(
+    names: Optional[List[str]] = Query(None, alias="name"),
+    window: int = 3600,
+    max_points: int = SERIES_MAX_POINTS,
+):
+    """Downsampled metric time series for the dashboard's trend charts.
+
+    Args:
+        names: Metrics to return, repeatable (default: all)
+        window: Seconds of history ending now
+        max_points: Upper bound on points per series
+
+    Returns:
+        The resolution read, the step between points and the series
+    """
+    db = next(get_db())  # Get a new DB session
+    try:
+        try:
+            return metric_series(db, names, window, max_points)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=f"Invalid query: {e}")
+    finally:
+        db.close()
+
+
 @app.get("/metrics")
 def metrics():
     metrics_path = Path(__file__).parent.parent / "metrics.txt"
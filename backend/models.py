@@ -1,16 +1,112 @@
 # backend/models.py
 from datetime import datetime
 
-from sqlalchemy import Column, DateTime, Integer, String
+from sqlalchemy import (
+    Boolean,
+    Column,
+    DateTime,
+    Float,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+    UniqueConstraint,
+)
 
 from .database import Base
 
 
 class OTAJob(Base):
     __tablename__ = "ota_jobs"
+    # Serves both the claim queue scan and the per-wave queue depth count
+    __table_args__ = (Index("ix_ota_jobs_status_wave", "status", "wave"),)
 
     id = Column(Integer, primary_key=True, index=True)
     version = Column(String, index=True)
     wave = Column(String, default="canary")
-    status = Column(String, default="pending")  # pending, in_progress, complete, failed
+    mode = Column(String, default="pods")  # pods, deployment
+    # pending, in_progress, complete, failed, superseded
+    status = Column(String, default="pending")
+    priority = Column(Integer, default=0)  # higher runs first, rollbacks highest
     created_at = Column(DateTime, default=datetime.utcnow)
+    # Bumped on every status change (explicitly, bulk updates included) so
+    # clients can fetch only the jobs that changed since their last poll
+    updated_at = Column(DateTime, default=datetime.utcnow, index=True)
+    # Lease held by the runner working on the job, renewed by its heartbeats
+    claimed_by = Column(String, nullable=True)
+    heartbeat_at = Column(DateTime, nullable=True)
+    # Comma-separated kubeconfig contexts; empty means the current context
+    clusters = Column(String, nullable=True)
+
+
+class PodInventory(Base):
+    """Last observed labels of one pod, kept current from pod watch events."""
+
+    __tablename__ = "pod_inventory"
+    __table_args__ = (UniqueConstraint("namespace", "name"),)
+
+    id = Column(Integer, primary_key=True)
+    namespace = Column(String, nullable=False)
+    name = Column(String, nullable=False)
+    sw_version = Column(String, index=True)
+    status = Column(String, index=True)
+
+
+class InventoryCount(Base):
+    """Running pod count per sw_version / status label value."""
+
+    __tablename__ = "inventory_counts"
+
+    kind = Column(String, primary_key=True)  # version, status
+    value = Column(String, primary_key=True)
+    count = Column(Integer, default=0)
+
+
+class RolloutTarget(Base):
+    """One pod in a job's rollout target set, checkpointed once patched."""
+
+    __tablename__ = "rollout_targets"
+    __table_args__ = (UniqueConstraint("job_id", "cluster", "namespace", "name"),)
+
+    id = Column(Integer, primary_key=True)
+    job_id = Column(Integer, ForeignKey("ota_jobs.id"), index=True, nullable=False)
+    cluster = Column(String, nullable=False, default="")  # "" = current context
+    namespace = Column(String, nullable=False)
+    name = Column(String, nullable=False)
+    done = Column(Boolean, default=False)
+    step = Column(Integer, nullable=True)  # checkpointed batch that patched it
+    latency = Column(Float, nullable=True)  # seconds spent patching, retries included
+    attempts = Column(Integer, nullable=True)  # PATCH requests sent for the pod
+
+
+class ClusterRollout(Base):
+    """Per-cluster outcome of a multi-cluster job, reported by the runner."""
+
+    __tablename__ = "cluster_rollouts"
+    __table_args__ = (UniqueConstraint("job_id", "cluster"),)
+
+    id = Column(Integer, primary_key=True)
+    job_id = Column(Integer, ForeignKey("ota_jobs.id"), index=True, nullable=False)
+    cluster = Column(String, nullable=False)
+    status = Column(String, default="in_progress")  # complete, failed, yielded
+    updated = Column(Integer, default=0)
+    skipped = Column(Integer, default=0)
+    failed = Column(Integer, default=0)
+    reported_at = Column(DateTime, default=datetime.utcnow)
+
+
+class MetricPoint(Base):
+    """One bucket of a metric time series at one resolution.
+
+    Keyed by (name, resolution, bucket) so a series read is a single index
+    range scan; raw snapshots and their 1m/1h rollups share the table.
+    """
+
+    __tablename__ = "metric_points"
+
+    name = Column(String, primary_key=True)
+    resolution = Column(Integer, primary_key=True)  # seconds, 0 = raw snapshot
+    bucket = Column(DateTime, primary_key=True)  # start of the bucket
+    value = Column(Float, nullable=False)  # mean of the samples in the bucket
+    peak = Column(Float, nullable=False)  # largest sample in the bucket
+    samples = Column(Integer, nullable=False, default=1)
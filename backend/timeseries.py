@@ -0,0 +1,183 @@
+# backend/timeseries.py
+import math
+from datetime import datetime, timedelta
+from typing import Optional
+
+from pydantic import BaseModel
+
+from . import models
+from .jobs import queue_depth
+
+# Metrics kept as time series
+METRICS = ("queue_depth", "rollout_rate", "patch_latency", "patch_failures")
+
+# Bucket widths in seconds; 0 keeps every snapshot as it was recorded
+RESOLUTIONS = (0, 60, 3600)
+# How long each resolution is kept before it is pruned
+RETENTION = {
+    0: timedelta(days=1),
+    60: timedelta(days=7),
+    3600: timedelta(days=365),
+}
+# Expected spacing of raw snapshots (the runner's METRICS_SNAPSHOT_SECONDS)
+RAW_STEP_SECONDS = 15
+# Points per series a range query returns by default
+SERIES_MAX_POINTS = 300
+
+EPOCH = datetime(1970, 1, 1)
+
+
+class MetricSnapshot(BaseModel):
+    """Rollout activity since the runner's previous snapshot."""
+
+    rollout_rate: Optional[float] = None  # pods patched per second
+    patch_latency: Optional[float] = None  # mean seconds per pod, retries included
+    patch_failures: Optional[float] = None  # pods whose patch failed
+
+
+def _floor(ts: datetime, seconds: int) -> datetime:
+    if not seconds:
+        return ts
+    elapsed = (ts - EPOCH).total_seconds()
+    return EPOCH + timedelta(seconds=elapsed - elapsed % seconds)
+
+
+def _fold(db, name, resolution, bucket, value):
+    point = db.get(models.MetricPoint, (name, resolution, bucket))
+    if point is None:
+        db.add(
+            models.MetricPoint(
+                name=name,
+                resolution=resolution,
+                bucket=bucket,
+                value=value,
+                peak=value,
+                samples=1,
+            )
+        )
+        return
+    point.samples += 1
+    point.value += (value - point.value) / point.samples
+    point.peak = max(point.peak, value)
+
+
+def prune_metrics(db, now: datetime):
+    """Delete points older than their resolution's retention.
+
+    Returns:
+        Number of points deleted
+    """
+    deleted = 0
+    for resolution, keep in RETENTION.items():
+        deleted += (
+            db.query(models.MetricPoint)
+            .filter(
+                models.MetricPoint.resolution == resolution,
+                models.MetricPoint.bucket < now - keep,
+            )
+            .delete(synchronize_session=False)
+        )
+    return deleted
+
+
+def record_snapshot(db, snapshot: MetricSnapshot, now: Optional[datetime] = None):
+    """Store a metrics snapshot and fold it into the 1m and 1h rollups.
+
+    Rollups are updated as each snapshot arrives (a running mean and peak per
+    bucket), so no separate compaction pass is needed and coarse buckets are
+    always current. The queue depth is read from the job table.
+
+    Returns:
+        Number of metrics recorded
+    """
+    now = now or datetime.utcnow()
+    values = snapshot.model_dump(exclude_none=True)
+    values["queue_depth"] = queue_depth(db)
+    for name, value in values.items():
+        for resolution in RESOLUTIONS:
+            _fold(db, name, resolution, _floor(now, resolution), float(value))
+    prune_metrics(db, now)
+    db.commit()
+    return len(values)
+
+
+def series_resolution(window: timedelta, max_points: int) -> int:
+    """Coarsest resolution still fine enough for max_points over the window.
+
+    Only resolutions retained for the whole window are considered; when
+    even the finest of those is coarser than needed, it is used as is.
+    """
+    retained = [r for r in RESOLUTIONS if RETENTION[r] >= window]
+    if not retained:
+        return RESOLUTIONS[-1]
+    wanted = window.total_seconds() / max_points
+    fine_enough = [r for r in retained if (r or RAW_STEP_SECONDS) <= wanted]
+    return fine_enough[-1] if fine_enough else retained[0]
+
+
+def metric_series(
+    db,
+    names=None,
+    window_seconds: int = 3600,
+    max_points: int = SERIES_MAX_POINTS,
+    now: Optional[datetime] = None,
+):
+    """Downsampled time series for the last ``window_seconds``.
+
+    Reads the coarsest rollup that still has ``max_points`` points over the
+    window, then merges buckets (sample-weighted mean, max of peaks) so no
+    series has more than about ``max_points`` points, however long the window.
+
+    Args:
+        db: Database session
+        names: Metrics to return (default: all of METRICS)
+        window_seconds: Length of the window ending now
+        max_points: Upper bound on points per series
+        now: End of the window (default: current time)
+
+    Returns:
+        The resolution read, the step between points in seconds and, per
+        metric, a list of {"t", "value", "peak"} points in time order
+
+    Raises:
+        ValueError: On an unknown metric name or a non-positive window
+    """
+    names = list(names or METRICS)
+    unknown = sorted(set(names) - set(METRICS))
+    if unknown:
+        raise ValueError(f"unknown metrics {', '.join(unknown)}")
+    if window_seconds <= 0 or max_points <= 0:
+        raise ValueError("window and max_points must be positive")
+
+    now = now or datetime.utcnow()
+    window = timedelta(seconds=window_seconds)
+    resolution = series_resolution(window, max_points)
+    step = max(resolution, math.ceil(window_seconds / max_points))
+    rows = (
+        db.query(models.MetricPoint)
+        .filter(
+            models.MetricPoint.name.in_(names),
+            models.MetricPoint.resolution == resolution,
+            models.MetricPoint.bucket >= now - window,
+            models.MetricPoint.bucket <= now,
+        )
+        .order_by(models.MetricPoint.name, models.MetricPoint.bucket)
+    )
+
+    merged = {name: {} for name in names}
+    for row in rows:
+        bucket = merged[row.name].setdefault(_floor(row.bucket, step), [0.0, 0, None])
+        bucket[0] += row.value * row.samples
+        bucket[1] += row.samples
+        bucket[2] = row.peak if bucket[2] is None else max(bucket[2], row.peak)
+    return {
+        "resolution": resolution,
+        "step": step,
+        "series": {
+            name: [
+                {"t": t.isoformat(), "value": total / samples, "peak": peak}
+                for t, (total, samples, peak) in buckets.items()
+            ]
+            for name, buckets in merged.items()
+        },
+    }
@@ -0,0 +1,111 @@
+"""Compare request throughput of the sync and async backend apps.
+
+Both apps are served in-process through httpx's ASGI transport against
+separate copies of the same seeded SQLite database, and hit with the same
+mix of GET /ota/jobs and POST /ota/update_status at a fixed concurrency.
+
+Usage:
+    python -m benchmarks.bench_async_api --requests 2000 --concurrency 200
+"""
+import argparse
+import asyncio
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+import httpx
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from backend import async_database, async_main, database, main, models
+
+SEED_JOBS = 200
+
+
+def seed_database(path: Path):
+    engine = create_engine(f"sqlite:///{path}")
+    models.Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine)()
+    session.add_all(
+        models.OTAJob(version=f"2.0.{i}", wave="green", status="complete")
+        for i in range(SEED_JOBS)
+    )
+    session.commit()
+    session.close()
+    engine.dispose()
+
+
+async def run_load(app, total: int, concurrency: int) -> float:
+    transport = httpx.ASGITransport(app=app)
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as http:
+
+        async def one_request(i: int):
+            async with semaphore:
+                if i % 4:
+                    response = await http.get("/ota/jobs")
+                else:
+                    response = await http.post(
+                        "/ota/update_status",
+                        params={"job_id": i % SEED_JOBS + 1, "status": "complete"},
+                    )
+                response.raise_for_status()
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one_request(i) for i in range(total)))
+        return time.perf_counter() - start
+
+
+def bench_sync(path: Path, total: int, concurrency: int) -> float:
+    engine = create_engine(
+        f"sqlite:///{path}",
+        connect_args={"check_same_thread": False},
+    )
+    database.SessionLocal.configure(bind=engine)
+    try:
+        return asyncio.run(run_load(main.app, total, concurrency))
+    finally:
+        database.SessionLocal.configure(bind=database.engine)
+        engine.dispose()
+
+
+def bench_async(path: Path, total: int, concurrency: int) -> float:
+    async def run():
+        engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+        async_database.AsyncSessionLocal.configure(bind=engine)
+        try:
+            return await run_load(async_main.app, total, concurrency)
+        finally:
+            async_database.AsyncSessionLocal.configure(bind=async_database.engine)
+            await engine.dispose()
+
+    return asyncio.run(run())
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=200)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        seed = Path(tmp) / "seed.db"
+        seed_database(seed)
+        results = {}
+        for name, bench in (("sync", bench_sync), ("async", bench_async)):
+            path = Path(tmp) / f"{name}.db"
+            shutil.copy(seed, path)
+            elapsed = bench(path, args.requests, args.concurrency)
+            results[name] = args.requests / elapsed
+            print(
+                f"{name:>5}: {args.requests} requests in {elapsed:.2f}s "
+                f"({results[name]:.0f} req/s) at concurrency {args.concurrency}"
+            )
+        print(f"async/sync throughput ratio: {results['async'] / results['sync']:.2f}x")
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,92 @@
+"""Compare peak memory of streaming export against loading the job list.
+
+Seeds a temporary SQLite database with N jobs, then measures with tracemalloc
+the peak Python allocation of (a) building the full /ota/jobs response list
+and (b) draining stream_export chunk by chunk, as the export endpoint does.
+
+Usage:
+    python -m benchmarks.bench_export --jobs 200000
+"""
+
+import argparse
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+from backend import models
+from backend.export import stream_export
+from backend.jobs import job_to_dict
+
+INSERT_BATCH_SIZE = 10000
+
+
+def seed_database(engine, total: int):
+    models.Base.metadata.create_all(bind=engine)
+    now = datetime.utcnow()
+    with engine.begin() as conn:
+        for start in range(0, total, INSERT_BATCH_SIZE):
+            conn.execute(
+                insert(models.OTAJob),
+                [
+                    {
+                        "version": f"2.0.{i}",
+                        "wave": "green",
+                        "mode": "pods",
+                        "status": "complete",
+                        "priority": 0,
+                        "created_at": now,
+                    }
+                    for i in range(start, min(start + INSERT_BATCH_SIZE, total))
+                ],
+            )
+
+
+def measure(label: str, fn):
+    tracemalloc.start()
+    start = time.perf_counter()
+    size = fn()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(
+        f"{label:>14}: peak {peak / 2**20:7.1f} MiB, {elapsed:.2f}s, "
+        f"{size / 2**20:.1f} MiB produced"
+    )
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--jobs", type=int, default=200000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{Path(tmp) / 'export.db'}")
+        seed_database(engine, args.jobs)
+        session_local = sessionmaker(bind=engine)
+        print(f"Seeded {args.jobs} jobs")
+
+        def full_list():
+            with session_local() as db:
+                jobs = [job_to_dict(job) for job in db.query(models.OTAJob).all()]
+                return sum(len(str(job)) for job in jobs)
+
+        def streamed(fmt):
+            def drain():
+                with session_local() as db:
+                    return sum(len(chunk) for chunk in stream_export(db, fmt))
+
+            return drain
+
+        measure("list /ota/jobs", full_list)
+        measure("export ndjson", streamed("ndjson"))
+        measure("export csv", streamed("csv"))
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,136 @@
+"""Compare memory held for a pod LIST as V1Pod models vs compact records.
+
+Builds a realistic pod LIST (containers, status, owner references) for N
+pods and measures, with tracemalloc, the memory still held once the list is
+loaded: (a) V1PodList.items as deserialized by the kubernetes client and
+(b) the PodRecord list produced by list_pod_records from raw pages.
+
+Usage:
+    python -m benchmarks.bench_pod_records --pods 50000
+"""
+
+import argparse
+import gc
+import json
+import time
+import tracemalloc
+
+from kubernetes.client import ApiClient
+
+from cli.pod_records import POD_LIST_PAGE_SIZE, list_pod_records
+
+
+def pod_json(i: int) -> dict:
+    name = f"application-7d9f8c6b5-{i:06d}"
+    return {
+        "metadata": {
+            "name": name,
+            "namespace": f"team-{i % 20}",
+            "uid": f"5f0c2b3e-{i:08d}-4c1a-9d7e-2a6f3b8c1d4e",
+            "resourceVersion": str(100000 + i),
+            "creationTimestamp": "2026-10-01T12:00:00Z",
+            "labels": {
+                "app": "application",
+                "pod-template-hash": "7d9f8c6b5",
+                "sw_version": "1.0.0",
+                "status": "idle",
+            },
+            "ownerReferences": [
+                {
+                    "apiVersion": "apps/v1",
+                    "kind": "ReplicaSet",
+                    "name": "application-7d9f8c6b5",
+                    "uid": "0b7d6a1c-2e3f-4a5b-8c9d-0e1f2a3b4c5d",
+                    "controller": True,
+                }
+            ],
+        },
+        "spec": {
+            "containers": [
+                {
+                    "name": "application",
+                    "image": "busybox:1.36",
+                    "command": ["sh", "-c", "sleep 3600"],
+                    "resources": {"requests": {"cpu": "10m", "memory": "16Mi"}},
+                }
+            ],
+            "nodeName": f"node-{i % 50}",
+            "restartPolicy": "Always",
+        },
+        "status": {
+            "phase": "Running",
+            "podIP": f"10.{i // 65536 % 256}.{i // 256 % 256}.{i % 256}",
+            "conditions": [
+                {"type": "Ready", "status": "True"},
+                {"type": "ContainersReady", "status": "True"},
+            ],
+        },
+    }
+
+
+class RawResponse:
+    def __init__(self, data: bytes):
+        self.data = data
+
+
+class FakeCoreV1Api:
+    """Serves the LIST in raw pages, like list_pod_for_all_namespaces."""
+
+    def __init__(self, total: int):
+        self.total = total
+
+    def list_pod_for_all_namespaces(self, limit, _continue=None, **kwargs):
+        start = int(_continue or 0)
+        end = min(start + limit, self.total)
+        metadata = {"resourceVersion": "1"}
+        if end < self.total:
+            metadata["continue"] = str(end)
+        page = {"metadata": metadata, "items": [pod_json(i) for i in range(start, end)]}
+        return RawResponse(json.dumps(page).encode())
+
+
+def measure(label: str, total: int, load):
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    pods = load()
+    elapsed = time.perf_counter() - start
+    gc.collect()
+    held, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(
+        f"{label:>10}: {held / 2**20:8.1f} MiB held ({held / total:6.0f} B/pod), "
+        f"peak {peak / 2**20:8.1f} MiB, {elapsed:.1f}s"
+    )
+    return pods
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pods", type=int, default=50000)
+    args = parser.parse_args()
+
+    def v1_pods():
+        # What list_pod_for_all_namespaces(...).items used to hand back
+        body = {"metadata": {"resourceVersion": "1"}}
+        body["items"] = [pod_json(i) for i in range(args.pods)]
+        response = RawResponse(json.dumps(body).encode())
+        del body
+        return ApiClient().deserialize(response, "V1PodList").items
+
+    def records():
+        pods, _ = list_pod_records(
+            FakeCoreV1Api(args.pods),
+            label_selector="sw_version",
+            page_size=POD_LIST_PAGE_SIZE,
+        )
+        return pods
+
+    print(f"{args.pods} pods")
+    models = measure("V1Pod", args.pods, v1_pods)
+    del models
+    measure("PodRecord", args.pods, records)
+
+
+if __name__ == "__main__":
+    main_cli()
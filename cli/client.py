@@ -1,10 +1,28 @@
 import os
+from enum import Enum
+from pathlib import Path
 
 import requests
 import typer
 from dotenv import load_dotenv
 
-from .job_runner import rollback_application_pods, update_application_pods
+from .job_runner import (
+    KUBE_API_QPS,
+    PATCH_CONCURRENCY,
+    rollback_application,
+    sync_pod_inventory,
+    update_application_deployments,
+    update_application_pods,
+    update_clusters,
+)
+from .planner import (
+    estimate_rollout,
+    fetch_patch_stats,
+    inventory_targets,
+    list_pages,
+    list_targets,
+    wave_targets,
+)
 
 # Load environment variables from .env file if it exists
 load_dotenv()
@@ -12,23 +30,45 @@ load_dotenv()
 app = typer.Typer()
 API_URL = os.environ.get("API_URL", "http://127.0.0.1:8000")
 
+# Bytes read from the export stream per file write
+EXPORT_CHUNK_SIZE = 64 * 1024
+
+
+class RolloutMode(str, Enum):
+    """How a rollout patches the fleet: pod labels or Deployment templates."""
+
+    pods = "pods"
+    deployment = "deployment"
+
 
 @app.command()
-def deploy(version: str, wave: str = "canary"):
+def deploy(
+    version: str,
+    wave: str = "canary",
+    mode: RolloutMode = RolloutMode.pods,
+    clusters: str = "",
+):
     """
     Trigger a new deployment job.
+
+    Pass --clusters as comma-separated kubeconfig contexts to roll out to
+    several clusters in parallel.
     """
-    response = requests.post(
-        f"{API_URL}/ota/deploy",
-        params={"version": version, "wave": wave},
-        timeout=30,
-    )
+    params = {"version": version, "wave": wave, "mode": RolloutMode(mode).value}
+    if clusters:
+        params["clusters"] = clusters
+    response = requests.post(f"{API_URL}/ota/deploy", params=params, timeout=30)
     if response.status_code == requests.codes.ok:
         data = response.json()
         typer.echo(
             f"✅ Deployment Job Created: ID {data['job_id']} | "
             f"Status: {data['status']}",
         )
+    elif response.status_code == requests.codes.too_many_requests:
+        typer.echo(
+            f"⏳ Deployment queue is busy: {response.json().get('detail')}. "
+            f"Retry in {response.headers.get('Retry-After', '?')}s.",
+        )
     else:
         typer.echo("❌ Failed to trigger deployment job.")
 
@@ -51,23 +91,164 @@ def list_jobs():
 
 
 @app.command()
-def update(version: str, wave: str = "canary"):
+def export(
+    output: Path,
+    fmt: str = typer.Option("ndjson", "--format", help="ndjson or csv"),
+    include_pods: bool = False,
+):
     """
-    Run deployment update rollout locally (patch Kubernetes pods).
+    Stream the job history to a file without loading it into memory.
+    """
+    with requests.get(
+        f"{API_URL}/ota/jobs/export",
+        params={"format": fmt, "include_pods": include_pods},
+        stream=True,
+        timeout=30,
+    ) as response:
+        if response.status_code != requests.codes.ok:
+            typer.echo("❌ Failed to export jobs.")
+            return
+        written = 0
+        with output.open("wb") as f:
+            for chunk in response.iter_content(chunk_size=EXPORT_CHUNK_SIZE):
+                f.write(chunk)
+                written += len(chunk)
+    typer.echo(f"💾 Exported {written} bytes of job history to {output}")
+
+
+@app.command()
+def update(
+    version: str,
+    wave: str = "canary",
+    mode: RolloutMode = RolloutMode.pods,
+    clusters: str = "",
+):
+    """
+    Run deployment update rollout locally (patch Kubernetes pods or Deployments).
     """
     typer.echo(
         f"🚀 Running local deployment update for version {version}, wave {wave}",
     )
-    update_application_pods(version=version, wave=wave)
+    mode = RolloutMode(mode)
+    contexts = [name.strip() for name in clusters.split(",") if name.strip()]
+    if contexts:
+        update_clusters(version, wave, contexts, mode=mode.value)
+    elif mode is RolloutMode.deployment:
+        update_application_deployments(version=version, wave=wave)
+    else:
+        update_application_pods(version=version, wave=wave)
+
+
+@app.command()
+def plan(
+    version: str,
+    wave: str = "canary",
+    concurrency: int = PATCH_CONCURRENCY,
+    qps: float = KUBE_API_QPS,
+    source: str = typer.Option("inventory", help="inventory or cluster (live LIST)"),
+):
+    """
+    Estimate how long a pod rollout would take and how many API calls it makes.
+
+    Targets come from the backend inventory (or a live LIST with --source
+    cluster); timings come from patch latencies recorded by past rollouts.
+    """
+    counts = (
+        list_targets(version) if source == "cluster" else inventory_targets(version)
+    )
+    if counts is None:
+        typer.echo("❌ Failed to resolve rollout targets.")
+        return
+    targets = wave_targets(wave, counts["candidates"], counts["current"])
+    stats = fetch_patch_stats()
+    estimate = estimate_rollout(
+        targets,
+        stats,
+        concurrency=concurrency,
+        qps=qps,
+        list_calls=list_pages(counts["candidates"]) + list_pages(counts["current"]),
+    )
+    typer.echo(
+        f"🧮 {version} ({wave}): {targets} pods to patch, "
+        f"{counts['current']} already at version, {estimate['batches']} batches",
+    )
+    typer.echo(
+        f"⏱️ Estimated {estimate['seconds']:.1f}s (p90 {estimate['seconds_p90']:.1f}s)"
+        + (f", limited by {qps:g} QPS" if estimate["rate_limited"] else ""),
+    )
+    typer.echo(
+        f"📡 {estimate['api_calls']} API calls: {estimate['patch_calls']} PATCH, "
+        f"{estimate['list_calls']} LIST | "
+        f"Expected failures: {estimate['expected_failures']:.1f}",
+    )
+    typer.echo(
+        f"📊 Based on {stats['samples']} timed patches: "
+        f"mean {stats['latency_mean']:.3f}s, "
+        f"{stats['attempts_mean']:.2f} attempts/pod",
+    )
+
+
+@app.command()
+def cluster_status(job_id: int):
+    """
+    Show the per-cluster status of a multi-cluster deployment job.
+    """
+    response = requests.get(f"{API_URL}/ota/jobs/{job_id}/clusters", timeout=30)
+    if response.status_code != requests.codes.ok:
+        typer.echo("❌ Failed to fetch cluster status.")
+        return
+    clusters = response.json()["clusters"]
+    if not clusters:
+        typer.echo(f"⚠️ No cluster status reported for job {job_id}.")
+    for cluster in clusters:
+        typer.echo(
+            f"🌐 {cluster['cluster']}: {cluster['status']} | "
+            f"Updated: {cluster['updated']} | Skipped: {cluster['skipped']} | "
+            f"Failed: {cluster['failed']} | "
+            f"Checkpointed: {cluster['completed']}/{cluster['total']}",
+        )
 
 
 @app.command()
-def rollback(version: str, wave: str = "green"):
+def rollback(version: str, wave: str = "green", clusters: str = ""):
     """
-    Rollback application pods to a previous version.
+    Rollback application pods and managed Deployments to a previous version.
+
+    Pass --clusters as comma-separated kubeconfig contexts to roll back
+    several clusters in parallel.
     """
     typer.echo(f"🔄 Rolling back to version {version}, wave {wave}")
-    rollback_application_pods(previous_version=version, wave=wave)
+    contexts = [name.strip() for name in clusters.split(",") if name.strip()]
+    if contexts:
+        update_clusters(version, wave, contexts, rollback=True)
+    else:
+        rollback_application(previous_version=version, wave=wave)
+
+
+@app.command()
+def inventory():
+    """
+    Show how many pods run each version and status.
+    """
+    response = requests.get(f"{API_URL}/ota/inventory", timeout=30)
+    if response.status_code == requests.codes.ok:
+        data = response.json()
+        typer.echo(f"📦 {data['total']} pods")
+        for version, count in sorted(data["versions"].items()):
+            typer.echo(f"  Version {version}: {count}")
+        for status, count in sorted(data["statuses"].items()):
+            typer.echo(f"  Status {status}: {count}")
+    else:
+        typer.echo("❌ Failed to fetch inventory.")
+
+
+@app.command()
+def sync_inventory():
+    """
+    Keep the backend fleet inventory current from Kubernetes pod watch events.
+    """
+    typer.echo("📦 Syncing pod inventory (Ctrl+C to stop)")
+    sync_pod_inventory()
 
 
 if __name__ == "__main__":
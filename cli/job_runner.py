@@ -1,12 +1,21 @@
 import contextlib
+import os
+import socket
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
 from pathlib import Path
 
 import requests
 from dotenv import load_dotenv
-from kubernetes import client, config
+from kubernetes import client, config, watch
 from kubernetes.client.exceptions import ApiException
+from kubernetes.config import ConfigException
+from urllib3.exceptions import HTTPError
+
+from .pod_records import PodRecord, list_pod_records
+from .rate_limiter import RateLimitedApi, TokenBucket
 
 # Load environment variables from .env file if it exists
 load_dotenv()
@@ -18,12 +27,91 @@ API_URL = "http://127.0.0.1:8000"
 MAX_RETRIES = 3
 SLEEP_INTERVAL = 10
 HTTP_TIMEOUT = 30
+ROLLOUT_TIMEOUT = 300
+# Pods patched between checks for a queued rollback that should preempt us
+ROLLOUT_BATCH_SIZE = 10
+
+# Deployments opted in to deployment-mode rollouts carry this label
+DEPLOYMENT_SELECTOR = "ota_rollout=enabled"
+
+# Pods tracked by the fleet inventory, and how watch events are batched
+INVENTORY_SELECTOR = "sw_version"
+INVENTORY_BATCH_SIZE = 500
+# Each watch is ended after this long so a quiet stream still flushes its batch
+INVENTORY_FLUSH_SECONDS = 5
+HTTP_GONE = 410
+
+# Identifies this runner to the backend so it resumes its own jobs on restart
+RUNNER_ID = os.environ.get("RUNNER_ID", socket.gethostname())
+
+# Client-side rate limit shared by every Kubernetes API call the runner makes
+KUBE_API_QPS = float(os.environ.get("KUBE_API_QPS", "20"))
+KUBE_API_BURST = int(os.environ.get("KUBE_API_BURST", "40"))
+API_LIMITER = TokenBucket(qps=KUBE_API_QPS, burst=KUBE_API_BURST)
+
+# Clusters of a multi-cluster job rolled out at once, and pods patched at
+# once within each cluster; every cluster also gets its own API rate limit
+MAX_PARALLEL_CLUSTERS = int(os.environ.get("MAX_PARALLEL_CLUSTERS", "4"))
+PATCH_CONCURRENCY = int(os.environ.get("PATCH_CONCURRENCY", "4"))
+# Seconds between lease renewals while a job runs; well inside the backend's
+# CLAIM_LEASE_SECONDS so no other runner takes the job over
+HEARTBEAT_SECONDS = int(os.environ.get("HEARTBEAT_SECONDS", "60"))
+# Seconds between the metrics snapshots posted for the dashboard's trends
+METRICS_SNAPSHOT_SECONDS = int(os.environ.get("METRICS_SNAPSHOT_SECONDS", "15"))
+
+_cluster_limiters = {}
+_cluster_limiters_lock = threading.Lock()
+# metrics.txt is rewritten read-modify-write; keep writers from interleaving
+_metrics_lock = threading.Lock()
+# Patch outcomes since the last metrics snapshot, across every rollout thread
+_patch_totals = {"patched": 0, "failed": 0, "latency": 0.0}
+_patch_totals_lock = threading.Lock()
+
+
+def cluster_limiter(context=None):
+    """Rate limiter for one cluster's API server (None = current context)."""
+    if not context:
+        return API_LIMITER
+    with _cluster_limiters_lock:
+        if context not in _cluster_limiters:
+            _cluster_limiters[context] = TokenBucket(
+                qps=KUBE_API_QPS,
+                burst=KUBE_API_BURST,
+            )
+        return _cluster_limiters[context]
+
+
+def kube_api(api_cls, context=None):
+    """
+    Build a rate-limited Kubernetes API client.
+
+    Args:
+        api_cls: API class to instantiate, e.g. client.CoreV1Api
+        context: Kubeconfig context to connect to (None = current context)
+    """
+    if context:
+        api = api_cls(config.new_client_from_config(context=context))
+    else:
+        config.load_kube_config()
+        api = api_cls()
+    return RateLimitedApi(api, cluster_limiter(context))
 
 
-def retry_patch(v1, name, namespace, body, retries=MAX_RETRIES):
+def retry_patch(
+    v1,
+    name,
+    namespace,
+    body,
+    retries=MAX_RETRIES,
+    patch_fn=None,
+    stats=None,
+):
+    patch_fn = patch_fn or v1.patch_namespaced_pod
     for i in range(retries):
+        if stats is not None:
+            stats["attempts"] = i + 1
         try:
-            v1.patch_namespaced_pod(name=name, namespace=namespace, body=body)
+            patch_fn(name=name, namespace=namespace, body=body)
         except ApiException as e:
             print(f"⚠️ Retry {i + 1}/{retries} failed for {name}: {e}")
             time.sleep(2**i)
@@ -63,124 +151,649 @@ def write_metrics(updated_count: int, total_jobs: int):
     metrics_path.write_text(metrics_content, encoding="utf-8")
 
 
-def update_application_pods(version: str, wave: str = "canary"):
-    config.load_kube_config()
-    v1 = client.CoreV1Api()
-    print(
-        f"🛠️ update_application_pods called with version={version}, wave={wave}",
-    )
-
-    try:
-        pods = v1.list_pod_for_all_namespaces(label_selector="status=idle").items
-    except ApiException as e:
-        print(f"❌ Failed to fetch pods: {e}")
-        return
-
-    if not pods:
-        print("⚠️ No idle pods found to update.")
-        # Still write metrics even when no pods are found
-        updated_count = 0
-        total_jobs = 1
-        # Create pod metrics
-        pod_metrics = f"""
+def write_rollout_metrics(updated_count: int, skipped_count: int = 0):
+    # For direct update calls, we'll consider this as 1 job with the given updated_count
+    total_jobs = 1
+    # Create pod metrics
+    pod_metrics = f"""
 # HELP ota_updated_pods_total Total pods updated
 # TYPE ota_updated_pods_total counter
  ota_updated_pods_total {updated_count}
+# HELP ota_skipped_pods_total Pods skipped because they already ran the target version
+# TYPE ota_skipped_pods_total counter
+ ota_skipped_pods_total {skipped_count}
 # HELP ota_last_run_timestamp_seconds Last deployment timestamp
 # TYPE ota_last_run_timestamp_seconds gauge
  ota_last_run_timestamp_seconds {int(datetime.now(timezone.utc).timestamp())}
 """.strip()
+    # Absolute path to root-level metrics.txt
+    root_dir = Path(__file__).parent.parent
+    metrics_path = root_dir / "metrics.txt"
 
-        # Absolute path to root-level metrics.txt
-        root_dir = Path(__file__).parent.parent
-        metrics_path = root_dir / "metrics.txt"
+    with _metrics_lock:
         # Write pod metrics first
         metrics_path.write_text(pod_metrics + "\n", encoding="utf-8")
         # Then append job metrics
         write_metrics(updated_count, total_jobs)
-        print(f"📊 Metrics written to {metrics_path}")
-        return
+    print(f"📊 Metrics written to {metrics_path}")
+
+
+def count_patch_outcome(outcome):
+    with _patch_totals_lock:
+        _patch_totals["patched" if outcome["patched"] else "failed"] += 1
+        _patch_totals["latency"] += outcome["latency"]
+
+
+def metrics_snapshot(elapsed: float) -> dict:
+    """Rollout rate, mean patch latency and failures over the last ``elapsed`` s.
+
+    Resets the patch totals, so each snapshot only covers its own interval.
+    """
+    with _patch_totals_lock:
+        totals = dict(_patch_totals)
+        _patch_totals.update(patched=0, failed=0, latency=0.0)
+    attempted = totals["patched"] + totals["failed"]
+    return {
+        "rollout_rate": totals["patched"] / elapsed,
+        # No latency to report when nothing was patched
+        "patch_latency": totals["latency"] / attempted if attempted else None,
+        "patch_failures": totals["failed"],
+    }
+
 
+def post_metrics_snapshot(elapsed: float):
+    try:
+        requests.post(
+            f"{API_URL}/ota/metrics/snapshot",
+            json=metrics_snapshot(elapsed),
+            timeout=HTTP_TIMEOUT,
+        )
+    except requests.RequestException as e:
+        print(f"❌ Failed to post metrics snapshot: {e}")
+
+
+def report_metrics(interval: float = METRICS_SNAPSHOT_SECONDS, stop=None):
+    """Post a metrics snapshot every ``interval`` seconds until ``stop`` is set."""
+    stop = stop or threading.Event()
+    last = time.monotonic()
+    while not stop.wait(interval):
+        now = time.monotonic()
+        post_metrics_snapshot(now - last)
+        last = now
+
+
+def pods_in_wave(wave: str, fleet_size: int) -> int:
+    """Pods a deploy wave covers: canary 1, blue 2, green the whole fleet."""
     wave_map = {
         "canary": 1,
-        "blue": min(2, len(pods)),
-        "green": len(pods),
+        "blue": min(2, fleet_size),
+        "green": fleet_size,
     }
+    return wave_map.get(wave, 1)
+
+
+class RolloutCheckpoint:
+    """
+    Rollout progress of one job, persisted through the backend.
+
+    The target set is recorded before the first patch and completed pods are
+    checkpointed after every batch, so a runner that dies mid-rollout resumes
+    with the remaining pods instead of starting over.
+    """
+
+    def __init__(self, job_id: int, cluster=None):
+        self.job_id = job_id
+        self.url = f"{API_URL}/ota/jobs/{job_id}"
+        # Multi-cluster jobs keep one target set per kubeconfig context
+        self.params = {"cluster": cluster} if cluster else {}
+
+    def load(self):
+        try:
+            response = requests.get(
+                f"{self.url}/checkpoint",
+                params=self.params,
+                timeout=HTTP_TIMEOUT,
+            )
+            response.raise_for_status()
+            return response.json()["checkpoint"]
+        except (requests.RequestException, ValueError, KeyError) as e:
+            print(f"⚠️ Failed to load checkpoint for job {self.job_id}: {e}")
+            return None
+
+    def save_targets(self, pods):
+        try:
+            requests.put(
+                f"{self.url}/targets",
+                params=self.params,
+                json=[pod.ref() for pod in pods],
+                timeout=HTTP_TIMEOUT,
+            ).raise_for_status()
+        except requests.RequestException as e:
+            print(f"⚠️ Failed to save targets for job {self.job_id}: {e}")
+
+    def mark_done(self, pods, step: int, outcomes=None):
+        """Checkpoint patched pods; outcomes adds per-pod latency and attempts."""
+        try:
+            requests.post(
+                f"{self.url}/checkpoint",
+                params={**self.params, "step": step},
+                json=outcomes or [pod.ref() for pod in pods],
+                timeout=HTTP_TIMEOUT,
+            ).raise_for_status()
+        except requests.RequestException as e:
+            print(f"⚠️ Failed to checkpoint job {self.job_id}: {e}")
+
+
+def update_application_pods(
+    version: str,
+    wave: str = "canary",
+    should_yield=None,
+    checkpoint=None,
+    context=None,
+    metrics: bool = True,
+):
+    """
+    Roll out a version by patching the labels of idle application pods.
+
+    The target set is the difference between the desired and the observed
+    version: pods already labelled with ``version`` count towards the wave but
+    are not patched again, so re-running a job after a partial failure only
+    touches the remainder. Each batch is patched by up to PATCH_CONCURRENCY
+    threads sharing the cluster's rate limiter.
+
+    Args:
+        version: The version to deploy
+        wave: The deployment wave (canary: 1 pod, blue: 2, green: all)
+        should_yield: Optional callable checked between batches of
+            ROLLOUT_BATCH_SIZE pods; returning True stops the rollout early
+        checkpoint: Optional RolloutCheckpoint; when it holds saved progress
+            only the remaining pods are patched
+        context: Kubeconfig context of the cluster to roll out to
+            (default: the current context)
+        metrics: Write metrics.txt when done (update_clusters writes it once
+            for all clusters instead)
+
+    Returns:
+        Summary dict with updated, skipped and failed pod counts, the pods
+        a resumed rollout had already patched (resumed) and whether the
+        rollout yielded before finishing, or None if the pods could not be
+        listed
+    """
+    v1 = kube_api(client.CoreV1Api, context)
+    print(
+        f"🛠️ update_application_pods called with version={version}, wave={wave}"
+        + (f", cluster={context}" if context else ""),
+    )
+
+    saved = checkpoint.load() if checkpoint else None
+    if saved:
+        targets = [PodRecord.from_ref(ref) for ref in saved["remaining"]]
+        # Patched by this job before it was interrupted, not no-op patches
+        # avoided, so they are reported apart from the skipped pods
+        resumed_count = saved["completed"]
+        skipped_count = 0
+        max_to_update = len(targets)
+        print(
+            f"♻️ Resuming rollout of {version} at step {saved['step']}: "
+            f"{saved['completed']}/{saved['total']} pods already done",
+        )
+    else:
+        try:
+            pods, _ = list_pod_records(
+                v1,
+                label_selector=f"status=idle,sw_version!={version}",
+            )
+            current_pods, _ = list_pod_records(
+                v1,
+                label_selector=f"status in (idle,updated),sw_version={version}",
+            )
+        except ApiException as e:
+            print(f"❌ Failed to fetch pods: {e}")
+            return None
+
+        skipped_count = len(current_pods)
+        if skipped_count:
+            print(f"⏭️ Skipping {skipped_count} pods already at version {version}")
+
+        if not pods:
+            print("⚠️ No idle pods found to update.")
+            # Still write metrics even when no pods are found
+            if metrics:
+                write_rollout_metrics(0, skipped_count)
+            return {
+                "updated": 0,
+                "skipped": skipped_count,
+                "resumed": 0,
+                "failed": 0,
+                "yielded": False,
+            }
+
+        resumed_count = 0
+        fleet_size = len(pods) + skipped_count
+        max_to_update = max(pods_in_wave(wave, fleet_size) - skipped_count, 0)
+        targets = pods
+        if checkpoint:
+            # Pin the target set so a resumed run patches exactly these pods
+            targets = targets[:max_to_update]
+            checkpoint.save_targets(targets)
 
-    max_to_update = wave_map.get(wave, 1)
     updated_count = 0
+    failed_count = 0
+    yielded = False
+    step = saved["step"] if saved else 0
+    done = []
+    outcomes = []  # latency and attempts of every pod patched since the last checkpoint
 
     print(
         f"🔁 Starting deployment rollout: version={version}, wave={wave}, "
         f"targeting {max_to_update} pods",
     )
 
-    for pod in pods:
-        if updated_count >= max_to_update:
-            break
+    body = {"metadata": {"labels": {"sw_version": version, "status": "updated"}}}
 
-        pod_name = pod.metadata.name
-        namespace = pod.metadata.namespace
-        body = {"metadata": {"labels": {"sw_version": version, "status": "updated"}}}
+    def patch_pod(pod):
+        stats = {}
+        start = time.monotonic()
+        success = retry_patch(v1, pod.name, pod.namespace, body, stats=stats)
+        outcome = {
+            **pod.ref(),
+            "patched": bool(success),
+            "latency": round(time.monotonic() - start, 4),
+            "attempts": stats.get("attempts", 1),
+        }
+        count_patch_outcome(outcome)
+        return success, outcome
 
-        success = retry_patch(v1, pod_name, namespace, body)
-        if success:
-            updated_count += 1
+    position = 0
+    with ThreadPoolExecutor(max_workers=PATCH_CONCURRENCY) as pool:
+        while updated_count < max_to_update and position < len(targets):
+            if position:
+                if checkpoint:
+                    step += 1
+                    checkpoint.mark_done(done, step, outcomes=outcomes)
+                    done, outcomes = [], []
+                if should_yield and should_yield():
+                    print(
+                        f"⏸️ Yielding rollout of {version} after {updated_count} pods",
+                    )
+                    yielded = True
+                    break
+
+            # Never patch more pods than the wave still needs
+            size = min(ROLLOUT_BATCH_SIZE, max_to_update - updated_count)
+            batch = targets[position : position + size]
+            position += len(batch)
+            for pod, (success, outcome) in zip(batch, pool.map(patch_pod, batch)):
+                outcomes.append(outcome)
+                if success:
+                    updated_count += 1
+                    done.append(pod)
+                else:
+                    failed_count += 1
+                    print(f"🚫 Skipping {pod.name} after retries.")
+
+    if checkpoint and outcomes:
+        checkpoint.mark_done(done, step + 1, outcomes=outcomes)
+
+    print(
+        f"✅ Deployment rollout complete: {updated_count} pods updated to "
+        f"version {version}, {skipped_count} already up to date"
+        + (f", {resumed_count} done before resuming" if resumed_count else ""),
+    )
+
+    if metrics:
+        write_rollout_metrics(updated_count, skipped_count)
+    return {
+        "updated": updated_count,
+        "skipped": skipped_count,
+        "resumed": resumed_count,
+        "failed": failed_count,
+        "yielded": yielded,
+    }
+
+
+def _deployment_rolled_out(deployment) -> bool:
+    """Check whether a Deployment has converged on its latest pod template."""
+    desired = deployment.spec.replicas or 0
+    status = deployment.status
+    return (
+        (status.observed_generation or 0) >= (deployment.metadata.generation or 0)
+        and (status.updated_replicas or 0) >= desired
+        and (status.available_replicas or 0) >= desired
+    )
+
+
+def wait_for_deployment_rollout(apps_v1, name, namespace, timeout=ROLLOUT_TIMEOUT):
+    """
+    Watch a Deployment until its rollout completes or the timeout expires.
+
+    Args:
+        apps_v1: AppsV1Api client
+        name: Deployment name
+        namespace: Deployment namespace
+        timeout: Seconds to wait before giving up
+
+    Returns:
+        The number of updated replicas, or None if the rollout did not finish
+    """
+    w = watch.Watch()
+    try:
+        for event in w.stream(
+            apps_v1.list_namespaced_deployment,
+            namespace=namespace,
+            field_selector=f"metadata.name={name}",
+            timeout_seconds=timeout,
+        ):
+            deployment = event["object"]
+            if _deployment_rolled_out(deployment):
+                return deployment.status.updated_replicas or 0
+    except ApiException as e:
+        print(f"❌ Failed to watch deployment {name}: {e}")
+    finally:
+        w.stop()
+    return None
+
+
+def update_application_deployments(
+    version: str,
+    wave: str = "canary",
+    should_yield=None,
+    context=None,
+    metrics: bool = True,
+):
+    """
+    Roll out a version by patching the pod template of managed Deployments.
+
+    Instead of labelling every pod, each Deployment is patched once and the
+    Deployment controller replaces its pods, so the new labels survive pod
+    restarts. Progress is tracked through the Deployment status via a watch.
+
+    Args:
+        version: The version to deploy
+        wave: The deployment wave (canary: 1 Deployment, blue: 2, green: all)
+        should_yield: Optional callable checked between Deployments; returning
+            True stops the rollout early
+        context: Kubeconfig context of the cluster to roll out to
+            (default: the current context)
+        metrics: Write metrics.txt when done (update_clusters writes it once
+            for all clusters instead)
+
+    Returns:
+        Summary dict with updated pod and skipped Deployment counts and
+        whether the rollout yielded before finishing, or None if the
+        Deployments could not be listed
+    """
+    apps_v1 = kube_api(client.AppsV1Api, context)
+    print(
+        f"🛠️ update_application_deployments called with version={version}, "
+        f"wave={wave}" + (f", cluster={context}" if context else ""),
+    )
+
+    try:
+        deployments = apps_v1.list_deployment_for_all_namespaces(
+            label_selector=DEPLOYMENT_SELECTOR,
+        ).items
+    except ApiException as e:
+        print(f"❌ Failed to fetch deployments: {e}")
+        return None
+
+    if not deployments:
+        print(f"⚠️ No deployments labelled {DEPLOYMENT_SELECTOR} found to update.")
+        if metrics:
+            write_rollout_metrics(0)
+        return {"updated": 0, "skipped": 0, "yielded": False}
+
+    # One pass: comparing V1Deployment models serialises both to dicts
+    current, pending = [], []
+    for deployment in deployments:
+        labels = deployment.spec.template.metadata.labels or {}
+        if labels.get("sw_version") == version:
+            current.append(deployment)
         else:
-            print(f"🚫 Skipping {pod_name} after retries.")
+            pending.append(deployment)
+    if current:
+        print(f"⏭️ Skipping {len(current)} deployments already at version {version}")
+    max_to_update = max(pods_in_wave(wave, len(deployments)) - len(current), 0)
+    updated_count = 0
+    yielded = False
+
+    print(
+        f"🔁 Starting deployment rollout: version={version}, wave={wave}, "
+        f"targeting {max_to_update} deployments",
+    )
+
+    for index, deployment in enumerate(pending[:max_to_update]):
+        if should_yield and index and should_yield():
+            print(f"⏸️ Yielding rollout of {version} after {index} deployments")
+            yielded = True
+            break
+        name = deployment.metadata.name
+        namespace = deployment.metadata.namespace
+        body = {
+            "metadata": {"labels": {"sw_version": version}},
+            "spec": {
+                "template": {
+                    "metadata": {
+                        "labels": {"sw_version": version, "status": "updated"},
+                    },
+                },
+            },
+        }
+
+        if not retry_patch(
+            apps_v1,
+            name,
+            namespace,
+            body,
+            patch_fn=apps_v1.patch_namespaced_deployment,
+        ):
+            print(f"🚫 Skipping deployment {name} after retries.")
+            continue
+
+        replicas = wait_for_deployment_rollout(apps_v1, name, namespace)
+        if replicas is None:
+            print(f"⏳ Deployment {name} did not finish rolling out in time.")
+            continue
+        updated_count += replicas
+        print(f"✅ Deployment {name} rolled out {replicas} pods")
 
     print(
         f"✅ Deployment rollout complete: {updated_count} pods updated to "
         f"version {version}",
     )
+    if metrics:
+        write_rollout_metrics(updated_count, len(current))
+    return {"updated": updated_count, "skipped": len(current), "yielded": yielded}
 
-    # For direct update calls, we'll consider this as 1 job with the given updated_count
-    total_jobs = 1
-    # Create pod metrics
-    pod_metrics = f"""
-# HELP ota_updated_pods_total Total pods updated
-# TYPE ota_updated_pods_total counter
- ota_updated_pods_total {updated_count}
-# HELP ota_last_run_timestamp_seconds Last deployment timestamp
-# TYPE ota_last_run_timestamp_seconds gauge
- ota_last_run_timestamp_seconds {int(datetime.now(timezone.utc).timestamp())}
+
+def update_clusters(
+    version: str,
+    wave: str,
+    clusters,
+    mode: str = "pods",
+    should_yield=None,
+    job_id=None,
+    rollback: bool = False,
+):
+    """
+    Roll out (or roll back) a version to several clusters concurrently.
+
+    Each kubeconfig context is rolled out by its own thread (up to
+    MAX_PARALLEL_CLUSTERS at once) with its own API rate limiter, checkpoint
+    and status report, so a slow or unreachable cluster does not hold up the
+    others.
+
+    Args:
+        version: The version to deploy
+        wave: The deployment wave, applied within each cluster
+        clusters: Kubeconfig contexts to roll out to
+        mode: Patch individual pods ("pods") or Deployment templates ("deployment")
+        should_yield: Optional callable checked between batches in every cluster
+        job_id: Job being run; enables per-cluster checkpoints and reports
+        rollback: Roll Deployments and updated pods back to the version
+            instead (see rollback_application); mode and should_yield are
+            ignored
+
+    Returns:
+        Dict mapping each context to its rollout summary, or None if the
+        rollout in that cluster failed
+    """
+
+    def rollout(context):
+        report_cluster_status(job_id, context, "in_progress")
+        try:
+            if rollback:
+                result = rollback_application(
+                    version,
+                    wave=wave,
+                    context=context,
+                    metrics=False,
+                )
+            elif mode == "deployment":
+                result = update_application_deployments(
+                    version,
+                    wave=wave,
+                    should_yield=should_yield,
+                    context=context,
+                    metrics=False,
+                )
+            else:
+                result = update_application_pods(
+                    version,
+                    wave=wave,
+                    should_yield=should_yield,
+                    checkpoint=RolloutCheckpoint(job_id, cluster=context)
+                    if job_id
+                    else None,
+                    context=context,
+                    metrics=False,
+                )
+        except (ApiException, ConfigException, HTTPError) as e:
+            print(f"❌ Rollout to cluster {context} failed: {e}")
+            result = None
+        if result is None:
+            status = "failed"
+        else:
+            status = "yielded" if result.get("yielded") else "complete"
+        report_cluster_status(job_id, context, status, result)
+        return result
+
+    action = "Rolling back to" if rollback else "Rolling out"
+    print(f"🌐 {action} {version} in {len(clusters)} clusters: {clusters}")
+    with ThreadPoolExecutor(max_workers=MAX_PARALLEL_CLUSTERS) as pool:
+        results = dict(zip(clusters, pool.map(rollout, clusters)))
+
+    for context, result in results.items():
+        if result is None:
+            print(f"🌐 [{context}] failed")
+        else:
+            print(
+                f"🌐 [{context}] {result['updated']} updated, "
+                f"{result['skipped']} skipped"
+                + (", yielded" if result.get("yielded") else ""),
+            )
+
+    # One metrics.txt for the whole fleet rather than the last cluster's counts
+    rolled_out = [result for result in results.values() if result]
+    updated = sum(result["updated"] for result in rolled_out)
+    skipped = sum(result["skipped"] for result in rolled_out)
+    if rollback:
+        write_rollback_metrics(updated)
+    else:
+        write_rollout_metrics(updated, skipped)
+    return results
+
+
+def report_cluster_status(job_id, context, status: str, result=None):
+    """
+    Send the status of one cluster of a multi-cluster job to the backend.
+
+    Args:
+        job_id: Job being run, or None for local runs (nothing is reported)
+        context: Kubeconfig context the status is for
+        status: in_progress, complete, failed or yielded
+        result: Rollout summary with the pod counts, once the rollout ran
+    """
+    if job_id is None:
+        return
+    report = {"status": status}
+    if result:
+        for key in ("updated", "skipped", "failed"):
+            report[key] = result.get(key, 0)
+    try:
+        requests.post(
+            f"{API_URL}/ota/jobs/{job_id}/clusters",
+            params={"cluster": context},
+            json=report,
+            timeout=HTTP_TIMEOUT,
+        ).raise_for_status()
+    except requests.RequestException as e:
+        print(f"⚠️ Failed to report status of cluster {context}: {e}")
+
+
+def write_rollback_metrics(rollback_count: int):
+    rollback_metrics = f"""
+# HELP ota_rollback_pods_total Total pods rolled back
+# TYPE ota_rollback_pods_total counter
+ ota_rollback_pods_total {rollback_count}
+# HELP ota_last_rollback_timestamp_seconds Last rollback timestamp
+# TYPE ota_last_rollback_timestamp_seconds gauge
+ ota_last_rollback_timestamp_seconds {int(datetime.now(timezone.utc).timestamp())}
 """.strip()
-    # Absolute path to root-level metrics.txt
+
     root_dir = Path(__file__).parent.parent
     metrics_path = root_dir / "metrics.txt"
 
-    # Write pod metrics first
-    metrics_path.write_text(pod_metrics + "\n", encoding="utf-8")
-    # Then append job metrics
-    write_metrics(updated_count, total_jobs)
-    print(f"📊 Metrics written to {metrics_path}")
+    # Append rollback metrics
+    try:
+        with _metrics_lock:
+            existing_content = metrics_path.read_text(encoding="utf-8")
+            metrics_path.write_text(
+                existing_content + "\n" + rollback_metrics + "\n",
+                encoding="utf-8",
+            )
+        print(f"📊 Rollback metrics written to {metrics_path}")
+    except (FileNotFoundError, OSError) as e:
+        print(f"⚠️ Failed to write rollback metrics: {e}")
 
 
-def rollback_application_pods(previous_version: str, wave: str = "green"):
+def rollback_application_pods(
+    previous_version: str,
+    wave: str = "green",
+    context=None,
+    metrics: bool = True,
+):
     """
     Rollback application pods to a previous version.
 
     Args:
         previous_version: The version to rollback to
         wave: The rollback scope (default: "green" for all pods)
+        context: Kubeconfig context of the cluster to roll back
+            (default: the current context)
+        metrics: Write metrics.txt when done (update_clusters writes it once
+            for all clusters instead)
+
+    Returns:
+        Summary dict with the rolled back pod count, or None if the pods
+        could not be listed
     """
-    config.load_kube_config()
-    v1 = client.CoreV1Api()
+    v1 = kube_api(client.CoreV1Api, context)
     print(
         f"🔄 rollback_application_pods called with version={previous_version}, "
-        f"wave={wave}",
+        f"wave={wave}" + (f", cluster={context}" if context else ""),
     )
 
     try:
         # Get all pods that have been updated (status="updated")
-        pods = v1.list_pod_for_all_namespaces(label_selector="status=updated").items
+        pods, _ = list_pod_records(v1, label_selector="status=updated")
     except ApiException as e:
         print(f"❌ Failed to fetch pods for rollback: {e}")
-        return
+        return None
 
     if not pods:
         print("⚠️ No updated pods found to rollback.")
-        return
+        return {"updated": 0, "skipped": 0, "yielded": False}
 
     wave_map = {
         "canary": 1,
@@ -200,8 +813,8 @@ def rollback_application_pods(previous_version: str, wave: str = "green"):
         if rollback_count >= max_to_rollback:
             break
 
-        pod_name = pod.metadata.name
-        namespace = pod.metadata.namespace
+        pod_name = pod.name
+        namespace = pod.namespace
         body = {
             "metadata": {"labels": {"sw_version": previous_version, "status": "idle"}},
         }
@@ -218,68 +831,429 @@ def rollback_application_pods(previous_version: str, wave: str = "green"):
         f"version {previous_version}",
     )
 
-    # Write rollback metrics
-    rollback_metrics = f"""
-# HELP ota_rollback_pods_total Total pods rolled back
-# TYPE ota_rollback_pods_total counter
- ota_rollback_pods_total {rollback_count}
-# HELP ota_last_rollback_timestamp_seconds Last rollback timestamp
-# TYPE ota_last_rollback_timestamp_seconds gauge
- ota_last_rollback_timestamp_seconds {int(datetime.now(timezone.utc).timestamp())}
-""".strip()
+    if metrics:
+        write_rollback_metrics(rollback_count)
+    return {"updated": rollback_count, "skipped": 0, "yielded": False}
 
-    root_dir = Path(__file__).parent.parent
-    metrics_path = root_dir / "metrics.txt"
 
-    # Append rollback metrics
+def rollback_application_deployments(
+    previous_version: str,
+    wave: str = "green",
+    context=None,
+):
+    """
+    Rollback the pod templates of managed Deployments to a previous version.
+
+    Relabelling pods alone would not undo a deployment-mode rollout: the
+    template still carries the new version, so recreated pods would come
+    back on it. Deployments whose template a rollout marked status=updated
+    on another version get the previous version (and status=idle) patched
+    back into their template; Deployments no rollout touched are left alone.
+
+    Args:
+        previous_version: The version to rollback to
+        wave: The rollback scope (canary: 1 Deployment, blue: 2, green: all)
+        context: Kubeconfig context of the cluster to roll back
+            (default: the current context)
+
+    Returns:
+        Summary dict with the rolled back pod count, or None if the
+        Deployments could not be listed
+    """
+    apps_v1 = kube_api(client.AppsV1Api, context)
+
+    try:
+        deployments = apps_v1.list_deployment_for_all_namespaces(
+            label_selector=DEPLOYMENT_SELECTOR,
+        ).items
+    except ApiException as e:
+        print(f"❌ Failed to fetch deployments for rollback: {e}")
+        return None
+
+    changed = []
+    for deployment in deployments:
+        labels = deployment.spec.template.metadata.labels or {}
+        # Only templates an OTA rollout stamped; untouched ones keep their version
+        if labels.get("status") == "updated" and (
+            labels.get("sw_version") != previous_version
+        ):
+            changed.append(deployment)
+    if not changed:
+        return {"updated": 0, "skipped": 0, "yielded": False}
+
+    max_to_rollback = {"canary": 1, "blue": min(2, len(changed))}.get(
+        wave, len(changed)
+    )
+    rollback_count = 0
+    body = {
+        "metadata": {"labels": {"sw_version": previous_version}},
+        "spec": {
+            "template": {
+                "metadata": {
+                    "labels": {"sw_version": previous_version, "status": "idle"},
+                },
+            },
+        },
+    }
+
+    print(
+        f"🔁 Starting deployment rollback: version={previous_version}, "
+        f"wave={wave}, targeting {max_to_rollback} deployments",
+    )
+
+    for deployment in changed[:max_to_rollback]:
+        name = deployment.metadata.name
+        namespace = deployment.metadata.namespace
+        if not retry_patch(
+            apps_v1,
+            name,
+            namespace,
+            body,
+            patch_fn=apps_v1.patch_namespaced_deployment,
+        ):
+            print(f"🚫 Failed to rollback deployment {name} after retries.")
+            continue
+
+        replicas = wait_for_deployment_rollout(apps_v1, name, namespace)
+        if replicas is None:
+            print(f"⏳ Deployment {name} did not finish rolling back in time.")
+            continue
+        rollback_count += replicas
+        print(f"✅ Rolled back deployment {name} to version {previous_version}")
+
+    return {"updated": rollback_count, "skipped": 0, "yielded": False}
+
+
+def rollback_application(
+    previous_version: str,
+    wave: str = "green",
+    context=None,
+    metrics: bool = True,
+):
+    """
+    Rollback both rollout modes: Deployment templates, then updated pods.
+
+    Templates are reverted first, so the pods they replace come back on
+    the previous version and only pods patched in pod mode are relabelled.
+
+    Args:
+        previous_version: The version to rollback to
+        wave: The rollback scope (default: "green" for everything)
+        context: Kubeconfig context of the cluster to roll back
+            (default: the current context)
+        metrics: Write metrics.txt when done (update_clusters writes it once
+            for all clusters instead)
+
+    Returns:
+        Summary dict with the rolled back pod count, or None if the
+        Deployments or pods could not be listed
+    """
+    deployments = rollback_application_deployments(
+        previous_version,
+        wave=wave,
+        context=context,
+    )
+    if deployments is None:
+        return None
+    pods = rollback_application_pods(
+        previous_version,
+        wave=wave,
+        context=context,
+        metrics=False,
+    )
+    if pods is None:
+        return None
+
+    rollback_count = deployments["updated"] + pods["updated"]
+    if metrics:
+        write_rollback_metrics(rollback_count)
+    return {"updated": rollback_count, "skipped": 0, "yielded": False}
+
+
+def _pod_event(event_type: str, pod: PodRecord) -> dict:
+    return {
+        "type": event_type,
+        "namespace": pod.namespace,
+        "name": pod.name,
+        "sw_version": pod.sw_version,
+        "status": pod.status,
+    }
+
+
+def post_inventory_events(events, reset=False, retries=MAX_RETRIES):
+    """
+    Send a batch of pod events to the backend inventory, retrying failures.
+
+    Returns:
+        False if the batch could not be delivered; the inventory counts are
+        then off and must be rebuilt with a resync
+    """
+    for i in range(retries):
+        try:
+            response = requests.post(
+                f"{API_URL}/ota/inventory/events",
+                params={"reset": reset},
+                json=events,
+                timeout=HTTP_TIMEOUT,
+            )
+            response.raise_for_status()
+        except requests.RequestException as e:
+            print(f"⚠️ Retry {i + 1}/{retries} failed sending inventory events: {e}")
+            time.sleep(2**i)
+        else:
+            return True
+    print(f"❌ Failed to send {len(events)} inventory events")
+    return False
+
+
+def resync_pod_inventory(v1):
+    """
+    Replace the backend inventory with a full LIST of versioned pods.
+
+    Returns:
+        The list resourceVersion to start watching from, or None if the
+        inventory could not be sent to the backend
+    """
+    pods, resource_version = list_pod_records(v1, label_selector=INVENTORY_SELECTOR)
+    events = [_pod_event("ADDED", pod) for pod in pods]
+    # The first batch resets the inventory, even when the fleet is empty
+    for start in range(0, max(len(events), 1), INVENTORY_BATCH_SIZE):
+        if not post_inventory_events(
+            events[start : start + INVENTORY_BATCH_SIZE],
+            reset=start == 0,
+        ):
+            return None
+    print(f"📦 Inventory resynced with {len(events)} pods")
+    return resource_version
+
+
+def watch_pod_inventory(v1, resource_version):
+    """
+    Stream pod changes to the backend inventory in batches.
+
+    The watch runs for INVENTORY_FLUSH_SECONDS and the caller resumes it from
+    the returned resourceVersion, so a batch is sent once it is full or the
+    watch ends, whichever comes first, even if no further event arrives.
+
+    Returns:
+        The last resourceVersion seen, to resume the next watch from, or
+        None if events were lost and the inventory must be resynced
+    """
+    w = watch.Watch()
+    batch = []
+    for event in w.stream(
+        v1.list_pod_for_all_namespaces,
+        label_selector=INVENTORY_SELECTOR,
+        resource_version=resource_version,
+        timeout_seconds=INVENTORY_FLUSH_SECONDS,
+    ):
+        pod = event["object"]
+        batch.append(_pod_event(event["type"], PodRecord.from_model(pod)))
+        resource_version = pod.metadata.resource_version
+        if len(batch) >= INVENTORY_BATCH_SIZE:
+            if not post_inventory_events(batch):
+                # Watching on would leave the counts off by the lost deltas
+                w.stop()
+                return None
+            batch = []
+    if batch and not post_inventory_events(batch):
+        return None
+    return resource_version
+
+
+def sync_pod_inventory():
+    """
+    Keep the backend fleet inventory current from a pod LIST + WATCH.
+
+    A full LIST seeds the inventory once; afterwards only watch events are
+    sent. The inventory is re-listed when the watch falls too far behind (410)
+    or when a batch of events could not be delivered to the backend.
+    """
+    v1 = kube_api(client.CoreV1Api)
+    resource_version = None
+    while True:
+        try:
+            if resource_version is None:
+                resource_version = resync_pod_inventory(v1)
+                if resource_version is None:
+                    time.sleep(SLEEP_INTERVAL)
+                    continue
+            resource_version = watch_pod_inventory(v1, resource_version)
+        except ApiException as e:
+            if e.status != HTTP_GONE:
+                print(f"❌ Inventory watch failed: {e}")
+                time.sleep(SLEEP_INTERVAL)
+            resource_version = None
+
+
+def claim_next_job():
+    """
+    Ask the backend for the next job to run.
+
+    Returns:
+        The claimed job dict, or None if the queue is empty or unreachable
+    """
     try:
-        existing_content = metrics_path.read_text(encoding="utf-8")
-        metrics_path.write_text(
-            existing_content + "\n" + rollback_metrics + "\n",
-            encoding="utf-8",
+        response = requests.post(
+            f"{API_URL}/ota/jobs/claim",
+            params={"runner_id": RUNNER_ID},
+            timeout=HTTP_TIMEOUT,
         )
-        print(f"📊 Rollback metrics written to {metrics_path}")
-    except (FileNotFoundError, OSError) as e:
-        print(f"⚠️ Failed to write rollback metrics: {e}")
+        data = response.json()
+    except (requests.RequestException, ValueError) as e:
+        print(f"❌ Failed to claim job: {e}")
+        return None
+
+    if data.get("superseded"):
+        print(f"⏭️ {data['superseded']} stale deploy jobs superseded by newer ones")
+    return data.get("job")
+
+
+def rollback_waiting() -> bool:
+    """
+    Check whether a rollback is queued at the head of the job queue.
+
+    Returns:
+        True if the next job the backend would hand out is a rollback
+    """
+    try:
+        response = requests.get(f"{API_URL}/ota/jobs/next", timeout=HTTP_TIMEOUT)
+        next_job = response.json().get("job")
+    except (requests.RequestException, ValueError) as e:
+        print(f"❌ Failed to check job queue: {e}")
+        return False
+    return bool(next_job) and next_job["status"] == "rollback_pending"
+
+
+def send_heartbeat(job_id):
+    try:
+        response = requests.post(
+            f"{API_URL}/ota/jobs/{job_id}/heartbeat",
+            params={"runner_id": RUNNER_ID},
+            timeout=HTTP_TIMEOUT,
+        )
+        if not response.json().get("renewed"):
+            print(f"⚠️ Lease on job {job_id} was not renewed")
+    except (requests.RequestException, ValueError) as e:
+        print(f"❌ Failed to send heartbeat for job {job_id}: {e}")
+
+
+@contextlib.contextmanager
+def job_heartbeat(job_id, interval: float = HEARTBEAT_SECONDS):
+    """
+    Renew the lease on a job from a background thread while it runs.
+
+    Pod checkpoints renew the lease too, but Deployment rollouts wait up to
+    ROLLOUT_TIMEOUT per Deployment and rollbacks never checkpoint, so every
+    job type needs heartbeats to not be taken for abandoned.
+    """
+    stop = threading.Event()
+
+    def beat():
+        while not stop.wait(interval):
+            send_heartbeat(job_id)
+
+    thread = threading.Thread(target=beat, daemon=True)
+    thread.start()
+    try:
+        yield
+    finally:
+        stop.set()
+        thread.join()
+
+
+def run_job(job):
+    if job["status"] == "in_progress":
+        print(f"➡️  Found job ID {job['id']} — Deploying {job['version']}")
+        if job.get("clusters"):
+            results = update_clusters(
+                job["version"],
+                job.get("wave", "canary"),
+                job["clusters"],
+                mode=job.get("mode", "pods"),
+                should_yield=rollback_waiting,
+                job_id=job["id"],
+            )
+            yielded = any(r and r.get("yielded") for r in results.values())
+            # Per-cluster reports say which clusters could not be rolled out
+            failed = None in results.values()
+        else:
+            if job.get("mode") == "deployment":
+                result = update_application_deployments(
+                    job["version"],
+                    wave=job.get("wave", "canary"),
+                    should_yield=rollback_waiting,
+                )
+            else:
+                result = update_application_pods(
+                    job["version"],
+                    wave=job.get("wave", "canary"),
+                    should_yield=rollback_waiting,
+                    checkpoint=RolloutCheckpoint(job["id"]),
+                )
+            yielded = bool(result and result.get("yielded"))
+            # Nothing was rolled out when the pods or Deployments could not
+            # be listed
+            failed = result is None
+        # A deploy that yielded to a rollback goes back in the queue; the
+        # diff-based rollout only touches the remaining pods when it resumes
+        if yielded:
+            status = "pending"
+        elif failed:
+            status = "failed"
+        else:
+            status = "complete"
+        try:
+            requests.post(
+                f"{API_URL}/ota/update_status",
+                params={"job_id": job["id"], "status": status},
+                timeout=HTTP_TIMEOUT,
+            )
+        except requests.RequestException as e:
+            print(f"❌ Failed to update job status: {e}")
+    elif job["status"] == "rollback_in_progress":
+        print(
+            f"🔄 Found rollback job ID {job['id']} — "
+            f"Rolling back to {job['version']}",
+        )
+        if job.get("clusters"):
+            results = update_clusters(
+                job["version"],
+                job.get("wave", "green"),
+                job["clusters"],
+                job_id=job["id"],
+                rollback=True,
+            )
+            failed = None in results.values()
+        else:
+            result = rollback_application(
+                job["version"],
+                wave=job.get("wave", "green"),
+            )
+            failed = result is None
+        # A rollback that could not reach every pod must not read as done
+        status = "failed" if failed else "rollback_complete"
+        try:
+            requests.post(
+                f"{API_URL}/ota/update_status",
+                params={"job_id": job["id"], "status": status},
+                timeout=HTTP_TIMEOUT,
+            )
+        except requests.RequestException as e:
+            print(f"❌ Failed to update rollback job status: {e}")
 
 
 def run_ota_jobs():
+    # Snapshots keep flowing while a long rollout blocks this loop
+    threading.Thread(target=report_metrics, daemon=True).start()
     while True:
         print("🔍 Checking for pending deployment jobs...")
-        try:
-            jobs = requests.get(f"{API_URL}/ota/jobs", timeout=HTTP_TIMEOUT).json()
-        except requests.RequestException as e:
-            print(f"❌ Failed to fetch jobs: {e}")
+        job = claim_next_job()
+        if job is None:
             time.sleep(SLEEP_INTERVAL)
             continue
-
-        for job in jobs:
-            if job["status"] == "pending":
-                print(f"➡️  Found job ID {job['id']} — Deploying {job['version']}")
-                update_application_pods(job["version"], wave=job.get("wave", "canary"))
-                try:
-                    requests.post(
-                        f"{API_URL}/ota/update_status",
-                        params={"job_id": job["id"], "status": "complete"},
-                        timeout=HTTP_TIMEOUT,
-                    )
-                except requests.RequestException as e:
-                    print(f"❌ Failed to update job status: {e}")
-            elif job["status"] == "rollback_pending":
-                print(
-                    f"🔄 Found rollback job ID {job['id']} — "
-                    f"Rolling back to {job['version']}",
-                )
-                rollback_application_pods(job["version"], wave=job.get("wave", "green"))
-                try:
-                    requests.post(
-                        f"{API_URL}/ota/update_status",
-                        params={"job_id": job["id"], "status": "rollback_complete"},
-                        timeout=HTTP_TIMEOUT,
-                    )
-                except requests.RequestException as e:
-                    print(f"❌ Failed to update rollback job status: {e}")
-        time.sleep(SLEEP_INTERVAL)
+        with job_heartbeat(job["id"]):
+            run_job(job)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,147 @@
+import math
+
+import requests
+from kubernetes import client
+from kubernetes.client.exceptions import ApiException
+
+from .job_runner import (
+    API_URL,
+    HTTP_TIMEOUT,
+    KUBE_API_BURST,
+    KUBE_API_QPS,
+    PATCH_CONCURRENCY,
+    ROLLOUT_BATCH_SIZE,
+    kube_api,
+    pods_in_wave,
+)
+from .pod_records import POD_LIST_PAGE_SIZE, list_pod_records
+
+# Assumed until the backend has timed some patches
+DEFAULT_PATCH_STATS = {
+    "samples": 0,
+    "latency_mean": 0.2,
+    "latency_p50": 0.2,
+    "latency_p90": 0.5,
+    "attempts_mean": 1.0,
+    "failure_rate": 0.0,
+}
+
+
+def fetch_patch_stats():
+    """Recorded per-pod patch latency and retry statistics, or the defaults."""
+    try:
+        response = requests.get(f"{API_URL}/ota/stats/patches", timeout=HTTP_TIMEOUT)
+        response.raise_for_status()
+    except requests.RequestException as e:
+        print(f"⚠️ Could not fetch patch statistics, using defaults: {e}")
+        return DEFAULT_PATCH_STATS
+    return response.json()["stats"] or DEFAULT_PATCH_STATS
+
+
+def inventory_targets(version: str):
+    """
+    Candidate and current pod counts for a version, from the backend inventory.
+
+    Returns:
+        {"candidates": ..., "current": ...}, or None if the backend is unreachable
+    """
+    try:
+        response = requests.get(
+            f"{API_URL}/ota/inventory/targets",
+            params={"version": version},
+            timeout=HTTP_TIMEOUT,
+        )
+        response.raise_for_status()
+    except requests.RequestException as e:
+        print(f"❌ Failed to fetch inventory targets: {e}")
+        return None
+    return response.json()
+
+
+def list_targets(version: str, context=None):
+    """
+    Candidate and current pod counts for a version, from a live pod LIST.
+
+    Uses the same label selectors as update_application_pods.
+
+    Returns:
+        {"candidates": ..., "current": ...}, or None if the LIST failed
+    """
+    v1 = kube_api(client.CoreV1Api, context)
+    try:
+        pods, _ = list_pod_records(
+            v1,
+            label_selector=f"status=idle,sw_version!={version}",
+        )
+        current_pods, _ = list_pod_records(
+            v1,
+            label_selector=f"status in (idle,updated),sw_version={version}",
+        )
+    except ApiException as e:
+        print(f"❌ Failed to fetch pods: {e}")
+        return None
+    return {"candidates": len(pods), "current": len(current_pods)}
+
+
+def wave_targets(wave: str, candidates: int, current: int) -> int:
+    """Pods a rollout would patch, the way update_application_pods counts them."""
+    max_to_update = max(pods_in_wave(wave, candidates + current) - current, 0)
+    return min(max_to_update, candidates)
+
+
+def list_pages(count: int, page_size: int = POD_LIST_PAGE_SIZE) -> int:
+    """LIST requests needed to page through ``count`` pods (at least one)."""
+    return max(math.ceil(count / page_size), 1)
+
+
+def estimate_rollout(
+    targets: int,
+    stats=None,
+    concurrency: int = PATCH_CONCURRENCY,
+    qps: float = KUBE_API_QPS,
+    burst: int = KUBE_API_BURST,
+    batch_size: int = ROLLOUT_BATCH_SIZE,
+    list_calls: int = 2,
+):
+    """
+    Estimate wall time and API calls of patching ``targets`` pods.
+
+    Pods are patched in checkpointed batches of ``batch_size``, ``concurrency``
+    at a time, so a batch takes ceil(batch / concurrency) patch latencies. All
+    requests also share one token bucket: past the first ``burst`` calls the
+    rollout cannot go faster than ``qps``. The estimate is the slower of the two.
+
+    Args:
+        targets: Pods the rollout will patch
+        stats: Patch statistics (see fetch_patch_stats); defaults if None
+        concurrency: Patches in flight per batch
+        qps: Kubernetes API rate limit
+        burst: Kubernetes API burst allowance
+        batch_size: Pods per checkpointed batch
+        list_calls: LIST requests made before patching starts
+
+    Returns:
+        Expected and p90 wall time in seconds, PATCH/LIST/total call counts,
+        batch count, expected failures and whether the rate limit is the bottleneck
+    """
+    stats = stats or DEFAULT_PATCH_STATS
+    concurrency = max(concurrency, 1)
+    full, rest = divmod(targets, batch_size)
+    rounds = full * math.ceil(batch_size / concurrency) + math.ceil(rest / concurrency)
+
+    patch_calls = math.ceil(targets * stats["attempts_mean"])
+    api_calls = patch_calls + list_calls
+    rate_seconds = max(api_calls - burst, 0) / qps
+    expected = rounds * stats["latency_mean"]
+    p90 = rounds * stats["latency_p90"]
+    return {
+        "targets": targets,
+        "batches": full + (1 if rest else 0),
+        "seconds": max(expected, rate_seconds),
+        "seconds_p90": max(p90, rate_seconds),
+        "rate_limited": rate_seconds > expected,
+        "patch_calls": patch_calls,
+        "list_calls": list_calls,
+        "api_calls": api_calls,
+        "expected_failures": targets * stats["failure_rate"],
+    }
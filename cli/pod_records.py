@@ -0,0 +1,104 @@
+import json
+import sys
+
+# Pods fetched per LIST page
+POD_LIST_PAGE_SIZE = 500
+
+
+class PodRecord:
+    """
+    The four fields of a pod the runner needs, and nothing else.
+
+    Rollouts used to hold every V1Pod of a LIST response (a deep tree of
+    generated model objects, kilobytes per pod) for their whole duration. A
+    record is a single slotted object; namespaces and label values repeat
+    across the fleet and are interned so every record shares one copy.
+    """
+
+    __slots__ = ("namespace", "name", "sw_version", "status")
+
+    def __init__(self, namespace, name, sw_version=None, status=None):
+        self.namespace = sys.intern(namespace)
+        self.name = name
+        self.sw_version = sys.intern(sw_version) if sw_version else None
+        self.status = sys.intern(status) if status else None
+
+    @classmethod
+    def from_json(cls, item):
+        """Build a record from one raw pod object of a LIST response."""
+        metadata = item["metadata"]
+        labels = metadata.get("labels") or {}
+        return cls(
+            metadata["namespace"],
+            metadata["name"],
+            labels.get("sw_version"),
+            labels.get("status"),
+        )
+
+    @classmethod
+    def from_model(cls, pod):
+        """Build a record from a V1Pod, e.g. the object of a watch event."""
+        labels = pod.metadata.labels or {}
+        return cls(
+            pod.metadata.namespace,
+            pod.metadata.name,
+            labels.get("sw_version"),
+            labels.get("status"),
+        )
+
+    @classmethod
+    def from_ref(cls, ref):
+        """Build a record from a {"namespace", "name"} checkpoint entry."""
+        return cls(ref["namespace"], ref["name"])
+
+    def ref(self):
+        return {"namespace": self.namespace, "name": self.name}
+
+    def __eq__(self, other):
+        if not isinstance(other, PodRecord):
+            return NotImplemented
+        return all(getattr(self, f) == getattr(other, f) for f in self.__slots__)
+
+    def __hash__(self):
+        return hash((self.namespace, self.name))
+
+    def __repr__(self):
+        return (
+            f"PodRecord({self.namespace!r}, {self.name!r}, "
+            f"{self.sw_version!r}, {self.status!r})"
+        )
+
+
+def list_pod_records(v1, label_selector, page_size=POD_LIST_PAGE_SIZE):
+    """
+    LIST pods across all namespaces as compact records.
+
+    The list is fetched in pages of ``page_size`` (limit/continue) with
+    ``_preload_content=False``, and each raw JSON page is reduced to records
+    before the next one is requested, so V1Pod models are never built.
+
+    Args:
+        v1: CoreV1Api client
+        label_selector: Label selector the pods must match
+        page_size: Pods per LIST page
+
+    Returns:
+        The records and the resourceVersion of the list, to watch from
+    """
+    records = []
+    resource_version = None
+    _continue = None
+    while True:
+        response = v1.list_pod_for_all_namespaces(
+            label_selector=label_selector,
+            limit=page_size,
+            _continue=_continue,
+            _preload_content=False,
+        )
+        page = json.loads(response.data)
+        records.extend(PodRecord.from_json(item) for item in page["items"])
+        # Later pages belong to the snapshot taken by the first one
+        resource_version = resource_version or page["metadata"].get("resourceVersion")
+        _continue = page["metadata"].get("continue")
+        if not _continue:
+            return records, resource_version
@@ -0,0 +1,123 @@
+import functools
+import threading
+import time
+
+from kubernetes.client.exceptions import ApiException
+
+HTTP_TOO_MANY_REQUESTS = 429
+
+# Fraction of the configured QPS regained after each successful call
+RECOVERY_STEP = 0.05
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket with adaptive slowdown.
+
+    Tokens refill at ``qps`` per second up to ``burst``. When the API server
+    answers 429 the refill rate is halved (down to ``min_qps``) and any
+    Retry-After delay is honoured; successful calls then grow the rate back
+    towards the configured maximum.
+    """
+
+    def __init__(self, qps: float, burst: int, min_qps: float = 1.0):
+        self.max_qps = qps
+        self.qps = qps
+        self.burst = burst
+        self.min_qps = min(min_qps, qps)
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        elapsed = now - self._updated
+        self._tokens = min(self.burst, self._tokens + elapsed * self.qps)
+        self._updated = now
+
+    def try_acquire(self) -> float:
+        """
+        Take a token if one is available.
+
+        Returns:
+            0 if a token was taken, otherwise the seconds to wait before retrying
+        """
+        with self._lock:
+            now = time.monotonic()
+            if now < self._blocked_until:
+                return self._blocked_until - now
+            self._refill(now)
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0.0
+            return (1 - self._tokens) / self.qps
+
+    def acquire(self):
+        """Block until a token is available."""
+        while True:
+            wait = self.try_acquire()
+            if not wait:
+                return
+            time.sleep(wait)
+
+    def throttled(self, retry_after: float = 0.0):
+        """Slow down after the server rejected a call with 429."""
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self.qps = max(self.min_qps, self.qps / 2)
+            self._tokens = 0.0
+            if retry_after:
+                self._blocked_until = max(self._blocked_until, now + retry_after)
+        print(f"🐢 Kubernetes API throttled us, slowing down to {self.qps:.1f} QPS")
+
+    def succeeded(self):
+        """Speed back up towards the configured QPS after a successful call."""
+        if self.qps >= self.max_qps:
+            return
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self.qps = min(self.max_qps, self.qps + self.max_qps * RECOVERY_STEP)
+
+
+def _retry_after(e: ApiException) -> float:
+    headers = e.headers or {}
+    try:
+        return float(headers.get("Retry-After", 0))
+    except (TypeError, ValueError):
+        return 0.0
+
+
+class RateLimitedApi:
+    """
+    Wrap a kubernetes API client so every call draws from a shared TokenBucket.
+
+    List, patch and watch calls all go through the wrapped methods; a watch
+    costs one token when the stream is opened.
+    """
+
+    def __init__(self, api, limiter: TokenBucket):
+        self._api = api
+        self._limiter = limiter
+
+    def __getattr__(self, name):
+        attr = getattr(self._api, name)
+        if name.startswith("_") or not callable(attr):
+            return attr
+
+        # functools.wraps keeps the docstring, which kubernetes.watch uses to
+        # work out the return type of list_* functions
+        @functools.wraps(attr)
+        def call(*args, **kwargs):
+            self._limiter.acquire()
+            try:
+                result = attr(*args, **kwargs)
+            except ApiException as e:
+                if e.status == HTTP_TOO_MANY_REQUESTS:
+                    self._limiter.throttled(_retry_after(e))
+                raise
+            self._limiter.succeeded()
+            return result
+
+        return call
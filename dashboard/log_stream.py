@@ -0,0 +1,247 @@
+# dashboard/log_stream.py
+"""Follow pod logs in background threads, one bounded buffer per container."""
+
+import codecs
+import threading
+import time
+from collections import deque
+
+from kubernetes.client.exceptions import ApiException
+from urllib3.exceptions import HTTPError
+
+# Lines kept per container; older lines are dropped as new ones arrive
+LOG_BUFFER_LINES = 1000
+# Lines of history fetched when a stream starts
+LOG_TAIL_LINES = 100
+# Maximum bytes handed over per read from the follow connection
+LOG_CHUNK_BYTES = 16 * 1024
+# Streams nobody has polled for this long are stopped
+LOG_IDLE_SECONDS = 300
+
+
+class LogStream:
+    """
+    Follows the log of one pod container into a ring buffer.
+
+    A daemon thread reads the chunked ``follow=True`` response as it arrives
+    and appends complete lines to a ``deque(maxlen=...)``, so memory stays
+    bounded however long the stream runs. Readers poll with ``since`` to get
+    only the lines appended after their last poll.
+    """
+
+    def __init__(
+        self,
+        v1,
+        namespace: str,
+        pod: str,
+        container=None,
+        max_lines: int = LOG_BUFFER_LINES,
+        tail_lines: int = LOG_TAIL_LINES,
+    ):
+        self.v1 = v1
+        self.namespace = namespace
+        self.pod = pod
+        self.container = container
+        self.tail_lines = tail_lines
+        self.lines = deque(maxlen=max_lines)
+        self.seq = 0  # total lines appended since the stream started
+        self.error = None
+        self.done = False
+        self.last_read = time.monotonic()
+        self._response = None
+        self._stopped = threading.Event()
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    @property
+    def label(self) -> str:
+        name = f"{self.namespace}/{self.pod}"
+        return f"{name} [{self.container}]" if self.container else name
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def _append(self, line: str):
+        with self._lock:
+            self.lines.append(line)
+            self.seq += 1
+
+    def _run(self):
+        partial = ""
+        # Multi-byte characters may be split across chunks
+        decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        try:
+            self._response = self.v1.read_namespaced_pod_log(
+                name=self.pod,
+                namespace=self.namespace,
+                container=self.container,
+                follow=True,
+                tail_lines=self.tail_lines,
+                _preload_content=False,
+            )
+            if self._stopped.is_set():
+                return
+            for chunk in self._response.stream(LOG_CHUNK_BYTES):
+                if self._stopped.is_set():
+                    break
+                *complete, partial = (partial + decoder.decode(chunk)).split("\n")
+                for line in complete:
+                    self._append(line)
+            if partial:
+                self._append(partial)
+        except (ApiException, HTTPError, OSError, ValueError) as e:
+            # Closing the connection in stop() also lands here
+            if not self._stopped.is_set():
+                self.error = str(e)
+        finally:
+            self.done = True
+            if self._response is not None:
+                self._response.release_conn()
+
+    def since(self, seq: int):
+        """
+        Lines appended after a previous poll.
+
+        Args:
+            seq: Value returned by the previous call (0 for everything)
+
+        Returns:
+            The new lines still in the buffer, and the seq to poll with next
+        """
+        with self._lock:
+            self.last_read = time.monotonic()
+            new = min(self.seq - seq, len(self.lines))
+            return list(self.lines)[len(self.lines) - new :], self.seq
+
+    def stop(self):
+        """Stop following; unblocks the reader by closing the connection."""
+        self._stopped.set()
+        if self._response is not None:
+            self._response.close()
+
+
+class PodLogStreams:
+    """
+    Concurrent log streams for several pods and their containers.
+
+    Meant to be shared by every dashboard session in the process, so a pod
+    followed by many viewers is read over one connection. Each stream keeps
+    the set of followers that asked for it and is stopped once the last one
+    unfollows it, or once nobody has polled it for ``idle_seconds`` (a closed
+    browser tab never unfollows).
+    """
+
+    def __init__(
+        self,
+        v1,
+        max_lines: int = LOG_BUFFER_LINES,
+        idle_seconds=LOG_IDLE_SECONDS,
+    ):
+        self.v1 = v1
+        self.max_lines = max_lines
+        self.idle_seconds = idle_seconds
+        self.streams = {}  # (namespace, pod, container) -> LogStream
+        self.followers = {}  # (namespace, pod, container) -> set of follower ids
+        self._lock = threading.Lock()
+        self._reaper = None
+
+    def containers(self, namespace: str, pod: str):
+        """Container names of a pod, read from its spec."""
+        spec = self.v1.read_namespaced_pod(name=pod, namespace=namespace).spec
+        return [container.name for container in spec.containers]
+
+    def follow(self, namespace: str, pod: str, containers=None, follower=None):
+        """
+        Start following a pod's containers, reusing streams already running.
+
+        Args:
+            namespace: Pod namespace
+            pod: Pod name
+            containers: Container names (default: every container in the pod)
+            follower: Id of the viewer following the pod, e.g. a session id
+
+        Returns:
+            The streams for the requested containers
+        """
+        if containers is None:
+            containers = self.containers(namespace, pod)
+        streams = []
+        with self._lock:
+            for container in containers:
+                key = (namespace, pod, container)
+                stream = self.streams.get(key)
+                if stream is None or stream.done:
+                    stream = LogStream(
+                        self.v1,
+                        namespace,
+                        pod,
+                        container,
+                        max_lines=self.max_lines,
+                    ).start()
+                    self.streams[key] = stream
+                self.followers.setdefault(key, set()).add(follower)
+                streams.append(stream)
+        self._start_reaper()
+        return streams
+
+    def followed_by(self, follower=None):
+        """The streams a follower asked for, keyed by (namespace, pod, container)."""
+        with self._lock:
+            return {
+                key: self.streams[key]
+                for key, followers in self.followers.items()
+                if follower in followers
+            }
+
+    def unfollow(self, namespace: str, pod: str, follower=None):
+        """
+        Drop a follower from a pod's streams, stopping the ones left unfollowed.
+
+        Returns:
+            Number of streams stopped
+        """
+        with self._lock:
+            keys = [key for key in self.streams if key[:2] == (namespace, pod)]
+            for key in keys:
+                self.followers.get(key, set()).discard(follower)
+            return self._stop([key for key in keys if not self.followers.get(key)])
+
+    def stop_idle(self, now=None):
+        """
+        Stop streams nobody has polled for ``idle_seconds``.
+
+        Returns:
+            Number of streams stopped
+        """
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            return self._stop(
+                [
+                    key
+                    for key, stream in self.streams.items()
+                    if now - stream.last_read >= self.idle_seconds
+                ]
+            )
+
+    def stop_all(self):
+        with self._lock:
+            self._stop(list(self.streams))
+
+    def _stop(self, keys):
+        for key in keys:
+            self.streams.pop(key).stop()
+            self.followers.pop(key, None)
+        return len(keys)
+
+    def _start_reaper(self):
+        # Idle streams must be stopped even when no session is left to poll
+        if self.idle_seconds is None or self._reaper is not None:
+            return
+        self._reaper = threading.Thread(target=self._reap, daemon=True)
+        self._reaper.start()
+
+    def _reap(self):
+        while True:
+            time.sleep(self.idle_seconds / 2)
+            self.stop_idle()
@@ -1,11 +1,24 @@
 import os
 import subprocess
+import sys
 import time
+import uuid
+from collections import deque
+from pathlib import Path
 
 import pandas as pd
 import requests
 import streamlit as st
 from dotenv import load_dotenv
+from kubernetes import client, config
+from kubernetes.client.exceptions import ApiException
+from kubernetes.config import ConfigException
+
+# `streamlit run` only puts this script's directory on sys.path; add the repo
+# root so the package import works the same here as in tests and tools
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from dashboard.log_stream import LOG_BUFFER_LINES, PodLogStreams  # noqa: E402
 
 # Load environment variables from .env file if it exists
 load_dotenv()
@@ -16,6 +29,10 @@ API_URL = os.environ.get("API_URL", "http://127.0.0.1:8000")
 st.set_page_config(layout="wide", page_title="Kubernetes Deployment Manager")
 st.title("🚀 Kubernetes Deployment Manager")
 
+# Seconds between fragment refreshes, and how long pod listings are shared
+# across every open dashboard session
+REFRESH_SECONDS = 30
+
 # Add auto-refresh functionality
 col1, col2, col3 = st.columns([3, 1, 1])
 with col2:
@@ -24,24 +41,68 @@ with col2:
 with col3:
     auto_refresh = st.checkbox("Auto-refresh (30s)", help="Automatically refresh every 30 seconds")
 
-# Auto-refresh logic
-if auto_refresh:
-    # Create a placeholder for the refresh timer
-    placeholder = st.empty()
-    with placeholder.container():
-        st.info(f"🔄 Auto-refreshing in 30 seconds... (Last refresh: {time.strftime('%H:%M:%S')})")
-    time.sleep(30)
-    placeholder.empty()
-    st.rerun()
+# Only the job queue and pod panels re-run on the timer; the rest of the page
+# (forms, inventory, logs) is left alone and no thread sleeps between runs
+refresh_every = REFRESH_SECONDS if auto_refresh else None
+
+
+# Jobs per /ota/jobs/changes page (the API's CHANGES_LIMIT)
+CHANGES_PAGE_SIZE = 500
+
+
+def fetch_job_changes(since):
+    """Jobs changed since the cursor (every job when since is None).
+
+    Follows the cursor page by page until a short page shows the delta is
+    complete, so a first load or a burst of changes is never cut off.
+    """
+    jobs = []
+    while True:
+        params = {"limit": CHANGES_PAGE_SIZE}
+        if since:
+            params["since"] = since
+        response = requests.get(
+            f"{API_URL}/ota/jobs/changes", params=params, timeout=10
+        )
+        response.raise_for_status()
+        page = response.json()
+        jobs.extend(page["jobs"])
+        since = page["cursor"]
+        if len(page["jobs"]) < CHANGES_PAGE_SIZE:
+            return {"jobs": jobs, "cursor": since}
+
 
 # --- View All Jobs ---
-st.subheader("📋 Deployment Job Queue")
-jobs = requests.get(f"{API_URL}/ota/jobs").json()
-if jobs:
-    df = pd.DataFrame(jobs)
-    st.dataframe(df)
-else:
-    st.info("No deployment jobs found.")
+@st.fragment(run_every=refresh_every)
+def job_queue_panel():
+    st.subheader("📋 Deployment Job Queue")
+    state = st.session_state
+    jobs = state.setdefault("jobs", {})
+    try:
+        changes = fetch_job_changes(state.get("jobs_cursor"))
+    except (requests.RequestException, ValueError):
+        changes = None
+        st.warning("Could not reach the API; showing the last known jobs.")
+
+    if changes:
+        # Merge the delta by id (the feed re-sends its last few seconds) and
+        # only rebuild the table when something changed
+        if changes["jobs"]:
+            for job in changes["jobs"]:
+                jobs[job["id"]] = job
+            state["jobs_df"] = pd.DataFrame(
+                sorted(jobs.values(), key=lambda job: job["created_at"], reverse=True)
+            )
+        state["jobs_cursor"] = changes["cursor"]
+
+    if jobs:
+        st.dataframe(state["jobs_df"])
+    else:
+        st.info("No deployment jobs found.")
+    st.caption(f"Last refresh: {time.strftime('%H:%M:%S')}")
+
+
+job_queue_panel()
 
 # --- Add New Job ---
 col1, col2 = st.columns(2)
@@ -92,90 +153,204 @@ with col2:
             else:
                 st.error(f"Error: {result.stderr}")
 
-# --- Live Pod Viewer ---
-st.subheader("📦 Application Pod Status (from Kubernetes)")
-pod_data = []
-
-# Check if kubectl is available and cluster is accessible
+# --- Fleet Version Distribution ---
+st.subheader("🗺️ Fleet Version Distribution")
 try:
-    # Test basic kubectl connectivity first
-    subprocess.check_output(["kubectl", "version", "--client"], stderr=subprocess.DEVNULL)
-    kubectl_available = True
-except (subprocess.CalledProcessError, FileNotFoundError):
-    kubectl_available = False
+    inventory = requests.get(f"{API_URL}/ota/inventory", timeout=10).json()
+except (requests.RequestException, ValueError):
+    inventory = None
+
+if inventory and inventory["total"]:
+    col1, col2 = st.columns(2)
+    with col1:
+        st.metric("Pods tracked", inventory["total"])
+        st.bar_chart(pd.Series(inventory["versions"], name="Pods by version"))
+    with col2:
+        st.bar_chart(pd.Series(inventory["statuses"], name="Pods by status"))
+
+    with st.expander("Browse pods"):
+        version_filter = st.selectbox(
+            "Filter by version", ["All", *sorted(inventory["versions"])]
+        )
+        # Stack of keyset cursors so we can page forwards and backwards
+        cursors = st.session_state.setdefault("inventory_cursors", [0])
+        params = {"limit": 50, "after": cursors[-1]}
+        if version_filter != "All":
+            params["version"] = version_filter
+        page = requests.get(
+            f"{API_URL}/ota/inventory/pods", params=params, timeout=10
+        ).json()
+        st.dataframe(pd.DataFrame(page["pods"]))
+        prev_col, next_col = st.columns(2)
+        with prev_col:
+            if len(cursors) > 1 and st.button("⬅️ Previous page"):
+                cursors.pop()
+                st.rerun()
+        with next_col:
+            if page["next"] and st.button("Next page ➡️"):
+                cursors.append(page["next"])
+                st.rerun()
+else:
+    st.info(
+        "Fleet inventory is empty. Run `python -m cli.client sync-inventory` "
+        "to keep it updated from pod watch events."
+    )
+
+# --- Trends ---
+# Window label -> seconds of history; the API answers long windows from
+# its 1m/1h rollups, so every window comes back as at most TREND_MAX_POINTS
+TREND_WINDOWS = {
+    "1 hour": 3600,
+    "6 hours": 6 * 3600,
+    "24 hours": 24 * 3600,
+    "7 days": 7 * 24 * 3600,
+    "30 days": 30 * 24 * 3600,
+}
+TREND_MAX_POINTS = 300
+TREND_CHARTS = {
+    "queue_depth": "Queued jobs",
+    "rollout_rate": "Pods patched per second",
+    "patch_latency": "Patch latency (s)",
+    "patch_failures": "Failed patches",
+}
+
+
+@st.cache_data(ttl=REFRESH_SECONDS, show_spinner=False)
+def fetch_metric_series(window):
+    """Downsampled metric series for the last window seconds."""
+    response = requests.get(
+        f"{API_URL}/ota/metrics/series",
+        params={"window": window, "max_points": TREND_MAX_POINTS},
+        timeout=10,
+    )
+    response.raise_for_status()
+    return response.json()
+
 
-if kubectl_available:
+@st.fragment(run_every=refresh_every)
+def trends_panel():
+    st.subheader("📈 Trends")
+    window = st.selectbox("Window", list(TREND_WINDOWS), key="trend_window")
     try:
-        # Try to get pods with a simpler command first
-        output = subprocess.check_output(
-            ["kubectl", "get", "pods", "--no-headers"],
-            stderr=subprocess.DEVNULL,
-            timeout=5
-        ).decode()
-
-        # If basic command works, try the detailed one
-        if output.strip():
-            detailed_output = subprocess.check_output(
-                [
-                    "kubectl",
-                    "get",
-                    "pods",
-                    "-o",
-                    'jsonpath={range .items[*]}{.metadata.name} {.metadata.labels.sw_version} {.metadata.labels.status}{"\\n"}{end}',
-                ],
-                stderr=subprocess.DEVNULL,
-                timeout=5
-            ).decode()
-
-            for line in detailed_output.strip().split("\n"):
-                if line.strip():
-                    parts = line.split()
-                    if len(parts) >= 1:
-                        # Handle case where labels might not exist
-                        name = parts[0] if len(parts) > 0 else "unknown"
-                        version = parts[1] if len(parts) > 1 else "unknown"
-                        status = parts[2] if len(parts) > 2 else "unknown"
-                        pod_data.append({"Name": name, "Version": version, "Status": status})
-
-        if pod_data:
-            pod_df = pd.DataFrame(pod_data)
-            st.dataframe(pod_df)
-        else:
-            st.info("No pods found with the expected labels. Showing basic pod list:")
-            # Show basic pod info as fallback
-            basic_pods = []
-            for line in output.strip().split("\n"):
-                if line.strip():
-                    parts = line.split()
-                    if len(parts) >= 2:
-                        basic_pods.append({"Name": parts[0], "Status": parts[1], "Version": "N/A"})
-
-            if basic_pods:
-                basic_df = pd.DataFrame(basic_pods)
-                st.dataframe(basic_df)
-                pod_data = basic_pods  # Use basic pods for log viewing
+        data = fetch_metric_series(TREND_WINDOWS[window])
+    except (requests.RequestException, ValueError):
+        st.warning("Could not load metric trends from the API.")
+        return
+
+    columns = st.columns(2)
+    for i, (name, label) in enumerate(TREND_CHARTS.items()):
+        with columns[i % 2]:
+            st.caption(label)
+            points = data["series"].get(name)
+            if points:
+                df = pd.DataFrame(points)
+                df["t"] = pd.to_datetime(df["t"])
+                st.line_chart(df.set_index("t")[["value", "peak"]], height=200)
             else:
-                st.info("No pods found in the cluster.")
-
-    except subprocess.TimeoutExpired:
-        st.error("Kubernetes cluster connection timed out.")
-        st.info("Make sure your Kubernetes cluster is running and kubectl is properly configured.")
-    except Exception as e:
-        st.error(f"Error fetching pods: {str(e)}")
-        st.info("Make sure kubectl is configured and a Kubernetes cluster is accessible.")
-else:
-    st.warning("kubectl is not available or not in PATH.")
-    st.info("To use Kubernetes features, please install kubectl and configure access to a cluster.")
-    # Show demo data for development
-    st.info("📝 Demo Mode: Showing sample pod data")
-    demo_data = [
-        {"Name": "application-1", "Version": "1.0.0", "Status": "running"},
-        {"Name": "application-2", "Version": "2.0.0", "Status": "pending"},
-        {"Name": "application-1-backup", "Version": "1.0.0", "Status": "running"},
-    ]
-    demo_df = pd.DataFrame(demo_data)
-    st.dataframe(demo_df)
-    pod_data = demo_data
+                st.info("No snapshots in this window yet.")
+    st.caption(f"One point per {data['step']}s (mean and peak of each interval)")
+
+
+trends_panel()
+
+# --- Live Pod Viewer ---
+@st.cache_data(show_spinner=False)
+def kubectl_installed():
+    try:
+        # Test basic kubectl connectivity first
+        subprocess.check_output(["kubectl", "version", "--client"], stderr=subprocess.DEVNULL)
+        return True
+    except (subprocess.CalledProcessError, FileNotFoundError):
+        return False
+
+
+@st.cache_data(ttl=REFRESH_SECONDS, show_spinner=False)
+def kubectl_output(args, timeout):
+    """Run a kubectl query; the output is shared by every open dashboard."""
+    return subprocess.check_output(
+        ["kubectl", *args], stderr=subprocess.DEVNULL, timeout=timeout
+    ).decode()
+
+
+@st.fragment(run_every=refresh_every)
+def pod_panel():
+    st.subheader("📦 Application Pod Status (from Kubernetes)")
+    pod_data = []
+
+    if kubectl_available:
+        try:
+            # Try to get pods with a simpler command first
+            output = kubectl_output(("get", "pods", "--no-headers"), timeout=5)
+
+            # If basic command works, try the detailed one
+            if output.strip():
+                detailed_output = kubectl_output(
+                    (
+                        "get",
+                        "pods",
+                        "-o",
+                        'jsonpath={range .items[*]}{.metadata.name} {.metadata.labels.sw_version} {.metadata.labels.status}{"\\n"}{end}',
+                    ),
+                    timeout=5
+                )
+
+                for line in detailed_output.strip().split("\n"):
+                    if line.strip():
+                        parts = line.split()
+                        if len(parts) >= 1:
+                            # Handle case where labels might not exist
+                            name = parts[0] if len(parts) > 0 else "unknown"
+                            version = parts[1] if len(parts) > 1 else "unknown"
+                            status = parts[2] if len(parts) > 2 else "unknown"
+                            pod_data.append({"Name": name, "Version": version, "Status": status})
+
+            if pod_data:
+                pod_df = pd.DataFrame(pod_data)
+                st.dataframe(pod_df)
+            else:
+                st.info("No pods found with the expected labels. Showing basic pod list:")
+                # Show basic pod info as fallback
+                basic_pods = []
+                for line in output.strip().split("\n"):
+                    if line.strip():
+                        parts = line.split()
+                        if len(parts) >= 2:
+                            basic_pods.append({"Name": parts[0], "Status": parts[1], "Version": "N/A"})
+
+                if basic_pods:
+                    basic_df = pd.DataFrame(basic_pods)
+                    st.dataframe(basic_df)
+                    pod_data = basic_pods  # Use basic pods for log viewing
+                else:
+                    st.info("No pods found in the cluster.")
+
+        except subprocess.TimeoutExpired:
+            st.error("Kubernetes cluster connection timed out.")
+            st.info("Make sure your Kubernetes cluster is running and kubectl is properly configured.")
+        except Exception as e:
+            st.error(f"Error fetching pods: {str(e)}")
+            st.info("Make sure kubectl is configured and a Kubernetes cluster is accessible.")
+    else:
+        st.warning("kubectl is not available or not in PATH.")
+        st.info("To use Kubernetes features, please install kubectl and configure access to a cluster.")
+        # Show demo data for development
+        st.info("📝 Demo Mode: Showing sample pod data")
+        demo_data = [
+            {"Name": "application-1", "Version": "1.0.0", "Status": "running"},
+            {"Name": "application-2", "Version": "2.0.0", "Status": "pending"},
+            {"Name": "application-1-backup", "Version": "1.0.0", "Status": "running"},
+        ]
+        demo_df = pd.DataFrame(demo_data)
+        st.dataframe(demo_df)
+        pod_data = demo_data
+
+    # Remembered for the log viewer below, which is outside the fragment
+    st.session_state["pod_data"] = pod_data
+
+
+kubectl_available = kubectl_installed()
+pod_panel()
+pod_data = st.session_state.get("pod_data", [])
 
 st.subheader("🧾 Pod Logs")
 if pod_data:
@@ -216,3 +391,84 @@ if pod_data and st.button("View Logs"):
 2025-06-16 02:10:04 INFO Application ready to serve requests
 2025-06-16 02:10:05 INFO Health check passed"""
         st.code(sample_logs, language="bash")
+
+# --- Follow Pod Logs ---
+# Seconds between polls of the followed log buffers
+LOG_REFRESH_SECONDS = 2
+
+st.subheader("📡 Follow Pod Logs")
+
+
+@st.cache_resource(show_spinner=False)
+def log_streams():
+    """Log streams shared by every session, so each pod is read only once."""
+    config.load_kube_config()
+    return PodLogStreams(client.CoreV1Api())
+
+
+# Identifies this session's follows in the shared registry
+follower = st.session_state.setdefault("log_follower", uuid.uuid4().hex)
+
+
+def unfollow_pods(pods):
+    streams = log_streams()
+    views = st.session_state.setdefault("log_views", {})
+    for namespace, pod in pods:
+        streams.unfollow(namespace, pod, follower)
+        for key in [key for key in views if key[:2] == (namespace, pod)]:
+            del views[key]
+
+
+def followed_pods():
+    if "log_views" not in st.session_state:
+        return set()
+    return {key[:2] for key in log_streams().followed_by(follower)}
+
+
+if kubectl_available and pod_data:
+    follow_pods = st.multiselect("Pods to follow", [p["Name"] for p in pod_data])
+    log_namespace = st.text_input("Namespace", "default")
+    container_names = st.text_input("Containers (comma-separated, blank for all)", "")
+    follow_col, stop_col = st.columns(2)
+    with follow_col:
+        if st.button("▶️ Follow logs") and follow_pods:
+            containers = [c.strip() for c in container_names.split(",") if c.strip()]
+            try:
+                streams = log_streams()
+                # Pods dropped from the selection are unfollowed
+                unfollow_pods(
+                    followed_pods() - {(log_namespace, pod) for pod in follow_pods}
+                )
+                for pod in follow_pods:
+                    streams.follow(log_namespace, pod, containers or None, follower)
+                st.session_state.setdefault("log_views", {})
+            except (ApiException, ConfigException) as e:
+                st.error(f"Error following logs: {e}")
+    with stop_col:
+        if st.button("⏹️ Stop following") and followed_pods():
+            unfollow_pods(followed_pods())
+else:
+    st.info("Log following needs kubectl access to a cluster with running pods.")
+
+following = bool(followed_pods())
+
+
+@st.fragment(run_every=LOG_REFRESH_SECONDS if following else None)
+def followed_logs_panel():
+    if not followed_pods():
+        return
+    # Each view only pulls the lines appended since its last poll
+    views = st.session_state.setdefault("log_views", {})
+    for key, stream in log_streams().followed_by(follower).items():
+        view = views.setdefault(key, {"seq": 0, "lines": deque(maxlen=LOG_BUFFER_LINES)})
+        new_lines, view["seq"] = stream.since(view["seq"])
+        view["lines"].extend(new_lines)
+        with st.expander(stream.label, expanded=True):
+            st.code("\n".join(view["lines"]) or "(waiting for output)", language="bash")
+            if stream.error:
+                st.error(f"Log stream failed: {stream.error}")
+            elif stream.done:
+                st.caption("Log stream ended.")
+
+
+followed_logs_panel()
@@ -1,13 +1,30 @@
+from unittest.mock import patch
+
 import pytest
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
 
+from backend import admission
 from backend.database import Base
 
 
 @pytest.fixture
 def test_db():
-    engine = create_engine("sqlite:///:memory:")
+    # StaticPool shares the single in-memory connection with the threads
+    # FastAPI runs sync endpoints in
+    engine = create_engine(
+        "sqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
     Base.metadata.create_all(bind=engine)
     session_local = sessionmaker(autocommit=False, autoflush=False, bind=engine)
     return session_local()
+
+
+@pytest.fixture(autouse=True)
+def deploy_buckets():
+    # Every test starts with a full deploy budget instead of sharing the app's
+    with patch("backend.main.deploy_buckets", admission.ClientBuckets()):
+        yield
@@ -0,0 +1,37 @@
+from unittest.mock import patch
+
+from backend.admission import ClientBuckets
+
+
+def test_client_buckets_are_independent():
+    """Test each client draws from its own bucket."""
+    buckets = ClientBuckets(per_minute=6, burst=1)
+
+    assert buckets.try_acquire("ci") == 0
+    assert buckets.try_acquire("ci") > 0
+    assert buckets.try_acquire("ops") == 0
+
+
+def test_client_buckets_refill_over_time():
+    """Test a throttled client is admitted again once tokens refill."""
+    buckets = ClientBuckets(per_minute=60, burst=1)
+
+    with patch("backend.admission.time.monotonic", return_value=100.0):
+        assert buckets.try_acquire("ci") == 0
+        assert buckets.try_acquire("ci") == 1
+    with patch("backend.admission.time.monotonic", return_value=101.0):
+        assert buckets.try_acquire("ci") == 0
+
+
+def test_client_buckets_evict_idle_clients():
+    """Test idle clients are dropped once too many are tracked."""
+    buckets = ClientBuckets(per_minute=60, burst=1)
+
+    with patch("backend.admission.MAX_TRACKED_CLIENTS", 2):
+        with patch("backend.admission.time.monotonic", return_value=0.0):
+            buckets.try_acquire("a")
+            buckets.try_acquire("b")
+        with patch("backend.admission.time.monotonic", return_value=10.0):
+            buckets.try_acquire("c")
+
+    assert list(buckets._buckets) == ["c"]
@@ -1,13 +1,33 @@
+import csv
+import io
+import json
+from datetime import datetime, timedelta
 from unittest.mock import MagicMock, patch
 
 from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import Session
 
+from backend import admission, models
+from backend.database import create_schema
+from backend.inventory import list_inventory_pods
+from backend.jobs import (
+    MAX_AGING_BONUS,
+    MAX_DEPLOY_PRIORITY,
+    ROLLBACK_PRIORITY,
+    _effective_priority_column,
+    effective_priority,
+    next_queued_job,
+    queued_jobs,
+)
 from backend.main import app
 
 client = TestClient(app)
 
 # HTTP status constants
 HTTP_OK = 200
+HTTP_BAD_REQUEST = 400
+HTTP_TOO_MANY_REQUESTS = 429
 
 
 def test_root():
@@ -33,6 +53,7 @@ def test_deploy_ota(mock_get_db):
     mock_db.commit.return_value = None
     mock_db.refresh.return_value = None
     mock_db.close.return_value = None
+    mock_db.query.return_value.filter.return_value.scalar.return_value = 0
 
     with patch("backend.models.OTAJob", return_value=mock_job):
         response = client.post("/ota/deploy?version=2.0.0&wave=canary")
@@ -44,6 +65,42 @@ def test_deploy_ota(mock_get_db):
     assert data["status"] == "pending"
 
 
+def test_deploy_ota_rejects_unknown_mode():
+    """Test a mode other than pods or deployment is a validation error."""
+    response = client.post("/ota/deploy?version=2.0.0&mode=deployments")
+
+    assert response.status_code == 422
+    assert response.json()["detail"][0]["loc"] == ["query", "mode"]
+
+
+def test_create_schema_upgrades_baseline_database():
+    """Test a database from before the new OTAJob columns is upgraded in place."""
+    engine = create_engine("sqlite:///:memory:")
+    with engine.begin() as conn:
+        conn.execute(
+            text(
+                "CREATE TABLE ota_jobs (id INTEGER PRIMARY KEY, version VARCHAR,"
+                " wave VARCHAR, status VARCHAR, created_at DATETIME)"
+            )
+        )
+        conn.execute(
+            text(
+                "INSERT INTO ota_jobs (version, wave, status, created_at)"
+                " VALUES ('1.0.0', 'green', 'pending', '2025-05-24 16:29:22')"
+            )
+        )
+
+    for _ in range(2):  # Running it again on an upgraded database is a no-op
+        with engine.begin() as conn:
+            create_schema(conn)
+
+    with Session(engine) as db:
+        job = db.query(models.OTAJob).one()
+        assert (job.mode, job.priority, job.clusters) == ("pods", 0, None)
+        assert job.updated_at == job.created_at
+        assert next_queued_job(db).id == job.id
+
+
 @patch("backend.main.get_db")
 def test_list_jobs(mock_get_db):
     """Test job listing."""
@@ -70,6 +127,766 @@ def test_list_jobs(mock_get_db):
     assert data[0]["version"] == "2.0.0"
 
 
+@patch("backend.main.get_db")
+def test_claim_job_supersedes_stale_deploys(mock_get_db, test_db):
+    """Test claiming coalesces older pending deploys for the same wave."""
+    mock_get_db.side_effect = lambda: iter([test_db])
+    for version, wave in [
+        ("2.0.1", "canary"),
+        ("2.0.2", "canary"),
+        ("2.0.2", "blue"),
+        ("2.0.3", "canary"),
+    ]:
+        test_db.add(models.OTAJob(version=version, wave=wave, status="pending"))
+    test_db.commit()
+
+    response = client.post("/ota/jobs/claim")
+
+    assert response.status_code == HTTP_OK
+    data = response.json()
+    expected_superseded = 2
+    assert data["superseded"] == expected_superseded
+    assert data["job"]["version"] == "2.0.2"
+    assert data["job"]["wave"] == "blue"
+    assert data["job"]["status"] == "in_progress"
+    statuses = {
+        job.version + "/" + job.wave: job.status
+        for job in test_db.query(models.OTAJob)
+    }
+    assert statuses == {
+        "2.0.1/canary": "superseded",
+        "2.0.2/canary": "superseded",
+        "2.0.2/blue": "in_progress",
+        "2.0.3/canary": "pending",
+    }
+
+
+@patch("backend.main.get_db")
+def test_claim_job_empty_queue(mock_get_db, test_db):
+    """Test claiming from an empty queue returns no job."""
+    mock_get_db.side_effect = lambda: iter([test_db])
+
+    response = client.post("/ota/jobs/claim")
+
+    assert response.status_code == HTTP_OK
+    assert response.json() == {"job": None, "superseded": 0}
+
+
+@patch("backend.main.get_db")
+def test_claim_job_prefers_rollbacks(mock_get_db, test_db):
+    """Test a queued rollback is claimed before older deploys."""
+    mock_get_db.side_effect = lambda: iter([test_db])
+    client.post("/ota/deploy?version=2.0.0&wave=green")
+    client.post("/ota/rollback?version=1.0.0&wave=green")
+
+    peek = client.get("/ota/jobs/next").json()
+    claimed = client.post("/ota/jobs/claim").json()
+
+    assert peek["job"]["status"] == "rollback_pending"
+    assert claimed["job"]["version"] == "1.0.0"
+    assert claimed["job"]["status"] == "rollback_in_progress"
+
+
+@patch("backend.main.get_db")
+def test_deploy_yielded_to_rollback_is_not_claimed_again(mock_get_db, test_db):
+    """Test a rollback retires the deploy it preempted instead of requeueing it."""
+    mock_get_db.side_effect = lambda: iter([test_db])
+    client.post("/ota/deploy?version=2.0.0&wave=green")
+    deploy = client.post("/ota/jobs/claim").json()["job"]
+    client.post("/ota/rollback?version=1.0.0&wave=green")
+    # The runner sees the rollback between batches and requeues the deploy
+    client.post(f"/ota/update_status?job_id={deploy['id']}&status=pending")
+
+    rollback = client.post("/ota/jobs/claim").json()
+    client.post(
+        f"/ota/update_status?job_id={rollback['job']['id']}&status=rollback_complete"
+    )
+
+    assert rollback["job"]["version"] == "1.0.0"
+    assert rollback["superseded"] == 1
+    assert client.post("/ota/jobs/claim").json() == {"job": None, "superseded": 0}
+    assert test_db.get(models.OTAJob, deploy["id"]).status == "superseded"
+
+
+@patch("backend.main.get_db")
+def test_rollback_retires_deploy_queued_before_it(mock_get_db, test_db):
+    """Test a deploy that never started does not run after a covering rollback."""
+    mock_get_db.side_effect = lambda: iter([test_db])
+    deploy_id = client.post("/ota/deploy?version=2.0.0&wave=green").json()["job_id"]
+    client.post("/ota/rollback?version=1.0.0&wave=green")
+
+    rollback = client.post("/ota/jobs/claim").json()
+    client.post(
+        f"/ota/update_status?job_id={rollback['job']['id']}&status=rollback_complete"
+    )
+
+    assert rollback["job"]["version"] == "1.0.0"
+    assert rollback["superseded"] == 1
+    assert client.post("/ota/jobs/claim").json() == {"job": None, "superseded": 0}
+    assert test_db.get(models.OTAJob, deploy_id).status == "superseded"
+
+
+@patch("backend.main.get_db")
+def test_narrower_rollback_keeps_yielded_deploy(mock_get_db, test_db):
+    """Test a canary rollback does not retire a yielded green deploy."""
+    mock_get_db.side_effect = lambda: iter([test_db])
+    client.post("/ota/deploy?version=2.0.0&wave=green")
+    deploy = client.post("/ota/jobs/claim").json()["job"]
+    client.post("/ota/rollback?version=1.0.0&wave=canary")
+    client.post(f"/ota/update_status?job_id={deploy['id']}&status=pending")
+
+    rollback = client.post("/ota/jobs/claim").json()
+    client.post(
+        f"/ota/update_status?job_id={rollback['job']['id']}&status=rollback_complete"
+    )
+
+    assert rollback["superseded"] == 0
+    assert client.post("/ota/jobs/claim").json()["job"]["id"] == deploy["id"]
+
+
+@patch("backend.main.get_db")
+def test_rollback_invalidates_yielded_deploy_checkpoint(mock_get_db, test_db):
+    """Test a yielded deploy resumes from a fresh LIST after a rollback ran."""
+    mock_get_db.side_effect = lambda: iter([test_db])
+    client.post("/ota/deploy?version=2.0.0&wave=green")
+    deploy = client.post("/ota/jobs/claim").json()["job"]
+    pods = [{"namespace": "default", "name": f"app-{i}"} for i in range(3)]
+    client.put(f"/ota/jobs/{deploy['id']}/targets", json=pods)
+    client.post(f"/ota/jobs/{deploy['id']}/checkpoint?step=1", json=pods[:2])
+    # A narrower rollback leaves the deploy queued, but reverts a pod it patched
+    client.post("/ota/rollback?version=1.0.0&wave=canary")
+    client.post(f"/ota/update_status?job_id={deploy['id']}&status=pending")
+
+    rollback = client.post("/ota/jobs/claim").json()["job"]
+
+    assert rollback["status"] == "rollback_in_progress"
+    checkpoint = client.get(f"/ota/jobs/{deploy['id']}/checkpoint").json()
+    assert checkpoint == {"checkpoint": None}
+
+
+@patch("backend.main.get_db")
+def test_rollback_waits_for_deploy_running_on_another_runner(mock_get_db, test_db):
+    """Test a second runner only gets a rollback once the deploy yielded."""
+    mock_get_db.side_effect = lambda: iter([test_db])
+    client.post("/ota/deploy?version=2.0.0&wave=green")
+    deploy = client.post("/ota/jobs/claim?runner_id=runner-a").json()["job"]
+    pods = [{"namespace": "default", "name": f"app-{i}"} for i in range(3)]
+    client.put(f"/ota/jobs/{deploy['id']}/targets", json=pods)
+    client.post(f"/ota/jobs/{deploy['id']}/checkpoint?step=1", json=pods[:2])
+    client.post("/ota/rollback?version=1.0.0&wave=canary")
+
+    held = client.post("/ota/jobs/claim?runner_id=runner-b").json()
+    # runner-a sees the rollback at the head of the queue and yields
+    peek = client.get("/ota/jobs/next").json()
+    client.post(f"/ota/update_status?job_id={deploy['id']}&status=pending")
+    rollback = client.post("/ota/jobs/claim?runner_id=runner-b").json()["job"]
+
+    assert held == {"job": None, "superseded": 0}
+    assert peek["job"]["status"] == "rollback_pending"
+    assert rollback["status"] == "rollback_in_progress"
+    checkpoint = client.get(f"/ota/jobs/{deploy['id']}/checkpoint").json()
+    assert checkpoint == {"checkpoint": None}
+
+
+@patch("backend.main.get_db")
+def test_rollback_does_not_wait_for_deploys_in_other_clusters(mock_get_db, test_db):
+    """Test a deploy in another cluster does not hold a rollback back."""
+    mock_get_db.side_effect = lambda: iter([test_db])
+    client.post("/ota/deploy?version=2.0.0&clusters=west")
+    client.post("/ota/jobs/claim?runner_id=runner-a")
+    client.post("/ota/rollback?version=1.0.0&clusters=east")
+
+    rollback = client.post("/ota/jobs/claim?runner_id=runner-b").json()["job"]
+
+    assert rollback["clusters"] == ["east"]
+
+
+@patch("backend.main.get_db")
+def test_cluster_rollback_invalidates_only_its_clusters(mock_get_db, test_db):
+    """Test a rollback with clusters keeps checkpoints in other clusters."""
+    mock_get_db.side_effect = lambda: iter([test_db])
+    client.post("/ota/deploy?version=2.0.0&wave=green&clusters=east,west")
+    deploy = client.post("/ota/jobs/claim").json()["job"]
+    pods = [{"namespace": "default", "name": "app-0"}]
+    for cluster in ("east", "west"):
+        client.put(f"/ota/jobs/{deploy['id']}/targets?cluster={cluster}", json=pods)
+    client.post("/ota/rollback?version=1.0.0&wave=canary&clusters=east")
+    client.post(f"/ota/update_status?job_id={deploy['id']}&status=pending")
+
+    rollback = client.post("/ota/jobs/claim").json()["job"]
+
+    assert rollback["clusters"] == ["east"]
+    checkpoint = f"/ota/jobs/{deploy['id']}/checkpoint?cluster="
+    assert client.get(checkpoint + "east").json() == {"checkpoint": None}
+    assert client.get(checkpoint + "west").json()["checkpoint"]["total"] == 1
+
+
+@patch("backend.main.get_db")
+def test_claim_job_ages_waiting_deploys(mock_get_db, test_db):
+    """Test aging lifts a waiting deploy but never above a fresh rollback."""
+    mock_get_db.side_effect = lambda: iter([test_db])
+    test_db.add(
+        models.OTAJob(
+            version="2.0.0",
+            wave="green",
+            status="pending",
+            created_at=datetime.utcnow() - timedelta(hours=3),
+        )
+    )
+    test_db.add(
+        models.OTAJob(
+            version="1.0.0",
+            wave="green",
+            status="rollback_pending",
+            priority=ROLLBACK_PRIORITY,
+        )
+    )
+    test_db.commit()
+
+    peek = client.get("/ota/jobs/next").json()
+    claimed = client.post("/ota/jobs/claim").json()
+
+    assert peek["job"]["effective_priority"] == ROLLBACK_PRIORITY
+    assert claimed["job"]["version"] == "1.0.0"
+    deploy = test_db.query(models.OTAJob).filter_by(version="2.0.0").one()
+    assert effective_priority(deploy) == MAX_AGING_BONUS
+
+
+@patch("backend.main.get_db")
+def test_high_priority_deploy_stays_behind_rollback(mock_get_db, test_db):
+    """Test a long-queued deploy of the highest priority never beats a rollback."""
+    mock_get_db.side_effect = lambda: iter([test_db])
+    too_high = client.post(f"/ota/deploy?version=2.0.0&priority={ROLLBACK_PRIORITY}")
+    deploy_id = client.post(
+        f"/ota/deploy?version=2.0.0&wave=green&priority={MAX_DEPLOY_PRIORITY}"
+    ).json()["job_id"]
+    deploy = test_db.get(models.OTAJob, deploy_id)
+    deploy.created_at = datetime.utcnow() - timedelta(days=1)
+    test_db.commit()
+    client.post("/ota/rollback?version=1.0.0&wave=canary")
+
+    peek = client.get("/ota/jobs/next").json()
+
+    assert too_high.status_code == 422
+    assert too_high.json()["detail"][0]["loc"] == ["query", "priority"]
+    assert peek["job"]["status"] == "rollback_pending"
+    deploy = test_db.get(models.OTAJob, deploy_id)
+    assert effective_priority(deploy) == ROLLBACK_PRIORITY - 1
+
+
+def test_queue_is_ordered_by_aged_priority_in_sql(test_db):
+    """Test the SQL queue order matches effective_priority, FIFO on ties."""
+    now = datetime.utcnow()
+    test_db.add_all(
+        [
+            models.OTAJob(version="fresh-low", status="pending", created_at=now),
+            models.OTAJob(
+                version="aged-low",
+                status="pending",
+                created_at=now - timedelta(minutes=30),
+            ),
+            models.OTAJob(
+                version="fresh-high", status="pending", priority=20, created_at=now
+            ),
+            models.OTAJob(version="done", status="complete", priority=50),
+        ]
+    )
+    test_db.commit()
+
+    jobs = queued_jobs(test_db)
+
+    assert [job.version for job in jobs] == ["aged-low", "fresh-high", "fresh-low"]
+    assert next_queued_job(test_db).version == "aged-low"
+
+
+def test_sql_aging_matches_effective_priority(test_db):
+    """Test the dialect-neutral SQL aging bonus equals effective_priority."""
+    now = datetime.utcnow()
+    ages = [0, 59, 60, 61, 30 * 60 + 1, 10**6]
+    test_db.add_all(
+        models.OTAJob(
+            version=str(age),
+            status="pending",
+            priority=3,
+            created_at=now - timedelta(seconds=age),
+        )
+        for age in ages
+    )
+    test_db.commit()
+
+    rows = test_db.query(models.OTAJob, _effective_priority_column(now)).all()
+
+    assert [value for _, value in rows] == [
+        effective_priority(job, now) for job, _ in rows
+    ]
+
+
+@patch("backend.main.get_db")
+def test_deploy_ota_rate_limited_per_client(mock_get_db, test_db):
+    """Test a client over its deploy budget gets 429 with Retry-After."""
+    mock_get_db.side_effect = lambda: iter([test_db])
+    buckets = admission.ClientBuckets(per_minute=1, burst=2)
+
+    def deploy_as(client_id):
+        return client.post(
+            "/ota/deploy?version=2.0.0", headers={"X-Client-Id": client_id}
+        )
+
+    # TestClient requests come from "testclient", trusted as a proxy here
+    with (
+        patch("backend.main.deploy_buckets", buckets),
+        patch("backend.admission.TRUSTED_PROXIES", {"testclient"}),
+    ):
+        statuses = [deploy_as("ci").status_code for _ in range(3)]
+        other = deploy_as("ops")
+        limited = deploy_as("ci")
+
+    assert statuses == [HTTP_OK, HTTP_OK, HTTP_TOO_MANY_REQUESTS]
+    assert other.status_code == HTTP_OK
+    assert int(limited.headers["Retry-After"]) > 0
+
+
+@patch("backend.main.get_db")
+def test_deploy_ota_ignores_client_id_from_untrusted_callers(mock_get_db, test_db):
+    """Test a caller cannot dodge its budget by changing X-Client-Id."""
+    mock_get_db.side_effect = lambda: iter([test_db])
+    buckets = admission.ClientBuckets(per_minute=1, burst=2)
+
+    with patch("backend.main.deploy_buckets", buckets):
+        statuses = [
+            client.post(
+                "/ota/deploy?version=2.0.0", headers={"X-Client-Id": f"spoof-{i}"}
+            ).status_code
+            for i in range(3)
+        ]
+
+    assert statuses == [HTTP_OK, HTTP_OK, HTTP_TOO_MANY_REQUESTS]
+
+
+@patch("backend.main.get_db")
+def test_deploy_ota_rejects_full_wave_queue(mock_get_db, test_db):
+    """Test deploys are refused once a wave has too many pending jobs."""
+    mock_get_db.side_effect = lambda: iter([test_db])
+
+    with (
+        patch("backend.main.deploy_buckets", admission.ClientBuckets(burst=10)),
+        patch("backend.admission.MAX_PENDING_PER_WAVE", 2),
+    ):
+        responses = [
+            client.post("/ota/deploy?version=2.0.0&wave=green") for _ in range(3)
+        ]
+        canary = client.post("/ota/deploy?version=2.0.0&wave=canary")
+
+    assert [r.status_code for r in responses] == [
+        HTTP_OK,
+        HTTP_OK,
+        HTTP_TOO_MANY_REQUESTS,
+    ]
+    assert responses[-1].headers["Retry-After"] == str(
+        admission.QUEUE_FULL_RETRY_AFTER
+    )
+    assert canary.status_code == HTTP_OK
+
+
+@patch("backend.main.get_db")
+def test_inventory_applies_pod_events(mock_get_db, test_db):
+    """Test watch events keep the per-version and per-status counts current."""
+    mock_get_db.side_effect = lambda: iter([test_db])
+
+    def pod(event_type, name, version, status="idle"):
+        return {
+            "type": event_type,
+            "namespace": "default",
+            "name": name,
+            "sw_version": version,
+            "status": status,
+        }
+
+    client.post(
+        "/ota/inventory/events?reset=true",
+        json=[pod("ADDED", f"app-{i}", "1.0.0") for i in range(3)],
+    )
+    client.post(
+        "/ota/inventory/events",
+        json=[
+            pod("MODIFIED", "app-0", "2.0.0", "updated"),
+            pod("DELETED", "app-2", "1.0.0"),
+            pod("ADDED", "app-3", None),
+        ],
+    )
+
+    assert client.get("/ota/inventory").json() == {
+        "total": 3,
+        "versions": {"1.0.0": 1, "2.0.0": 1, "unknown": 1},
+        "statuses": {"idle": 2, "updated": 1},
+    }
+
+
+@patch("backend.main.get_db")
+def test_inventory_pods_are_paged(mock_get_db, test_db):
+    """Test the pod list is paged with a keyset cursor and filterable."""
+    mock_get_db.side_effect = lambda: iter([test_db])
+    client.post(
+        "/ota/inventory/events?reset=true",
+        json=[
+            {
+                "type": "ADDED",
+                "namespace": "default",
+                "name": f"app-{i}",
+                "sw_version": "1.0.0" if i % 2 else "2.0.0",
+                "status": "idle",
+            }
+            for i in range(5)
+        ],
+    )
+
+    first = client.get("/ota/inventory/pods?limit=2").json()
+    second = client.get(f"/ota/inventory/pods?limit=2&after={first['next']}").json()
+    filtered = client.get("/ota/inventory/pods?version=1.0.0").json()
+
+    assert [p["name"] for p in first["pods"]] == ["app-0", "app-1"]
+    assert [p["name"] for p in second["pods"]] == ["app-2", "app-3"]
+    assert [p["name"] for p in filtered["pods"]] == ["app-1", "app-3"]
+    assert filtered["next"] is None
+    assert client.get("/ota/inventory/pods?limit=0").status_code == 422
+
+
+def test_list_inventory_pods_empty_page_has_no_cursor(test_db):
+    """Test a page size of 0 returns an empty last page instead of failing."""
+    assert list_inventory_pods(test_db, limit=0) == {"pods": [], "next": None}
+
+
+@patch("backend.main.get_db")
+def test_checkpoint_tracks_remaining_targets(mock_get_db, test_db):
+    """Test recorded targets are checkpointed and reported as remaining."""
+    mock_get_db.side_effect = lambda: iter([test_db])
+    job_id = client.post("/ota/deploy?version=2.0.0&wave=green").json()["job_id"]
+    pods = [{"namespace": "default", "name": f"app-{i}"} for i in range(3)]
+
+    assert client.get(f"/ota/jobs/{job_id}/checkpoint").json() == {"checkpoint": None}
+    client.put(f"/ota/jobs/{job_id}/targets", json=pods)
+    # A second target set for the same job is ignored
+    client.put(f"/ota/jobs/{job_id}/targets", json=pods[:1])
+    client.post(f"/ota/jobs/{job_id}/checkpoint?step=1", json=pods[:2])
+
+    assert client.get(f"/ota/jobs/{job_id}/checkpoint").json() == {
+        "checkpoint": {
+            "step": 1,
+            "total": 3,
+            "completed": 2,
+            "remaining": [pods[2]],
+        }
+    }
+
+
+@patch("backend.main.get_db")
+def test_patch_stats_from_checkpointed_outcomes(mock_get_db, test_db):
+    """Test timed patch outcomes feed the planner statistics."""
+    mock_get_db.side_effect = lambda: iter([test_db])
+    assert client.get("/ota/stats/patches").json() == {"stats": None}
+    job_id = client.post("/ota/deploy?version=2.0.0&wave=green").json()["job_id"]
+    pods = [{"namespace": "default", "name": f"app-{i}"} for i in range(4)]
+    client.put(f"/ota/jobs/{job_id}/targets", json=pods)
+    outcomes = [
+        {**pods[0], "latency": 0.1, "attempts": 1},
+        {**pods[1], "latency": 0.2, "attempts": 1},
+        {**pods[2], "latency": 0.3, "attempts": 2},
+        {**pods[3], "latency": 7.4, "attempts": 3, "patched": False},
+    ]
+
+    response = client.post(f"/ota/jobs/{job_id}/checkpoint?step=1", json=outcomes)
+
+    assert response.json() == {"done": 3}
+    checkpoint = client.get(f"/ota/jobs/{job_id}/checkpoint").json()["checkpoint"]
+    assert checkpoint["remaining"] == [pods[3]]
+    stats = client.get("/ota/stats/patches").json()["stats"]
+    assert stats["samples"] == 4
+    assert stats["latency_p50"] == 0.3
+    assert stats["latency_p90"] == 7.4
+    assert stats["attempts_mean"] == 1.75
+    assert stats["failure_rate"] == 0.25
+
+
+@patch("backend.main.get_db")
+def test_inventory_targets_mirror_runner_selectors(mock_get_db, test_db):
+    """Test the planner's target counts follow the runner's label selectors."""
+    mock_get_db.side_effect = lambda: iter([test_db])
+    fleet = [
+        ("1.0.0", "idle"),
+        ("1.0.0", "idle"),
+        ("1.0.0", "updating"),
+        ("2.0.0", "updated"),
+        ("2.0.0", "idle"),
+    ]
+    client.post(
+        "/ota/inventory/events?reset=true",
+        json=[
+            {
+                "type": "ADDED",
+                "namespace": "default",
+                "name": f"app-{i}",
+                "sw_version": version,
+                "status": status,
+            }
+            for i, (version, status) in enumerate(fleet)
+        ],
+    )
+
+    response = client.get("/ota/inventory/targets?version=2.0.0")
+
+    assert response.json() == {"candidates": 2, "current": 2}
+
+
+@patch("backend.main.get_db")
+def test_claim_job_resumes_interrupted_job(mock_get_db, test_db):
+    """Test an in-progress job is handed back to its restarted runner first."""
+    mock_get_db.side_effect = lambda: iter([test_db])
+    client.post("/ota/deploy?version=2.0.0&wave=green")
+    first = client.post("/ota/jobs/claim?runner_id=runner-a").json()
+    client.post("/ota/deploy?version=2.0.1&wave=canary")
+
+    other = client.post("/ota/jobs/claim?runner_id=runner-b").json()
+    resumed = client.post("/ota/jobs/claim?runner_id=runner-a").json()
+
+    assert other["job"]["version"] == "2.0.1"
+    assert resumed["job"]["id"] == first["job"]["id"]
+    assert resumed["job"]["status"] == "in_progress"
+
+
+@patch("backend.main.get_db")
+def test_claim_job_takes_over_expired_lease(mock_get_db, test_db):
+    """Test another runner picks up a job whose lease has expired."""
+    mock_get_db.side_effect = lambda: iter([test_db])
+    test_db.add(
+        models.OTAJob(
+            version="2.0.0",
+            wave="green",
+            status="in_progress",
+            claimed_by="runner-a",
+            heartbeat_at=datetime.utcnow() - timedelta(hours=1),
+        )
+    )
+    test_db.commit()
+
+    claimed = client.post("/ota/jobs/claim?runner_id=runner-b").json()
+
+    assert claimed["job"]["version"] == "2.0.0"
+
+
+@patch("backend.main.get_db")
+def test_heartbeat_keeps_rollback_lease(mock_get_db, test_db):
+    """Test heartbeats keep a non-checkpointing job from being taken over."""
+    mock_get_db.side_effect = lambda: iter([test_db])
+    test_db.add(
+        models.OTAJob(
+            version="1.0.0",
+            wave="green",
+            status="rollback_in_progress",
+            claimed_by="runner-a",
+            heartbeat_at=datetime.utcnow() - timedelta(hours=1),
+        )
+    )
+    test_db.commit()
+
+    renewed = client.post("/ota/jobs/1/heartbeat?runner_id=runner-a").json()
+    stranger = client.post("/ota/jobs/1/heartbeat?runner_id=runner-b").json()
+    claimed = client.post("/ota/jobs/claim?runner_id=runner-b").json()
+
+    assert renewed == {"renewed": True}
+    assert stranger == {"renewed": False}
+    assert claimed["job"] is None
+
+
+@patch("backend.main.get_db")
+def test_deploy_to_clusters_is_coalesced_per_cluster_set(mock_get_db, test_db):
+    """Test a newer deploy only supersedes one targeting the same clusters."""
+    mock_get_db.side_effect = lambda: iter([test_db])
+    client.post("/ota/deploy?version=2.0.1&clusters=east, west,east")
+    client.post("/ota/deploy?version=2.0.2&clusters=east")
+    client.post("/ota/deploy?version=2.0.3&clusters=east,west")
+
+    claimed = client.post("/ota/jobs/claim").json()
+
+    assert claimed["superseded"] == 1
+    assert claimed["job"]["version"] == "2.0.2"
+    assert claimed["job"]["clusters"] == ["east"]
+    jobs = {job["version"]: job for job in client.get("/ota/jobs").json()}
+    assert jobs["2.0.1"]["status"] == "superseded"
+    assert jobs["2.0.3"]["clusters"] == ["east", "west"]
+
+
+@patch("backend.main.get_db")
+def test_cluster_status_tracks_each_cluster(mock_get_db, test_db):
+    """Test checkpoints and status reports are kept separately per cluster."""
+    mock_get_db.side_effect = lambda: iter([test_db])
+    deployed = client.post("/ota/deploy?version=2.0.0&clusters=east,west").json()
+    job_id = deployed["job_id"]
+    pods = [{"namespace": "default", "name": f"app-{i}"} for i in range(2)]
+    for cluster in ("east", "west"):
+        client.put(f"/ota/jobs/{job_id}/targets?cluster={cluster}", json=pods)
+    client.post(f"/ota/jobs/{job_id}/checkpoint?step=1&cluster=east", json=pods)
+    client.post(
+        f"/ota/jobs/{job_id}/clusters?cluster=east",
+        json={"status": "complete", "updated": 2},
+    )
+    client.post(
+        f"/ota/jobs/{job_id}/clusters?cluster=west",
+        json={"status": "in_progress"},
+    )
+
+    west = client.get(f"/ota/jobs/{job_id}/checkpoint?cluster=west").json()
+    clusters = client.get(f"/ota/jobs/{job_id}/clusters").json()["clusters"]
+
+    assert west["checkpoint"]["remaining"] == pods
+    assert [
+        (c["cluster"], c["status"], c["completed"], c["total"]) for c in clusters
+    ] == [
+        ("east", "complete", 2, 2),
+        ("west", "in_progress", 0, 2),
+    ]
+
+
+@patch("backend.jobs.CHANGES_SETTLE_SECONDS", 0)
+@patch("backend.main.get_db")
+def test_job_changes_returns_only_updated_jobs(mock_get_db, test_db):
+    """Test the change feed returns jobs changed after the cursor only."""
+    mock_get_db.side_effect = lambda: iter([test_db])
+    first = client.post("/ota/deploy?version=2.0.0&wave=canary").json()["job_id"]
+    client.post("/ota/deploy?version=2.0.1&wave=blue")
+
+    initial = client.get("/ota/jobs/changes").json()
+    unchanged = client.get("/ota/jobs/changes", params={"since": initial["cursor"]})
+    client.post(f"/ota/update_status?job_id={first}&status=complete")
+    changed = client.get("/ota/jobs/changes", params={"since": initial["cursor"]})
+
+    assert [job["version"] for job in initial["jobs"]] == ["2.0.0", "2.0.1"]
+    assert unchanged.json() == {"jobs": [], "cursor": initial["cursor"]}
+    assert [(job["id"], job["status"]) for job in changed.json()["jobs"]] == [
+        (first, "complete"),
+    ]
+
+
+@patch("backend.jobs.CHANGES_SETTLE_SECONDS", 0)
+@patch("backend.main.get_db")
+def test_job_changes_pages_through_bulk_updates(mock_get_db, test_db):
+    """Test jobs sharing one updated_at are paged through without gaps."""
+    mock_get_db.side_effect = lambda: iter([test_db])
+    for version in ("2.0.1", "2.0.2", "2.0.3"):
+        test_db.add(models.OTAJob(version=version, wave="green", status="pending"))
+    test_db.commit()
+    client.post("/ota/jobs/claim")  # Supersedes two jobs in one UPDATE
+
+    seen, cursor = [], None
+    for _ in range(3):
+        params = {"limit": 1, **({"since": cursor} if cursor else {})}
+        page = client.get("/ota/jobs/changes", params=params).json()
+        seen += [(job["version"], job["status"]) for job in page["jobs"]]
+        cursor = page["cursor"]
+
+    assert sorted(seen) == [
+        ("2.0.1", "superseded"),
+        ("2.0.2", "superseded"),
+        ("2.0.3", "in_progress"),
+    ]
+    assert client.get("/ota/jobs/changes?since=bogus").status_code == HTTP_BAD_REQUEST
+
+
+@patch("backend.main.get_db")
+def test_job_changes_rereads_late_commits(mock_get_db, test_db):
+    """Test a change committed after a later-stamped one is not skipped."""
+    mock_get_db.side_effect = lambda: iter([test_db])
+    now = datetime.utcnow()
+    test_db.add(models.OTAJob(version="2.0.1", status="pending", updated_at=now))
+    test_db.commit()
+    first = client.get("/ota/jobs/changes").json()
+    # Stamped before the job already returned, but committed after the poll
+    test_db.add(
+        models.OTAJob(
+            version="2.0.0",
+            status="pending",
+            updated_at=now - timedelta(seconds=1),
+        )
+    )
+    test_db.commit()
+
+    second = client.get("/ota/jobs/changes", params={"since": first["cursor"]})
+
+    assert [job["version"] for job in first["jobs"]] == ["2.0.1"]
+    # The settle window is re-read; the caller merges the jobs by id
+    assert [job["version"] for job in second.json()["jobs"]] == ["2.0.0", "2.0.1"]
+
+
+@patch("backend.main.get_db")
+def test_export_jobs_ndjson(mock_get_db, test_db):
+    """Test the job history is streamed as one JSON object per line."""
+    mock_get_db.side_effect = lambda: iter([test_db])
+    client.post("/ota/deploy?version=2.0.0&wave=canary")
+    client.post("/ota/deploy?version=2.0.1&wave=green&clusters=east")
+
+    response = client.get("/ota/jobs/export")
+
+    assert response.status_code == HTTP_OK
+    assert response.headers["content-type"] == "application/x-ndjson"
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert [(row["id"], row["version"], row["clusters"]) for row in rows] == [
+        (1, "2.0.0", None),
+        (2, "2.0.1", "east"),
+    ]
+
+
+@patch("backend.main.get_db")
+def test_export_jobs_csv_with_pods(mock_get_db, test_db):
+    """Test per-pod outcomes are exported as one CSV row per rollout target."""
+    mock_get_db.side_effect = lambda: iter([test_db])
+    job_id = client.post("/ota/deploy?version=2.0.0").json()["job_id"]
+    client.post("/ota/deploy?version=2.0.1")
+    pods = [{"namespace": "default", "name": f"app-{i}"} for i in range(2)]
+    client.put(f"/ota/jobs/{job_id}/targets", json=pods)
+    client.post(f"/ota/jobs/{job_id}/checkpoint?step=1", json=pods[:1])
+
+    response = client.get("/ota/jobs/export?format=csv&include_pods=true")
+
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert [(row["id"], row["pod"], row["patched"], row["step"]) for row in rows] == [
+        ("1", "app-0", "True", "1"),
+        ("1", "app-1", "False", ""),
+        ("2", "", "", ""),
+    ]
+
+
+def test_export_jobs_rejects_unknown_format():
+    """Test an unsupported export format is rejected before streaming."""
+    response = client.get("/ota/jobs/export?format=xml")
+    assert response.status_code == HTTP_BAD_REQUEST
+
+
+@patch("backend.main.get_db")
+def test_metrics_snapshot_and_series(mock_get_db, test_db):
+    """Test runner snapshots come back as series with the queue depth added."""
+    mock_get_db.side_effect = lambda: iter([test_db])
+    client.post("/ota/deploy?version=2.0.0")
+
+    response = client.post(
+        "/ota/metrics/snapshot",
+        json={"rollout_rate": 1.5, "patch_latency": 0.25, "patch_failures": 0},
+    )
+    assert response.json() == {"recorded": 4}
+
+    data = client.get(
+        "/ota/metrics/series?name=queue_depth&name=rollout_rate&window=600"
+    ).json()
+    assert data["resolution"] == 0
+    assert set(data["series"]) == {"queue_depth", "rollout_rate"}
+    assert data["series"]["queue_depth"][0]["value"] == 1
+    assert data["series"]["rollout_rate"][0]["value"] == 1.5
+
+
+def test_metrics_series_rejects_unknown_metric():
+    """Test an unknown metric name is a bad request."""
+    response = client.get("/ota/metrics/series?name=cpu")
+    assert response.status_code == HTTP_BAD_REQUEST
+
+
 def test_metrics():
     """Test metrics endpoint."""
     response = client.get("/metrics")
@@ -0,0 +1,143 @@
+from unittest.mock import patch
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import StaticPool
+
+from backend import admission
+from backend.async_main import app
+
+# HTTP status constants
+HTTP_OK = 200
+
+
+@pytest.fixture
+def async_client():
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:", poolclass=StaticPool)
+    session_local = async_sessionmaker(bind=engine, expire_on_commit=False)
+    with (
+        patch("backend.async_database.engine", engine),
+        patch("backend.async_database.AsyncSessionLocal", session_local),
+        patch("backend.async_main.deploy_buckets", admission.ClientBuckets()),
+    ):
+        # Entering the client runs the lifespan, which creates the tables
+        with TestClient(app) as client:
+            yield client
+
+
+def test_async_root(async_client):
+    """Test the root endpoint of the async app."""
+    response = async_client.get("/")
+    assert response.status_code == HTTP_OK
+    assert response.json() == {"msg": "Kubernetes Deployment Manager Running"}
+
+
+def test_async_deploy_and_list_jobs(async_client):
+    """Test jobs created through the async app are listed back."""
+    response = async_client.post("/ota/deploy?version=2.0.0&wave=canary")
+    assert response.status_code == HTTP_OK
+    assert response.json()["status"] == "pending"
+
+    jobs = async_client.get("/ota/jobs").json()
+    assert len(jobs) == 1
+    assert jobs[0]["version"] == "2.0.0"
+    assert jobs[0]["wave"] == "canary"
+
+
+def test_async_deploy_rejects_unknown_mode(async_client):
+    """Test the async app validates the rollout mode too."""
+    response = async_client.post("/ota/deploy?version=2.0.0&mode=pod")
+    assert response.status_code == 422
+
+
+def test_async_deploy_rejects_priority_above_deploy_band(async_client):
+    """Test the async app keeps deploy priorities below rollbacks too."""
+    response = async_client.post("/ota/deploy?version=2.0.0&priority=500")
+    assert response.status_code == 422
+
+
+def test_async_claim_and_update_status(async_client):
+    """Test the async claim path coalesces, prioritises and updates jobs."""
+    async_client.post("/ota/deploy?version=2.0.1&wave=green")
+    async_client.post("/ota/deploy?version=2.0.2&wave=green")
+    async_client.post("/ota/rollback?version=1.0.0&wave=canary")
+
+    rollback = async_client.post("/ota/jobs/claim").json()
+    async_client.post(
+        f"/ota/update_status?job_id={rollback['job']['id']}&status=rollback_complete"
+    )
+    deploy = async_client.post("/ota/jobs/claim").json()
+
+    assert rollback["job"]["status"] == "rollback_in_progress"
+    assert rollback["superseded"] == 1
+    assert deploy["job"]["version"] == "2.0.2"
+
+    response = async_client.post(
+        f"/ota/update_status?job_id={deploy['job']['id']}&status=complete"
+    )
+    assert response.json()["new_status"] == "complete"
+    assert async_client.get("/ota/jobs/next").json() == {"job": None}
+
+
+def test_async_rollback_to_clusters(async_client):
+    """Test the async app records the clusters a rollback runs in."""
+    response = async_client.post("/ota/rollback?version=1.0.0&clusters=west,east")
+    assert response.json()["status"] == "rollback_pending"
+
+    (job,) = async_client.get("/ota/jobs").json()
+    assert job["clusters"] == ["west", "east"]
+
+
+def test_async_export_jobs_csv(async_client):
+    """Test the async app streams the job history as CSV."""
+    async_client.post("/ota/deploy?version=2.0.0&wave=canary")
+    async_client.post("/ota/deploy?version=2.0.1&wave=green")
+
+    response = async_client.get("/ota/jobs/export?format=csv")
+
+    assert response.status_code == HTTP_OK
+    lines = response.text.splitlines()
+    assert lines[0] == "id,version,wave,mode,status,priority,clusters,created_at"
+    assert [line.split(",")[1] for line in lines[1:]] == ["2.0.0", "2.0.1"]
+
+
+def test_async_metrics_snapshot_and_series(async_client):
+    """Test the async app records snapshots and serves them as series."""
+    async_client.post("/ota/metrics/snapshot", json={"patch_latency": 0.3})
+
+    data = async_client.get("/ota/metrics/series?name=patch_latency").json()
+
+    assert data["series"]["patch_latency"][0]["value"] == 0.3
+
+
+def test_async_inventory_applies_pod_events(async_client):
+    """Test the async app accepts the runner's pod watch events."""
+
+    def pod(event_type, name, version):
+        return {
+            "type": event_type,
+            "namespace": "default",
+            "name": name,
+            "sw_version": version,
+            "status": "idle",
+        }
+
+    response = async_client.post(
+        "/ota/inventory/events?reset=true",
+        json=[pod("ADDED", "app-0", "1.0.0"), pod("ADDED", "app-1", "1.0.0")],
+    )
+    async_client.post("/ota/inventory/events", json=[pod("MODIFIED", "app-1", "2.0.0")])
+
+    assert response.json() == {"applied": 2}
+    assert async_client.get("/ota/inventory").json() == {
+        "total": 2,
+        "versions": {"1.0.0": 1, "2.0.0": 1},
+        "statuses": {"idle": 2},
+    }
+
+
+def test_async_inventory_pods_rejects_empty_page(async_client):
+    """Test the async app validates the inventory page size too."""
+    response = async_client.get("/ota/inventory/pods?limit=0")
+    assert response.status_code == 422
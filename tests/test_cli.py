@@ -3,7 +3,7 @@ from unittest.mock import MagicMock, patch
 import pytest
 
 import cli.client
-from cli.client import deploy, list_jobs, rollback, update
+from cli.client import deploy, export, inventory, list_jobs, rollback, update
 
 
 @pytest.fixture
@@ -24,7 +24,7 @@ def test_deploy(mock_post, mock_response):
 
     mock_post.assert_called_once_with(
         f"{cli.client.API_URL}/ota/deploy",
-        params={"version": "2.0.0", "wave": "canary"},
+        params={"version": "2.0.0", "wave": "canary", "mode": "pods"},
         timeout=30,
     )
     mock_echo.assert_called_once()
@@ -58,14 +58,88 @@ def test_update(mock_update_application_pods):
     mock_echo.assert_called_once()
 
 
-@patch("cli.client.rollback_application_pods")
-def test_rollback(mock_rollback_application_pods):
-    """Test the rollback command calls rollback_application_pods with correct args."""
+@patch("cli.client.update_application_deployments")
+@patch("cli.client.update_application_pods")
+def test_update_deployment_mode(
+    mock_update_application_pods,
+    mock_update_application_deployments,
+):
+    """Test the update command targets Deployments in deployment mode."""
+    with patch("cli.client.typer.echo"):
+        update("2.0.0", "green", mode="deployment")
+
+    mock_update_application_deployments.assert_called_once_with(
+        version="2.0.0",
+        wave="green",
+    )
+    mock_update_application_pods.assert_not_called()
+
+
+@patch("cli.client.requests.post")
+def test_deploy_rejects_unknown_mode(mock_post):
+    """Test the CLI refuses a mode the API would reject."""
+    with pytest.raises(ValueError, match="'pod' is not a valid RolloutMode"):
+        deploy("2.0.0", mode="pod")
+
+    mock_post.assert_not_called()
+
+
+@patch("cli.client.rollback_application")
+def test_rollback(mock_rollback_application):
+    """Test the rollback command calls rollback_application with correct args."""
     with patch("cli.client.typer.echo") as mock_echo:
         rollback("1.0.0", "green")
 
-    mock_rollback_application_pods.assert_called_once_with(
+    mock_rollback_application.assert_called_once_with(
         previous_version="1.0.0",
         wave="green",
     )
     mock_echo.assert_called_once()
+
+
+@patch("cli.client.update_clusters")
+def test_rollback_clusters(mock_update_clusters):
+    """Test --clusters rolls back every listed context in parallel."""
+    with patch("cli.client.typer.echo"):
+        rollback("1.0.0", "green", clusters="east, west")
+
+    mock_update_clusters.assert_called_once_with(
+        "1.0.0", "green", ["east", "west"], rollback=True
+    )
+
+
+@patch("cli.client.requests.get")
+def test_inventory(mock_get, mock_response):
+    """Test the inventory command prints per-version and per-status counts."""
+    mock_response.json.return_value = {
+        "total": 3,
+        "versions": {"1.0.0": 2, "2.0.0": 1},
+        "statuses": {"idle": 2, "updated": 1},
+    }
+    mock_get.return_value = mock_response
+
+    with patch("cli.client.typer.echo") as mock_echo:
+        inventory()
+
+    mock_get.assert_called_once_with(f"{cli.client.API_URL}/ota/inventory", timeout=30)
+    expected_lines = 5
+    assert mock_echo.call_count == expected_lines
+
+
+@patch("cli.client.requests.get")
+def test_export_streams_to_file(mock_get, mock_response, tmp_path):
+    """Test the export command writes the streamed chunks straight to a file."""
+    mock_response.iter_content.return_value = [b'{"id": 1}\n', b'{"id": 2}\n']
+    mock_get.return_value.__enter__.return_value = mock_response
+    output = tmp_path / "jobs.ndjson"
+
+    with patch("cli.client.typer.echo"):
+        export(output, fmt="ndjson", include_pods=True)
+
+    assert output.read_bytes() == b'{"id": 1}\n{"id": 2}\n'
+    mock_get.assert_called_once_with(
+        f"{cli.client.API_URL}/ota/jobs/export",
+        params={"format": "ndjson", "include_pods": True},
+        stream=True,
+        timeout=30,
+    )
@@ -1,14 +1,35 @@
-from unittest.mock import MagicMock, patch
+import json
+import time
+from unittest.mock import ANY, MagicMock, patch
 
 import pytest
+import requests
 from kubernetes.client.exceptions import ApiException
 
 from cli.job_runner import (
+    INVENTORY_BATCH_SIZE,
+    INVENTORY_FLUSH_SECONDS,
+    ROLLOUT_BATCH_SIZE,
+    RUNNER_ID,
+    claim_next_job,
+    count_patch_outcome,
+    job_heartbeat,
+    metrics_snapshot,
+    post_inventory_events,
+    post_metrics_snapshot,
+    resync_pod_inventory,
     retry_patch,
+    rollback_application,
     rollback_application_pods,
+    rollback_waiting,
+    run_job,
+    update_application_deployments,
     update_application_pods,
+    wait_for_deployment_rollout,
+    watch_pod_inventory,
     write_metrics,
 )
+from cli.pod_records import PodRecord
 
 
 @pytest.fixture
@@ -24,6 +45,27 @@ def mock_pod():
     return mock
 
 
+@pytest.fixture
+def pod_item():
+    return {
+        "metadata": {
+            "name": "app-1",
+            "namespace": "default",
+            "labels": {"sw_version": "1.0.0", "status": "idle"},
+        }
+    }
+
+
+def pod_list(*items, resource_version="1"):
+    """Raw (_preload_content=False) response of a single-page pod LIST."""
+    page = {"metadata": {"resourceVersion": resource_version}, "items": list(items)}
+    return MagicMock(data=json.dumps(page).encode())
+
+
+def label_selectors(mock_list):
+    return [c.kwargs["label_selector"] for c in mock_list.call_args_list]
+
+
 @patch("cli.job_runner.client.CoreV1Api")
 @patch("cli.job_runner.config.load_kube_config")
 def test_update_application_pods_no_pods(
@@ -33,14 +75,14 @@ def test_update_application_pods_no_pods(
 ):
     """Test update_application_pods when no pods are found."""
     mock_core_api.return_value = mock_k8s_client
-    mock_k8s_client.list_pod_for_all_namespaces.return_value.items = []
+    mock_k8s_client.list_pod_for_all_namespaces.return_value = pod_list()
 
     with patch("cli.job_runner.Path.write_text") as mock_write:
         update_application_pods("2.0.0", "canary")
     mock_load_config.assert_called_once()
     mock_core_api.assert_called_once()
-    mock_k8s_client.list_pod_for_all_namespaces.assert_called_once_with(
-        label_selector="status=idle"
+    assert "status=idle,sw_version!=2.0.0" in label_selectors(
+        mock_k8s_client.list_pod_for_all_namespaces
     )
     # Verify metrics were written even with no pods
     assert mock_write.call_count > 0
@@ -54,25 +96,65 @@ def test_update_application_pods_with_pods(
     mock_load_config,
     mock_core_api,
     mock_k8s_client,
-    mock_pod,
+    pod_item,
 ):
     """Test update_application_pods with pods to update."""
     mock_core_api.return_value = mock_k8s_client
-    mock_k8s_client.list_pod_for_all_namespaces.return_value.items = [mock_pod]
+    mock_k8s_client.list_pod_for_all_namespaces.side_effect = [
+        pod_list(pod_item),
+        pod_list(),
+    ]
     mock_retry_patch.return_value = True
 
     with patch("cli.job_runner.Path.write_text") as mock_write:
         update_application_pods("2.0.0", "canary")
     mock_load_config.assert_called_once()
     mock_core_api.assert_called_once()
-    mock_k8s_client.list_pod_for_all_namespaces.assert_called_once_with(
-        label_selector="status=idle"
+    assert "status=idle,sw_version!=2.0.0" in label_selectors(
+        mock_k8s_client.list_pod_for_all_namespaces
     )
     mock_retry_patch.assert_called_once()
     # Verify metrics were written
     assert mock_write.call_count > 0
 
 
+@patch("cli.job_runner.client.CoreV1Api")
+@patch("cli.job_runner.config.load_kube_config")
+@patch("cli.job_runner.retry_patch")
+def test_update_application_pods_skips_pods_at_target_version(
+    mock_retry_patch,
+    mock_load_config,
+    mock_core_api,
+    mock_k8s_client,
+    pod_item,
+):
+    """Test a re-run only patches pods that are not yet at the target version."""
+    done_pod = {"metadata": {"name": "app-0", "namespace": "default"}}
+    mock_core_api.return_value = mock_k8s_client
+    mock_k8s_client.list_pod_for_all_namespaces.side_effect = [
+        pod_list(pod_item, pod_item),
+        pod_list(done_pod),
+    ]
+    mock_retry_patch.return_value = True
+
+    with patch("cli.job_runner.write_rollout_metrics") as mock_metrics:
+        result = update_application_pods("2.0.0", "blue")
+
+    assert "status in (idle,updated),sw_version=2.0.0" in label_selectors(
+        mock_k8s_client.list_pod_for_all_namespaces
+    )
+    # blue targets two pods, one of which is already at 2.0.0
+    mock_retry_patch.assert_called_once()
+    assert result == {
+        "updated": 1,
+        "skipped": 1,
+        "resumed": 0,
+        "failed": 0,
+        "yielded": False,
+    }
+    mock_metrics.assert_called_once_with(1, 1)
+
+
 @patch("cli.job_runner.client.CoreV1Api")
 @patch("cli.job_runner.config.load_kube_config")
 @patch("cli.job_runner.retry_patch")
@@ -81,11 +163,11 @@ def test_rollback_application_pods_with_pods(
     mock_load_config,
     mock_core_api,
     mock_k8s_client,
-    mock_pod,
+    pod_item,
 ):
     """Test rollback_application_pods with pods to rollback."""
     mock_core_api.return_value = mock_k8s_client
-    mock_k8s_client.list_pod_for_all_namespaces.return_value.items = [mock_pod]
+    mock_k8s_client.list_pod_for_all_namespaces.return_value = pod_list(pod_item)
     mock_retry_patch.return_value = True
 
     with (
@@ -97,13 +179,125 @@ def test_rollback_application_pods_with_pods(
     mock_load_config.assert_called_once()
     mock_core_api.assert_called_once()
     mock_k8s_client.list_pod_for_all_namespaces.assert_called_once_with(
-        label_selector="status=updated"
+        label_selector="status=updated",
+        limit=ANY,
+        _continue=None,
+        _preload_content=False,
     )
     mock_retry_patch.assert_called_once()
     # Verify metrics were written
     assert mock_write.call_count > 0
 
 
+@pytest.fixture
+def mock_deployment():
+    mock = MagicMock()
+    mock.metadata.name = "application"
+    mock.metadata.namespace = "default"
+    mock.metadata.generation = 2
+    mock.spec.replicas = 3
+    mock.status.observed_generation = 2
+    mock.status.updated_replicas = 3
+    mock.status.available_replicas = 3
+    return mock
+
+
+@patch("cli.job_runner.wait_for_deployment_rollout")
+@patch("cli.job_runner.client.AppsV1Api")
+@patch("cli.job_runner.config.load_kube_config")
+def test_update_application_deployments_patches_template(
+    mock_load_config,
+    mock_apps_api,
+    mock_wait,
+    mock_k8s_client,
+    mock_deployment,
+):
+    """Test deployment mode patches the pod template once per Deployment."""
+    mock_apps_api.return_value = mock_k8s_client
+    mock_k8s_client.list_deployment_for_all_namespaces.return_value.items = [
+        mock_deployment,
+        mock_deployment,
+    ]
+    mock_wait.return_value = 3
+
+    with patch("cli.job_runner.write_rollout_metrics") as mock_metrics:
+        update_application_deployments("2.0.0", "canary")
+
+    mock_k8s_client.list_deployment_for_all_namespaces.assert_called_once_with(
+        label_selector="ota_rollout=enabled"
+    )
+    mock_k8s_client.patch_namespaced_deployment.assert_called_once()
+    body = mock_k8s_client.patch_namespaced_deployment.call_args.kwargs["body"]
+    labels = body["spec"]["template"]["metadata"]["labels"]
+    assert labels == {"sw_version": "2.0.0", "status": "updated"}
+    mock_k8s_client.patch_namespaced_pod.assert_not_called()
+    assert mock_wait.call_args.args[1:] == ("application", "default")
+    mock_metrics.assert_called_once_with(3, 0)
+
+
+@patch("cli.job_runner.wait_for_deployment_rollout")
+@patch("cli.job_runner.client.CoreV1Api")
+@patch("cli.job_runner.client.AppsV1Api")
+@patch("cli.job_runner.config.load_kube_config")
+def test_rollback_application_reverts_deployment_templates(
+    mock_load_config,
+    mock_apps_api,
+    mock_core_api,
+    mock_wait,
+    mock_k8s_client,
+    mock_deployment,
+):
+    """Test a rollback reverts templates a deployment-mode rollout changed."""
+    mock_apps_api.return_value = mock_k8s_client
+    mock_core_api.return_value = mock_k8s_client
+    mock_deployment.spec.template.metadata.labels = {
+        "sw_version": "2.0.0",
+        "status": "updated",
+    }
+    current = MagicMock()
+    current.spec.template.metadata.labels = {"sw_version": "1.0.0", "status": "idle"}
+    # Never rolled out by OTA: another version, but its template is not updated
+    untouched = MagicMock()
+    untouched.spec.template.metadata.labels = {"sw_version": "0.9.0", "status": "idle"}
+    mock_k8s_client.list_deployment_for_all_namespaces.return_value.items = [
+        current,
+        untouched,
+        mock_deployment,
+    ]
+    mock_k8s_client.list_pod_for_all_namespaces.return_value = pod_list()
+    mock_wait.return_value = 3
+
+    with patch("cli.job_runner.write_rollback_metrics") as mock_metrics:
+        result = rollback_application("1.0.0", "green")
+
+    mock_k8s_client.patch_namespaced_deployment.assert_called_once()
+    call = mock_k8s_client.patch_namespaced_deployment.call_args.kwargs
+    assert call["name"] == "application"
+    labels = call["body"]["spec"]["template"]["metadata"]["labels"]
+    assert labels == {"sw_version": "1.0.0", "status": "idle"}
+    assert result["updated"] == 3
+    mock_metrics.assert_called_once_with(3)
+
+
+@patch("cli.job_runner.watch.Watch")
+def test_wait_for_deployment_rollout(mock_watch, mock_k8s_client, mock_deployment):
+    """Test the rollout watch returns once the Deployment has converged."""
+    in_progress = MagicMock()
+    in_progress.metadata.generation = 2
+    in_progress.spec.replicas = 3
+    in_progress.status.observed_generation = 2
+    in_progress.status.updated_replicas = 1
+    in_progress.status.available_replicas = 2
+    mock_watch.return_value.stream.return_value = iter(
+        [{"object": in_progress}, {"object": mock_deployment}]
+    )
+
+    replicas = wait_for_deployment_rollout(mock_k8s_client, "application", "default")
+
+    assert replicas == 3
+    mock_watch.return_value.stop.assert_called_once()
+
+
 @patch("cli.job_runner.Path.write_text")
 @patch("cli.job_runner.Path.read_text")
 def test_write_metrics(mock_read, mock_write):
@@ -136,6 +330,7 @@ def test_retry_patch_success(mock_sleep, mock_k8s_client, mock_pod):
 def test_retry_patch_failure(mock_sleep, mock_k8s_client, mock_pod):
     """Test retry_patch retries on failure."""
     mock_k8s_client.patch_namespaced_pod.side_effect = [ApiException("Error"), True]
+    stats = {}
 
     result = retry_patch(
         mock_k8s_client,
@@ -143,8 +338,319 @@ def test_retry_patch_failure(mock_sleep, mock_k8s_client, mock_pod):
         mock_pod.metadata.namespace,
         {"metadata": {"labels": {"sw_version": "2.0.0", "status": "updated"}}},
         retries=2,
+        stats=stats,
     )
     assert result is True
     expected_call_count = 2
     assert mock_k8s_client.patch_namespaced_pod.call_count == expected_call_count
+    assert stats == {"attempts": expected_call_count}
     mock_sleep.assert_called_once()
+
+
+@patch("cli.job_runner.requests.post")
+def test_post_metrics_snapshot_reports_interval_totals(mock_post):
+    """Test each snapshot covers only the patches since the previous one."""
+    metrics_snapshot(elapsed=1.0)  # drop outcomes counted by earlier tests
+    count_patch_outcome({"patched": True, "latency": 0.2})
+    count_patch_outcome({"patched": True, "latency": 0.4})
+    count_patch_outcome({"patched": False, "latency": 3.0})
+
+    post_metrics_snapshot(elapsed=10.0)
+    post_metrics_snapshot(elapsed=10.0)
+
+    first, second = (c.kwargs["json"] for c in mock_post.call_args_list)
+    assert first["rollout_rate"] == pytest.approx(0.2)
+    assert first["patch_latency"] == pytest.approx(1.2)
+    assert first["patch_failures"] == 1
+    assert second == {"rollout_rate": 0.0, "patch_latency": None, "patch_failures": 0}
+    assert mock_post.call_args.args[0].endswith("/ota/metrics/snapshot")
+
+
+@patch("cli.job_runner.requests.post")
+def test_job_heartbeat_renews_lease_while_job_runs(mock_post):
+    """Test the lease is renewed in the background until the job finishes."""
+    mock_post.return_value.json.return_value = {"renewed": True}
+
+    with job_heartbeat(7, interval=0.01):
+        while mock_post.call_count < 2:
+            time.sleep(0.01)
+    calls = mock_post.call_count
+    time.sleep(0.05)
+
+    assert mock_post.call_count == calls
+    assert mock_post.call_args.args[0].endswith("/ota/jobs/7/heartbeat")
+    assert mock_post.call_args.kwargs["params"] == {"runner_id": RUNNER_ID}
+
+
+@patch("cli.job_runner.requests.post")
+def test_claim_next_job(mock_post):
+    """Test the runner claims jobs through the backend queue."""
+    job = {"id": 3, "version": "2.0.3", "wave": "canary", "status": "in_progress"}
+    mock_post.return_value.json.return_value = {"job": job, "superseded": 2}
+
+    assert claim_next_job() == job
+    mock_post.assert_called_once_with(
+        "http://127.0.0.1:8000/ota/jobs/claim",
+        params={"runner_id": RUNNER_ID},
+        timeout=30,
+    )
+
+
+@patch("cli.job_runner.requests.post")
+@patch("cli.job_runner.update_application_pods")
+def test_run_job_completes_claimed_deploy(mock_update, mock_post):
+    """Test a claimed deploy is rolled out and then marked complete."""
+    mock_update.return_value = {"updated": 1, "yielded": False}
+
+    run_job({"id": 3, "version": "2.0.3", "wave": "canary", "status": "in_progress"})
+
+    mock_update.assert_called_once_with(
+        "2.0.3",
+        wave="canary",
+        should_yield=rollback_waiting,
+        checkpoint=ANY,
+    )
+    assert mock_update.call_args.kwargs["checkpoint"].job_id == 3
+    mock_post.assert_called_once()
+    assert mock_post.call_args.kwargs["params"] == {"job_id": 3, "status": "complete"}
+
+
+@patch("cli.job_runner.client.CoreV1Api")
+@patch("cli.job_runner.config.load_kube_config")
+@patch("cli.job_runner.retry_patch")
+def test_update_application_pods_checkpoints_batches(
+    mock_retry_patch,
+    mock_load_config,
+    mock_core_api,
+    mock_k8s_client,
+    pod_item,
+):
+    """Test a fresh rollout records its target set and checkpoints each batch."""
+    mock_core_api.return_value = mock_k8s_client
+    mock_k8s_client.list_pod_for_all_namespaces.side_effect = [
+        pod_list(*[pod_item] * 15),
+        pod_list(),
+    ]
+    mock_retry_patch.return_value = True
+    checkpoint = MagicMock()
+    checkpoint.load.return_value = None
+
+    with patch("cli.job_runner.write_rollout_metrics"):
+        update_application_pods("2.0.0", "green", checkpoint=checkpoint)
+
+    record = PodRecord.from_json(pod_item)
+    checkpoint.save_targets.assert_called_once_with([record] * 15)
+    assert [c.args for c in checkpoint.mark_done.call_args_list] == [
+        ([record] * 10, 1),
+        ([record] * 5, 2),
+    ]
+
+
+@patch("cli.job_runner.client.CoreV1Api")
+@patch("cli.job_runner.config.load_kube_config")
+@patch("cli.job_runner.retry_patch")
+def test_update_application_pods_resumes_from_checkpoint(
+    mock_retry_patch,
+    mock_load_config,
+    mock_core_api,
+    mock_k8s_client,
+):
+    """Test a resumed rollout only patches the pods left in its checkpoint."""
+    mock_core_api.return_value = mock_k8s_client
+    mock_retry_patch.return_value = True
+    remaining = [{"namespace": "default", "name": "app-9"}]
+    checkpoint = MagicMock()
+    checkpoint.load.return_value = {
+        "step": 1,
+        "total": 9,
+        "completed": 8,
+        "remaining": remaining,
+    }
+
+    with patch("cli.job_runner.write_rollout_metrics"):
+        result = update_application_pods("2.0.0", "green", checkpoint=checkpoint)
+
+    mock_k8s_client.list_pod_for_all_namespaces.assert_not_called()
+    mock_retry_patch.assert_called_once()
+    assert mock_retry_patch.call_args.args[1:3] == ("app-9", "default")
+    checkpoint.save_targets.assert_not_called()
+    checkpoint.mark_done.assert_called_once()
+    assert checkpoint.mark_done.call_args.args == ([PodRecord("default", "app-9")], 2)
+    (outcome,) = checkpoint.mark_done.call_args.kwargs["outcomes"]
+    assert outcome["name"] == "app-9" and outcome["patched"] is True
+    assert outcome["attempts"] == 1 and outcome["latency"] >= 0
+    assert result["updated"] == 1
+    # Pods patched before the interruption are not reported as up to date
+    assert result["resumed"] == 8
+    assert result["skipped"] == 0
+
+
+@patch("cli.job_runner.requests.post")
+@patch("cli.job_runner.update_application_pods")
+def test_run_job_requeues_yielded_deploy(mock_update, mock_post):
+    """Test a deploy that yielded to a rollback goes back to pending."""
+    mock_update.return_value = {"updated": 10, "yielded": True}
+
+    run_job({"id": 3, "version": "2.0.3", "wave": "green", "status": "in_progress"})
+
+    assert mock_post.call_args.kwargs["params"] == {"job_id": 3, "status": "pending"}
+
+
+@patch("cli.job_runner.requests.post")
+@patch("cli.job_runner.client.CoreV1Api")
+@patch("cli.job_runner.config.load_kube_config")
+def test_run_job_fails_deploy_when_pods_cannot_be_listed(
+    mock_load_config, mock_core_api, mock_post, mock_k8s_client
+):
+    """Test a LIST failure marks the deploy failed instead of complete."""
+    mock_core_api.return_value = mock_k8s_client
+    mock_k8s_client.list_pod_for_all_namespaces.side_effect = ApiException(500)
+
+    with patch("cli.job_runner.RolloutCheckpoint") as mock_checkpoint:
+        mock_checkpoint.return_value.load.return_value = None
+        run_job(
+            {"id": 3, "version": "2.0.3", "wave": "canary", "status": "in_progress"}
+        )
+
+    assert mock_post.call_args.kwargs["params"] == {"job_id": 3, "status": "failed"}
+
+
+@patch("cli.job_runner.requests.post")
+@patch("cli.job_runner.update_application_deployments", return_value=None)
+def test_run_job_fails_deploy_when_deployments_cannot_be_listed(
+    mock_update, mock_post
+):
+    """Test the Deployment path reports a LIST failure the same way."""
+    run_job(
+        {
+            "id": 4,
+            "version": "2.0.3",
+            "mode": "deployment",
+            "status": "in_progress",
+        }
+    )
+
+    assert mock_post.call_args.kwargs["params"] == {"job_id": 4, "status": "failed"}
+
+
+@patch("cli.job_runner.requests.post")
+@patch("cli.job_runner.rollback_application_deployments")
+@patch("cli.job_runner.client.CoreV1Api")
+@patch("cli.job_runner.config.load_kube_config")
+def test_run_job_fails_rollback_when_pods_cannot_be_listed(
+    mock_load_config,
+    mock_core_api,
+    mock_rollback_deployments,
+    mock_post,
+    mock_k8s_client,
+):
+    """Test a rollback whose LIST failed is marked failed, not rollback_complete."""
+    mock_rollback_deployments.return_value = {"updated": 0, "skipped": 0}
+    mock_core_api.return_value = mock_k8s_client
+    mock_k8s_client.list_pod_for_all_namespaces.side_effect = ApiException(500)
+
+    run_job({"id": 5, "version": "1.0.0", "status": "rollback_in_progress"})
+
+    assert mock_post.call_args.kwargs["params"] == {"job_id": 5, "status": "failed"}
+
+
+@patch("cli.job_runner.client.CoreV1Api")
+@patch("cli.job_runner.config.load_kube_config")
+@patch("cli.job_runner.retry_patch")
+def test_update_application_pods_yields_between_batches(
+    mock_retry_patch,
+    mock_load_config,
+    mock_core_api,
+    mock_k8s_client,
+    pod_item,
+):
+    """Test an in-flight rollout stops after a batch when asked to yield."""
+    mock_core_api.return_value = mock_k8s_client
+    mock_k8s_client.list_pod_for_all_namespaces.side_effect = [
+        pod_list(*[pod_item] * 25),
+        pod_list(),
+    ]
+    mock_retry_patch.return_value = True
+    should_yield = MagicMock(return_value=True)
+
+    with patch("cli.job_runner.write_rollout_metrics"):
+        result = update_application_pods("2.0.0", "green", should_yield=should_yield)
+
+    assert result["yielded"] is True
+    assert result["updated"] == ROLLOUT_BATCH_SIZE
+    should_yield.assert_called_once()
+
+
+@patch("cli.job_runner.post_inventory_events")
+def test_resync_pod_inventory_resets_backend(
+    mock_post_events,
+    mock_k8s_client,
+    pod_item,
+):
+    """Test a full LIST replaces the backend inventory with compact events."""
+    mock_k8s_client.list_pod_for_all_namespaces.return_value = pod_list(
+        pod_item,
+        resource_version="42",
+    )
+
+    assert resync_pod_inventory(mock_k8s_client) == "42"
+    mock_post_events.assert_called_once_with(
+        [
+            {
+                "type": "ADDED",
+                "namespace": "default",
+                "name": "app-1",
+                "sw_version": "1.0.0",
+                "status": "idle",
+            }
+        ],
+        reset=True,
+    )
+
+
+@patch("cli.job_runner.time.sleep")
+@patch("cli.job_runner.requests.post")
+def test_post_inventory_events_retries_failed_posts(mock_post, mock_sleep):
+    """Test a transient backend error does not drop the event batch."""
+    mock_post.side_effect = [requests.ConnectionError("refused"), MagicMock()]
+
+    assert post_inventory_events([{"type": "DELETED"}]) is True
+    assert mock_post.call_count == 2
+
+    mock_post.side_effect = requests.ConnectionError("refused")
+    assert post_inventory_events([{"type": "DELETED"}], retries=2) is False
+
+
+@patch("cli.job_runner.post_inventory_events", return_value=False)
+@patch("cli.job_runner.watch.Watch")
+def test_watch_pod_inventory_resyncs_after_lost_events(
+    mock_watch, mock_post_events, mock_k8s_client, mock_pod
+):
+    """Test the watch stops once a batch is lost so the inventory is re-listed."""
+    mock_pod.metadata.labels = {"sw_version": "1.0.0", "status": "idle"}
+    mock_watch.return_value.stream.return_value = iter(
+        [{"type": "MODIFIED", "object": mock_pod}] * (INVENTORY_BATCH_SIZE + 1)
+    )
+
+    assert watch_pod_inventory(mock_k8s_client, "42") is None
+    mock_post_events.assert_called_once()
+    mock_watch.return_value.stop.assert_called_once()
+
+
+@patch("cli.job_runner.post_inventory_events", return_value=True)
+@patch("cli.job_runner.watch.Watch")
+def test_watch_pod_inventory_flushes_when_the_watch_ends(
+    mock_watch, mock_post_events, mock_k8s_client, mock_pod
+):
+    """Test a lone event is sent when the short watch ends, not minutes later."""
+    mock_pod.metadata.labels = {"sw_version": "2.0.0", "status": "updated"}
+    mock_pod.metadata.resource_version = "43"
+    mock_watch.return_value.stream.return_value = iter(
+        [{"type": "MODIFIED", "object": mock_pod}]
+    )
+
+    assert watch_pod_inventory(mock_k8s_client, "42") == "43"
+    stream_kwargs = mock_watch.return_value.stream.call_args.kwargs
+    assert stream_kwargs["timeout_seconds"] == INVENTORY_FLUSH_SECONDS
+    mock_post_events.assert_called_once()
+    assert mock_post_events.call_args.args[0][0]["sw_version"] == "2.0.0"
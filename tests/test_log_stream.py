@@ -0,0 +1,147 @@
+import threading
+import time
+from unittest.mock import MagicMock
+
+from kubernetes.client.exceptions import ApiException
+from urllib3.exceptions import ProtocolError
+
+from dashboard.log_stream import LogStream, PodLogStreams
+
+JOIN_TIMEOUT = 5
+
+
+class FakeLogResponse:
+    """Chunked follow response; optionally stays open until closed."""
+
+    def __init__(self, chunks, follow=False):
+        self.chunks = chunks
+        self.follow = follow
+        self.closed = threading.Event()
+        self.released = False
+
+    def stream(self, amt):
+        yield from self.chunks
+        if self.follow:
+            self.closed.wait(JOIN_TIMEOUT)
+            raise ProtocolError("Connection closed")
+
+    def close(self):
+        self.closed.set()
+
+    def release_conn(self):
+        self.released = True
+
+
+def _finish(stream):
+    stream._thread.join(JOIN_TIMEOUT)
+    assert stream.done
+
+
+def test_log_stream_keeps_bounded_line_buffer():
+    """Test chunks are split into lines and only the newest lines are kept."""
+    v1 = MagicMock()
+    response = FakeLogResponse([b"one\ntw", b"o\nthree\nfo", b"ur \xc3", b"\xa9\nfive"])
+    v1.read_namespaced_pod_log.return_value = response
+
+    stream = LogStream(v1, "default", "app-1", "app", max_lines=3).start()
+    _finish(stream)
+
+    assert list(stream.lines) == ["three", "four é", "five"]
+    assert stream.since(0) == (["three", "four é", "five"], 5)
+    assert stream.since(4) == (["five"], 5)
+    assert stream.since(5) == ([], 5)
+    assert response.released
+    assert v1.read_namespaced_pod_log.call_args.kwargs["follow"] is True
+    assert v1.read_namespaced_pod_log.call_args.kwargs["_preload_content"] is False
+
+
+def test_log_stream_stop_unblocks_follow():
+    """Test stopping a stream closes the follow connection without an error."""
+    v1 = MagicMock()
+    response = FakeLogResponse([b"started\n"], follow=True)
+    v1.read_namespaced_pod_log.return_value = response
+    stream = LogStream(v1, "default", "app-1").start()
+
+    while not stream.seq:
+        time.sleep(0.01)
+    stream.stop()
+    _finish(stream)
+
+    assert list(stream.lines) == ["started"]
+    assert stream.error is None
+
+
+def test_log_stream_reports_api_errors():
+    """Test a failed log request is surfaced on the stream."""
+    v1 = MagicMock()
+    v1.read_namespaced_pod_log.side_effect = ApiException(status=404)
+
+    stream = LogStream(v1, "default", "gone").start()
+    _finish(stream)
+
+    assert "404" in stream.error
+
+
+def test_pod_log_streams_follow_every_container():
+    """Test each container of each followed pod gets its own stream."""
+    v1 = MagicMock()
+    containers = [MagicMock(), MagicMock()]
+    containers[0].name, containers[1].name = "app", "sidecar"
+    v1.read_namespaced_pod.return_value.spec.containers = containers
+    v1.read_namespaced_pod_log.side_effect = lambda **kwargs: FakeLogResponse(
+        [f"{kwargs['name']}/{kwargs['container']}\n".encode()]
+    )
+    streams = PodLogStreams(v1)
+
+    streams.follow("default", "app-1")
+    streams.follow("default", "app-2", ["app"])
+    for stream in streams.streams.values():
+        _finish(stream)
+
+    assert {key: list(s.lines) for key, s in streams.streams.items()} == {
+        ("default", "app-1", "app"): ["app-1/app"],
+        ("default", "app-1", "sidecar"): ["app-1/sidecar"],
+        ("default", "app-2", "app"): ["app-2/app"],
+    }
+    streams.stop_all()
+    assert streams.streams == {}
+
+
+def test_pod_log_streams_stop_when_last_follower_leaves():
+    """Test a stream shared by two viewers stops only once both unfollow."""
+    v1 = MagicMock()
+    v1.read_namespaced_pod_log.side_effect = lambda **kwargs: FakeLogResponse(
+        [b"line\n"], follow=True
+    )
+    streams = PodLogStreams(v1, idle_seconds=None)
+
+    (stream,) = streams.follow("default", "app-1", ["app"], follower="a")
+    assert streams.follow("default", "app-1", ["app"], follower="b") == [stream]
+    assert v1.read_namespaced_pod_log.call_count == 1
+
+    assert streams.unfollow("default", "app-1", follower="a") == 0
+    assert streams.followed_by("a") == {}
+    assert streams.followed_by("b") == {("default", "app-1", "app"): stream}
+
+    assert streams.unfollow("default", "app-1", follower="b") == 1
+    _finish(stream)
+    assert streams.streams == {}
+
+
+def test_pod_log_streams_stop_idle_streams():
+    """Test streams nobody polls are stopped while polled ones keep running."""
+    v1 = MagicMock()
+    v1.read_namespaced_pod_log.side_effect = lambda **kwargs: FakeLogResponse(
+        [], follow=True
+    )
+    streams = PodLogStreams(v1, idle_seconds=60)
+    (polled,) = streams.follow("default", "app-1", ["app"], follower="a")
+    (idle,) = streams.follow("default", "app-2", ["app"], follower="a")
+
+    polled.since(0)
+    idle.last_read -= 120
+
+    assert streams.stop_idle() == 1
+    _finish(idle)
+    assert list(streams.streams.values()) == [polled]
+    streams.stop_all()
@@ -0,0 +1,280 @@
+import json
+import re
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+from kubernetes.client import ApiClient, Configuration
+
+from cli.job_runner import run_job, update_clusters
+
+POD_PATH = re.compile(r"^/api/v1/namespaces/([^/]+)/pods/([^/]+)$")
+
+
+def _selector_matches(selector, labels):
+    """Evaluate the label selectors the runner sends (=, !=, in)."""
+    for term in re.findall(r"[^,(]+(?:\([^)]*\))?", selector):
+        term = term.strip()
+        if " in " in term:
+            key, values = term.split(" in ")
+            if labels.get(key) not in values.strip("()").split(","):
+                return False
+        elif "!=" in term:
+            key, value = term.split("!=")
+            if labels.get(key) == value:
+                return False
+        elif "=" in term:
+            key, value = term.split("=")
+            if labels.get(key) != value:
+                return False
+        elif term not in labels:
+            return False
+    return True
+
+
+class FakeApiServer:
+    """Minimal Kubernetes API server serving pod LIST and PATCH from memory.
+
+    Deployment LISTs answer an empty list: the fleet is bare pods.
+    """
+
+    def __init__(self, pods):
+        self.pods = {(pod["namespace"], pod["name"]): pod for pod in pods}
+        self.patches = []
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def _send(self, status, body):
+                payload = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                if url.path == "/apis/apps/v1/deployments":
+                    self._send(
+                        200,
+                        {
+                            "kind": "DeploymentList",
+                            "apiVersion": "apps/v1",
+                            "metadata": {"resourceVersion": "1"},
+                            "items": [],
+                        },
+                    )
+                    return
+                if url.path != "/api/v1/pods":
+                    self._send(404, {"kind": "Status", "code": 404})
+                    return
+                selector = parse_qs(url.query).get("labelSelector", [""])[0]
+                items = [
+                    fake.pod_json(pod)
+                    for pod in fake.pods.values()
+                    if _selector_matches(selector, pod["labels"])
+                ]
+                self._send(
+                    200,
+                    {
+                        "kind": "PodList",
+                        "apiVersion": "v1",
+                        "metadata": {"resourceVersion": "1"},
+                        "items": items,
+                    },
+                )
+
+            def do_PATCH(self):
+                match = POD_PATH.match(urlparse(self.path).path)
+                pod = match and fake.pods.get(match.groups())
+                if not pod:
+                    self._send(404, {"kind": "Status", "code": 404})
+                    return
+                length = int(self.headers["Content-Length"])
+                body = json.loads(self.rfile.read(length))
+                pod["labels"].update(body["metadata"]["labels"])
+                fake.patches.append(pod["name"])
+                self._send(200, fake.pod_json(pod))
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_port}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    @staticmethod
+    def pod_json(pod):
+        return {
+            "kind": "Pod",
+            "apiVersion": "v1",
+            "metadata": {
+                "name": pod["name"],
+                "namespace": pod["namespace"],
+                "labels": dict(pod["labels"]),
+            },
+        }
+
+    def versions(self):
+        return sorted(pod["labels"]["sw_version"] for pod in self.pods.values())
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def _fleet(count, version="1.0.0"):
+    return [
+        {
+            "namespace": "default",
+            "name": f"app-{i}",
+            "labels": {"sw_version": version, "status": "idle"},
+        }
+        for i in range(count)
+    ]
+
+
+@pytest.fixture
+def clusters():
+    servers = {"east": FakeApiServer(_fleet(3)), "west": FakeApiServer(_fleet(12))}
+    yield servers
+    for server in servers.values():
+        server.close()
+
+
+def _client_for(servers):
+    def new_client_from_config(context):
+        # Unknown contexts point at a closed port, like an unreachable cluster
+        host = servers[context].url if context in servers else "http://127.0.0.1:9"
+        return ApiClient(Configuration(host=host))
+
+    return new_client_from_config
+
+
+@patch("cli.job_runner.write_rollout_metrics")
+def test_update_clusters_rolls_out_to_every_cluster(mock_metrics, clusters):
+    """Test each cluster is rolled out through its own API server."""
+    with patch(
+        "cli.job_runner.config.new_client_from_config",
+        side_effect=_client_for(clusters),
+    ):
+        results = update_clusters("2.0.0", "green", ["east", "west"])
+
+    assert results["east"]["updated"] == 3
+    assert results["west"]["updated"] == 12
+    assert clusters["east"].versions() == ["2.0.0"] * 3
+    assert clusters["west"].versions() == ["2.0.0"] * 12
+    # Counts are summed over the clusters and written once
+    mock_metrics.assert_called_once_with(15, 0)
+
+
+@patch("cli.job_runner.write_rollout_metrics")
+def test_update_clusters_applies_wave_per_cluster(mock_metrics, clusters):
+    """Test the wave size applies within each cluster, not across the fleet."""
+    with patch(
+        "cli.job_runner.config.new_client_from_config",
+        side_effect=_client_for(clusters),
+    ):
+        update_clusters("2.0.0", "blue", ["east", "west"])
+
+    assert len(clusters["east"].patches) == 2
+    assert len(clusters["west"].patches) == 2
+
+
+@patch("cli.job_runner.requests.post")
+@patch("cli.job_runner.requests.get")
+@patch("cli.job_runner.write_rollout_metrics")
+def test_run_job_reports_each_cluster(mock_metrics, mock_get, mock_post, clusters):
+    """Test an unreachable cluster fails the job without blocking the others."""
+    mock_get.return_value.json.return_value = {"checkpoint": None, "job": None}
+    job = {
+        "id": 7,
+        "version": "2.0.0",
+        "wave": "green",
+        "status": "in_progress",
+        "clusters": ["east", "west", "offline"],
+    }
+
+    with patch(
+        "cli.job_runner.config.new_client_from_config",
+        side_effect=_client_for(clusters),
+    ):
+        run_job(job)
+
+    assert clusters["east"].versions() == ["2.0.0"] * 3
+    assert clusters["west"].versions() == ["2.0.0"] * 12
+    reports = {
+        c.kwargs["params"]["cluster"]: c.kwargs["json"]
+        for c in mock_post.call_args_list
+        if c.args[0].endswith("/ota/jobs/7/clusters")
+        and c.kwargs["json"]["status"] != "in_progress"
+    }
+    assert reports == {
+        "east": {"status": "complete", "updated": 3, "skipped": 0, "failed": 0},
+        "west": {"status": "complete", "updated": 12, "skipped": 0, "failed": 0},
+        "offline": {"status": "failed"},
+    }
+    assert mock_post.call_args.kwargs["params"] == {"job_id": 7, "status": "failed"}
+
+
+@patch("cli.job_runner.requests.post")
+@patch("cli.job_runner.write_rollback_metrics")
+def test_run_job_rolls_back_each_cluster(mock_metrics, mock_post, clusters):
+    """Test a rollback job with clusters reverts updated pods in every cluster."""
+    for server in clusters.values():
+        for pod in server.pods.values():
+            pod["labels"] = {"sw_version": "2.0.0", "status": "updated"}
+    job = {
+        "id": 8,
+        "version": "1.0.0",
+        "wave": "green",
+        "status": "rollback_in_progress",
+        "clusters": ["east", "west"],
+    }
+
+    with patch(
+        "cli.job_runner.config.new_client_from_config",
+        side_effect=_client_for(clusters),
+    ):
+        run_job(job)
+
+    assert clusters["east"].versions() == ["1.0.0"] * 3
+    assert clusters["west"].versions() == ["1.0.0"] * 12
+    mock_metrics.assert_called_once_with(15)
+    assert mock_post.call_args.kwargs["params"] == {
+        "job_id": 8,
+        "status": "rollback_complete",
+    }
+
+
+@patch("cli.job_runner.requests.post")
+@patch("cli.job_runner.write_rollback_metrics")
+def test_run_job_fails_rollback_with_failed_cluster(mock_metrics, mock_post, clusters):
+    """Test a rollback that could not reach a cluster is not reported complete."""
+    for pod in clusters["east"].pods.values():
+        pod["labels"] = {"sw_version": "2.0.0", "status": "updated"}
+    job = {
+        "id": 9,
+        "version": "1.0.0",
+        "wave": "green",
+        "status": "rollback_in_progress",
+        "clusters": ["east", "offline"],
+    }
+
+    with patch(
+        "cli.job_runner.config.new_client_from_config",
+        side_effect=_client_for(clusters),
+    ):
+        run_job(job)
+
+    assert clusters["east"].versions() == ["1.0.0"] * 3
+    reports = {
+        c.kwargs["params"]["cluster"]: c.kwargs["json"]["status"]
+        for c in mock_post.call_args_list
+        if c.args[0].endswith("/ota/jobs/9/clusters")
+        and c.kwargs["json"]["status"] != "in_progress"
+    }
+    assert reports == {"east": "complete", "offline": "failed"}
+    assert mock_post.call_args.kwargs["params"] == {"job_id": 9, "status": "failed"}
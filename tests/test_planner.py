@@ -0,0 +1,116 @@
+from unittest.mock import MagicMock, patch
+
+import pytest
+import requests
+
+from cli.client import plan
+from cli.planner import (
+    DEFAULT_PATCH_STATS,
+    estimate_rollout,
+    fetch_patch_stats,
+    list_pages,
+    wave_targets,
+)
+
+STATS = {
+    "samples": 100,
+    "latency_mean": 0.5,
+    "latency_p50": 0.4,
+    "latency_p90": 1.0,
+    "attempts_mean": 1.5,
+    "failure_rate": 0.02,
+}
+
+
+@pytest.mark.parametrize(
+    ("wave", "candidates", "current", "expected"),
+    [
+        ("canary", 10, 0, 1),
+        ("canary", 10, 1, 0),
+        ("blue", 10, 1, 1),
+        ("green", 10, 3, 10),
+        ("green", 0, 3, 0),
+    ],
+)
+def test_wave_targets_match_runner(wave, candidates, current, expected):
+    """Test wave sizes count pods already at the version, like the runner."""
+    assert wave_targets(wave, candidates, current) == expected
+
+
+def test_estimate_is_latency_bound_with_low_concurrency():
+    """Test batches take ceil(batch / concurrency) patch latencies each."""
+    estimate = estimate_rollout(
+        25, STATS, concurrency=4, qps=1000, burst=10, batch_size=10, list_calls=2
+    )
+
+    # Two full batches of 3 rounds and a final batch of 5 pods in 2 rounds
+    assert estimate["batches"] == 3
+    assert estimate["seconds"] == pytest.approx(8 * 0.5)
+    assert estimate["seconds_p90"] == pytest.approx(8 * 1.0)
+    assert not estimate["rate_limited"]
+    assert estimate["patch_calls"] == 38
+    assert estimate["api_calls"] == 40
+    assert estimate["expected_failures"] == pytest.approx(0.5)
+
+
+def test_estimate_is_rate_bound_with_high_concurrency():
+    """Test calls past the burst allowance are paced by the QPS limit."""
+    estimate = estimate_rollout(
+        1000, STATS, concurrency=50, qps=20, burst=40, batch_size=100, list_calls=4
+    )
+
+    assert estimate["rate_limited"]
+    assert estimate["seconds"] == pytest.approx((1500 + 4 - 40) / 20)
+
+
+def test_list_pages_counts_at_least_one_request():
+    """Test an empty LIST still costs one request."""
+    assert [list_pages(n, page_size=500) for n in (0, 500, 501)] == [1, 1, 2]
+
+
+@patch("cli.planner.requests.get")
+def test_fetch_patch_stats_falls_back_to_defaults(mock_get):
+    """Test the planner still estimates before any patch was timed."""
+    mock_get.return_value.json.return_value = {"stats": None}
+    assert fetch_patch_stats() == DEFAULT_PATCH_STATS
+
+    mock_get.side_effect = requests.ConnectionError("refused")
+    assert fetch_patch_stats() == DEFAULT_PATCH_STATS
+
+
+@patch("cli.planner.requests.get")
+def test_plan_uses_inventory_and_recorded_stats(mock_get):
+    """Test the plan command resolves targets from the inventory."""
+
+    def get(url, **kwargs):
+        response = MagicMock()
+        if url.endswith("/ota/inventory/targets"):
+            assert kwargs["params"] == {"version": "2.0.0"}
+            response.json.return_value = {"candidates": 30, "current": 2}
+        else:
+            response.json.return_value = {"stats": STATS}
+        return response
+
+    mock_get.side_effect = get
+
+    with patch("cli.client.typer.echo") as mock_echo:
+        plan("2.0.0", wave="green", concurrency=10, qps=1000.0, source="inventory")
+
+    output = "\n".join(call.args[0] for call in mock_echo.call_args_list)
+    assert "30 pods to patch" in output
+    assert "Estimated 1.5s" in output
+    assert "45 PATCH, 2 LIST" in output
+
+
+@patch("cli.client.list_targets")
+@patch("cli.planner.requests.get")
+def test_plan_from_cluster_list(mock_get, mock_list_targets):
+    """Test --source cluster counts targets with a live LIST instead."""
+    mock_get.return_value.json.return_value = {"stats": None}
+    mock_list_targets.return_value = {"candidates": 5, "current": 0}
+
+    with patch("cli.client.typer.echo") as mock_echo:
+        plan("2.0.0", wave="canary", source="cluster")
+
+    mock_list_targets.assert_called_once_with("2.0.0")
+    assert "1 pods to patch" in mock_echo.call_args_list[0].args[0]
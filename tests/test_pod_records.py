@@ -0,0 +1,50 @@
+import json
+from unittest.mock import MagicMock
+
+from cli.pod_records import PodRecord, list_pod_records
+
+
+def _page(names, resource_version="7", next_page=None):
+    metadata = {"resourceVersion": resource_version}
+    if next_page:
+        metadata["continue"] = next_page
+    items = [
+        {
+            "metadata": {
+                "name": name,
+                "namespace": "default",
+                "labels": {"sw_version": "1.0.0", "status": "idle"},
+            }
+        }
+        for name in names
+    ]
+    return MagicMock(data=json.dumps({"metadata": metadata, "items": items}).encode())
+
+
+def test_list_pod_records_follows_continue_tokens():
+    """Test every LIST page is fetched raw and reduced to records."""
+    v1 = MagicMock()
+    v1.list_pod_for_all_namespaces.side_effect = [
+        _page(["app-1", "app-2"], next_page="token"),
+        _page(["app-3"], resource_version="8"),
+    ]
+
+    records, resource_version = list_pod_records(v1, "sw_version", page_size=2)
+
+    assert [record.name for record in records] == ["app-1", "app-2", "app-3"]
+    assert records[0] == PodRecord("default", "app-1", "1.0.0", "idle")
+    assert resource_version == "7"
+    calls = v1.list_pod_for_all_namespaces.call_args_list
+    assert [c.kwargs["_continue"] for c in calls] == [None, "token"]
+    assert v1.list_pod_for_all_namespaces.call_args.kwargs["limit"] == 2
+
+
+def test_pod_record_is_compact():
+    """Test records carry no instance dict and share interned label values."""
+    first = PodRecord.from_json(json.loads(_page(["app-1"]).data)["items"][0])
+    second = PodRecord.from_json(json.loads(_page(["app-2"]).data)["items"][0])
+
+    assert not hasattr(first, "__dict__")
+    assert first.sw_version is second.sw_version
+    assert first.namespace is second.namespace
+    assert first.ref() == {"namespace": "default", "name": "app-1"}
@@ -0,0 +1,68 @@
+from unittest.mock import MagicMock, patch
+
+import pytest
+from kubernetes.client.exceptions import ApiException
+
+from cli.rate_limiter import RateLimitedApi, TokenBucket
+
+
+@pytest.fixture
+def limiter():
+    return TokenBucket(qps=10, burst=2)
+
+
+def test_token_bucket_allows_burst(limiter):
+    """Test the bucket hands out burst tokens and then asks callers to wait."""
+    assert limiter.try_acquire() == 0
+    assert limiter.try_acquire() == 0
+    assert limiter.try_acquire() > 0
+
+
+def test_token_bucket_throttled_slows_down(limiter):
+    """Test a 429 halves the rate and honours Retry-After."""
+    with patch("builtins.print"):
+        limiter.throttled(retry_after=5)
+
+    expected_qps = 5
+    min_wait = 4
+    assert limiter.qps == expected_qps
+    assert limiter.try_acquire() > min_wait
+
+
+def test_token_bucket_recovers_after_success(limiter):
+    """Test successful calls grow the rate back to the configured maximum."""
+    limiter.qps = limiter.min_qps
+    for _ in range(100):
+        limiter.succeeded()
+    assert limiter.qps == limiter.max_qps
+
+
+def test_rate_limited_api_draws_tokens(limiter):
+    """Test wrapped API calls acquire a token and pass through results."""
+    api = MagicMock()
+    api.list_pod_for_all_namespaces.return_value = "pods"
+    wrapped = RateLimitedApi(api, limiter)
+
+    with patch.object(limiter, "acquire") as mock_acquire:
+        result = wrapped.list_pod_for_all_namespaces(label_selector="status=idle")
+
+    assert result == "pods"
+    mock_acquire.assert_called_once()
+    api.list_pod_for_all_namespaces.assert_called_once_with(
+        label_selector="status=idle"
+    )
+
+
+def test_rate_limited_api_throttles_on_429(limiter):
+    """Test a 429 from the API server slows the shared limiter down."""
+    api = MagicMock()
+    error = ApiException(status=429)
+    error.headers = {"Retry-After": "2"}
+    api.patch_namespaced_pod.side_effect = error
+    wrapped = RateLimitedApi(api, limiter)
+
+    with patch.object(limiter, "throttled") as mock_throttled:
+        with pytest.raises(ApiException):
+            wrapped.patch_namespaced_pod(name="app-1", namespace="default", body={})
+
+    mock_throttled.assert_called_once_with(2.0)
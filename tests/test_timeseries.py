@@ -0,0 +1,107 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from backend import models
+from backend.timeseries import (
+    MetricSnapshot,
+    metric_series,
+    prune_metrics,
+    record_snapshot,
+    series_resolution,
+)
+
+START = datetime(2026, 10, 19, 12, 0, 0)
+
+
+def _points(db, name, resolution):
+    return (
+        db.query(models.MetricPoint)
+        .filter_by(name=name, resolution=resolution)
+        .order_by(models.MetricPoint.bucket)
+        .all()
+    )
+
+
+def test_snapshots_roll_up_into_minute_and_hour_buckets(test_db):
+    """Test each snapshot lands raw and is folded into its 1m and 1h buckets."""
+    for seconds, latency in [(0, 0.2), (15, 0.4), (30, 0.9), (75, 0.5)]:
+        record_snapshot(
+            test_db,
+            MetricSnapshot(rollout_rate=2.0, patch_latency=latency),
+            now=START + timedelta(seconds=seconds),
+        )
+
+    assert len(_points(test_db, "patch_latency", 0)) == 4
+    minutes = _points(test_db, "patch_latency", 60)
+    assert [(p.bucket, p.samples, p.peak) for p in minutes] == [
+        (START, 3, 0.9),
+        (START + timedelta(minutes=1), 1, 0.5),
+    ]
+    assert minutes[0].value == pytest.approx(0.5)
+    (hour,) = _points(test_db, "patch_latency", 3600)
+    assert hour.samples == 4
+    assert hour.value == pytest.approx(0.5)
+    # Queue depth comes from the job table; failures were not reported
+    assert _points(test_db, "queue_depth", 0)[0].value == 0
+    assert _points(test_db, "patch_failures", 0) == []
+
+
+def test_prune_drops_points_past_retention(test_db):
+    """Test raw points age out after a day while the rollups stay."""
+    record_snapshot(test_db, MetricSnapshot(rollout_rate=1.0), now=START)
+
+    prune_metrics(test_db, START + timedelta(days=2))
+    test_db.commit()
+
+    assert _points(test_db, "rollout_rate", 0) == []
+    assert len(_points(test_db, "rollout_rate", 60)) == 1
+    assert len(_points(test_db, "rollout_rate", 3600)) == 1
+
+
+@pytest.mark.parametrize(
+    ("window", "expected"),
+    [
+        (timedelta(hours=1), 0),
+        (timedelta(hours=6), 60),
+        (timedelta(days=7), 60),
+        (timedelta(days=8), 3600),
+        (timedelta(days=400), 3600),
+    ],
+)
+def test_series_resolution_follows_window(window, expected):
+    """Test longer windows are answered from coarser rollups."""
+    assert series_resolution(window, max_points=300) == expected
+
+
+def test_metric_series_is_downsampled_to_max_points(test_db):
+    """Test a long window returns at most max_points merged buckets."""
+    for minute in range(120):
+        record_snapshot(
+            test_db,
+            MetricSnapshot(rollout_rate=float(minute)),
+            now=START + timedelta(minutes=minute),
+        )
+
+    data = metric_series(
+        test_db,
+        ["rollout_rate"],
+        window_seconds=3 * 3600,
+        max_points=10,
+        now=START + timedelta(hours=2),
+    )
+
+    # 120 one-minute buckets merged into 18-minute steps
+    assert data["resolution"] == 60
+    assert data["step"] == 1080
+    points = data["series"]["rollout_rate"]
+    assert len(points) == 7
+    assert points[0]["t"] == START.isoformat()
+    assert points[0]["value"] == pytest.approx(8.5)
+    assert points[-1]["peak"] == 119
+
+
+def test_metric_series_rejects_unknown_metrics(test_db):
+    """Test only known metric names can be queried."""
+    with pytest.raises(ValueError, match="unknown metrics"):
+        metric_series(test_db, ["cpu"])